@@ -15,18 +15,165 @@ from struct import unpack_from
 import bpy
 from bpy.types import AddonPreferences, Operator
 from bpy_extras.io_utils import ExportHelper, ImportHelper
-from bpy.props import FloatProperty, StringProperty
+from bpy.props import BoolProperty, EnumProperty, FloatProperty, IntProperty, StringProperty
 from bpy.props import CollectionProperty
 from bpy.types import OperatorFileListElement
 import os
+import tempfile
+import time
 
 from .src.ps2.Import.skinmodel import SkinModel
 from .src.XBOX.Import.skinmodel_ymxen import YMXEN_SkinModel, install_ymxen_springs, load_dds_from_memory
-from .src.globals.camera import Camera
+from .src.globals.camera import Camera, uninstall_camera_switcher
 from .src.globals.light import Light
+from .src.globals.naming import Namespace
+from .src.globals.bounds import cull, culling_installed, install_culling, uninstall_culling
+from .src.globals.library import file_signature, library_key, library_path, link_library, write_library
 from .src.XBOX.Export.ymxen import YMXEN
+from .src.XBOX.Export.patch import YMXEN_Patch
+from .src.XBOX.Export.textures import YMXEN_Textures
+from .src.XBOX.Export.incremental import IncrementalYMXEN, install_export_tracking, uninstall_export_tracking
+from .src.XBOX.Export.batch import collection_images, export_roster, export_targets
+from .src.batch_export import format_report
+from .src.decode import parse_selection
+from .src.decode.cache import ModelCache
+from .src.decode.io import decode_payload, map_file, read_payload
+from .src.decode.parallel import decode_files
+from .src.encode.strips import MAX_LENGTH
+
+
+class YMP_Preferences(AddonPreferences):
+	bl_idname = __package__
+
+	cache_dir: StringProperty(
+		name="Cache Folder",
+		description="Where decoded models are cached, empty uses the system temporary folder",
+		subtype="DIR_PATH",
+		default="",
+	)
+	cache_size: IntProperty(
+		name="Cache Size (MB)",
+		description="Least recently used models are removed beyond this size",
+		min=16,
+		default=2048,
+	)
+
+	def draw(self, context):
+		layout = self.layout
+		layout.prop(self, "cache_dir")
+		layout.prop(self, "cache_size")
+
+
+def model_cache() -> ModelCache:
+	prefs = bpy.context.preferences.addons[__package__].preferences
+	directory = bpy.path.abspath(prefs.cache_dir) if prefs.cache_dir else os.path.join(tempfile.gettempdir(), "io_mesh_ymp")
+	return ModelCache(directory, prefs.cache_size << 20)
 
-class IMPORT_YMP_PS2(Operator, ImportHelper):
+
+class ImportYMP:
+	parallel: BoolProperty(
+		name="Parallel Decoding",
+		description="Decode multi-file selections in worker processes",
+		default=True,
+	)
+	only_collections: StringProperty(
+		name="Collections",
+		description="Only import these object groups, comma separated names (wildcards allowed) or indices. Empty imports all",
+		default="",
+	)
+	only_subobjects: StringProperty(
+		name="Sub-Objects",
+		description="Only import these sub-objects, comma separated indices or ranges such as 0,3-5. Empty imports all",
+		default="",
+	)
+	use_cache: BoolProperty(
+		name="Cache Decoded Models",
+		description="Keep decoded models on disk (see the add-on preferences) and reuse them while the file is unchanged",
+		default=False,
+	)
+
+	link_library: BoolProperty(
+		name="Link From Library",
+		description="Save each imported model as a library .blend in the cache folder and link it on later imports of the same file",
+		default=False,
+	)
+
+	def library_settings(self) -> tuple:
+		"""Import options that change what gets built, part of the library key."""
+		return (self.bl_idname, self.scale, self.only_collections, self.only_subobjects, self.shader_filter())
+
+	def shader_filter(self) -> str:
+		"""Shader patterns, only XBOX sub-objects name a shader."""
+		return ""
+
+	def read_selection(self) -> bool:
+		"""Parse the filters for payloads, reporting bad input instead of raising."""
+		try:
+			self._selection = parse_selection(self.only_collections, self.only_subobjects, self.shader_filter())
+		except ValueError as e:
+			self.report({"ERROR"}, str(e))
+			return False
+		return True
+
+	def link_libraries(self, names: dict[str, str]) -> dict[str, str]:
+		"""Instance the files that already have a library, returns the rest."""
+		directory = os.path.join(model_cache().directory, "library")
+		settings = self.library_settings()
+		self._libraries = {}
+		rest = {}
+		for path, name in names.items():
+			key = library_key(path, *settings)
+			lib = library_path(directory, key)
+			if os.path.exists(lib):
+				try:
+					link_library(lib, key, Namespace(name)("Library"), bpy.context.collection)
+					continue
+				except (OSError, ValueError) as e:
+					self.report({"WARNING"}, f"Rebuilding {name}: {e}")
+			self._libraries[name] = (lib, key)
+			rest[path] = name
+		return rest
+
+	def save_library(self, name: str, m):
+		lib, key = self._libraries[name]
+		try:
+			write_library(lib, key, getattr(m, "armature", None), m.cols)
+		except (OSError, RuntimeError) as e:
+			self.report({"WARNING"}, f"Could not save {name} as a library: {e}")
+
+	def payloads(self, magic: bytes):
+		"""Yield (file name, payload or decoded Model) for every selected file of this format."""
+		names = {bpy.path.abspath(self.directory + f.name): f.name for f in self.files}
+		self._sources = {name: path for path, name in names.items()}
+		if self.link_library:
+			names = self.link_libraries(names)
+		selection = self._selection
+		cache = model_cache() if self.use_cache else None
+		if self.parallel and len(names) > 1:
+			for path, result in decode_files(list(names), magic, selection=selection, cache=cache):
+				if isinstance(result, Exception):
+					self.report({"WARNING"}, f"Skipping {names[path]}: {result}")
+					continue
+				yield names[path], result
+			return
+
+		for path, name in names.items():
+			try:
+				found, payload = read_payload(path)
+			except ValueError:
+				found = None
+			if found != magic:
+				self.report({"WARNING"}, f"Skipping {name}")
+				continue
+			if cache:
+				yield name, cache.fetch(magic, payload, selection)
+			elif selection:
+				yield name, decode_payload(magic, payload, selection)
+			else:
+				yield name, payload
+
+
+class ImportYMP_PS2(ImportYMP):
 	bl_idname = "import_scene.ymp_model_ps2"
 	bl_label = "Import YMP"
 	bl_description = "Imports Yuke's Models"
@@ -42,27 +189,43 @@ class IMPORT_YMP_PS2(Operator, ImportHelper):
 	directory: StringProperty(subtype="DIR_PATH")
 	tex_path: StringProperty(name="textures", subtype="DIR_PATH", maxlen=260)
 	scale: FloatProperty(name="Scale", min=0.0, max=16.0, default=1.0, subtype="FACTOR")
+	share_armature: BoolProperty(
+		name="Share Armatures",
+		description="Bind models with an identical bone table to one existing armature",
+		default=True,
+	)
+	share_meshes: BoolProperty(
+		name="Share Meshes",
+		description="Reuse the mesh data of identical sub-objects instead of building a copy",
+		default=True,
+	)
 
 	def execute(self, context):
-		for file_elem in self.files:
-			full_path = bpy.path.abspath(self.directory + file_elem.name)
-
-			with open(full_path, "rb") as f:
-				if f.read(4) != b"YOBJ":
-					self.report({"WARNING"}, f"Skipping {file_elem.name}")
-					continue
-
-				size = int.from_bytes(f.read(4), "little")
-				file = memoryview(bytearray(f.read(size)))
-
-				m = SkinModel(file, self.scale)
-				if self.tex_path:
-					m.set_texture(self.tex_path)
-				# m.build_materials()
-				m.start()
-
+		if not self.read_selection():
+			return {"CANCELLED"}
+		for _ in self.import_tasks(context):
+			pass
 		return {"FINISHED"}
 
+	def import_tasks(self, context):
+		"""Import split into small steps, yields overall progress in [0, 1] after each."""
+		count = max(len(self.files), 1)
+		for n, (name, file) in enumerate(self.payloads(b"YOBJ")):
+			self._names = Namespace(name)
+			m = SkinModel(file, self.scale, self.share_armature, self._names, share_meshes=self.share_meshes)
+			if self.tex_path:
+				m.set_texture(self.tex_path)
+			# m.build_materials()
+			yield n / count
+			for built, total in m.build():
+				yield (n + built / max(total, 1)) / count
+			if self.link_library:
+				self.save_library(name, m)
+			self._names = None
+
+	def library_settings(self) -> tuple:
+		return super().library_settings() + (self.tex_path, self.share_armature, self.share_meshes)
+
 
 class YMP_PreviewProps(bpy.types.PropertyGroup):
 	preview_image: bpy.props.PointerProperty(
@@ -71,7 +234,7 @@ class YMP_PreviewProps(bpy.types.PropertyGroup):
 	)
 
 
-class IMPORT_YMP_XBOX(Operator, ImportHelper):
+class ImportYMP_XBOX(ImportYMP):
 	bl_idname = "import_scene.ymp_model_xbox"
 	bl_label = "Import YMP"
 	bl_description = "Imports Yuke's Models"
@@ -88,9 +251,41 @@ class IMPORT_YMP_XBOX(Operator, ImportHelper):
 
 	directory: StringProperty(subtype="DIR_PATH")
 	scale: FloatProperty(name="Scale", min=0.0, max=16.0, default=1.0, subtype="FACTOR")
+	share_armature: BoolProperty(
+		name="Share Armatures",
+		description="Bind models with an identical bone table to one existing armature",
+		default=True,
+	)
+	share_meshes: BoolProperty(
+		name="Share Meshes",
+		description="Reuse the mesh data of identical sub-objects instead of building a copy",
+		default=True,
+	)
+	switch_cameras: BoolProperty(
+		name="Switch Cameras",
+		description="Follow the imported model through the camera.txt zones on frame change",
+		default=False,
+	)
+	only_shaders: StringProperty(
+		name="Shaders",
+		description="Only import sub-objects using these shaders, comma separated names (wildcards allowed). Empty imports all",
+		default="",
+	)
+
+	def shader_filter(self) -> str:
+		return self.only_shaders
 
 	def execute(self, context):
+		if not self.read_selection():
+			return {"CANCELLED"}
+		for _ in self.import_tasks(context):
+			pass
+		return {"FINISHED"}
+
+	def import_tasks(self, context):
+		"""Import split into small steps, yields overall progress in [0, 1] after each."""
 		tex_dir = self.directory
+		cameras = None
 
 		# ---- Pre-scan directory once ----
 
@@ -102,8 +297,7 @@ class IMPORT_YMP_XBOX(Operator, ImportHelper):
 			path = os.path.join(tex_dir, name)
 
 			if lname.endswith(".tex"):
-				with open(path, "rb") as tf:
-					tex_filepacks.append(memoryview(tf.read()))
+				tex_filepacks.append(map_file(path))
 
 			elif lname.startswith("bane_muscle"):
 				bane_files.append(path)
@@ -114,7 +308,7 @@ class IMPORT_YMP_XBOX(Operator, ImportHelper):
 				img = bpy.data.images.load(path, check_existing=True)
 				context.scene.preview_props.preview_image = img
 			elif lname == 'camera.txt':
-				Camera(path)
+				cameras = Camera(path)
 
 		tex_filepacks = tuple(tex_filepacks)
 		# in IMPORT_YMP_XBOX.execute, after tex_filepacks = tuple(tex_filepacks)
@@ -137,22 +331,18 @@ class IMPORT_YMP_XBOX(Operator, ImportHelper):
 					if key not in shared_textures:
 						shared_textures[key] = load_dds_from_memory(name, data, prefix="shared")
 		build_shared_texture_cache(tex_filepacks)
+		yield 0.0
 
 
 		# ---- Per-file processing ----
 
-		for file_elem in self.files:
-			full_path = bpy.path.abspath(self.directory + file_elem.name)
-
-			with open(full_path, "rb") as f:
-				if f.read(4) != b"JBOY":
-					self.report({"WARNING"}, f"Skipping {file_elem.name}")
-					continue
-
-				size = int.from_bytes(f.read(4), "big")
-				file = memoryview(bytearray(f.read(size)))
-
-			m = YMXEN_SkinModel(file, self.scale)
+		m = None
+		count = max(len(self.files), 1)
+		for n, (name, file) in enumerate(self.payloads(b"JBOY")):
+			self._names = Namespace(name)
+			m = YMXEN_SkinModel(
+				file, self.scale, self.share_armature, self._names, share_meshes=self.share_meshes, source=self._sources[name]
+			)
 			m.build_texture_slots()
 			m.loaded_textures = shared_textures       # reuse!
 			m.resolve_texture_slots()
@@ -164,33 +354,299 @@ class IMPORT_YMP_XBOX(Operator, ImportHelper):
 			for path in abd_files:
 				m.create_attachment_points(path)
 
-			m.start()
+			yield n / count
+			for built, total in m.build():
+				yield (n + built / max(total, 1)) / count
+			if self.link_library:
+				bpy.ops.object.mode_set(mode="OBJECT")
+				self.save_library(name, m)
+			self._names = None
 
 		bpy.ops.object.mode_set(mode="OBJECT")
 		install_ymxen_springs()
-		return {"FINISHED"}
+		if cameras and self.switch_cameras and m:
+			cameras.track(m.armature)
+
+	def library_settings(self) -> tuple:
+		siblings = [
+			os.path.join(self.directory, name)
+			for name in os.listdir(self.directory)
+			if name.lower().endswith((".tex", ".abd")) or name.lower().startswith("bane_muscle")
+		]
+		return super().library_settings() + (self.share_armature, self.share_meshes, file_signature(siblings))
+
+
+class ModalImport:
+	"""Runs import_tasks from a window-manager timer, a slice per tick, so Blender
+	stays responsive. Esc removes the model being built and keeps finished ones.
+	"""
+
+	time_budget: FloatProperty(
+		name="Time Budget",
+		description="Milliseconds of import work per timer tick",
+		min=1.0,
+		max=1000.0,
+		default=50.0,
+	)
+
+	def execute(self, context):
+		if not self.read_selection():
+			return {"CANCELLED"}
+		self._names = None
+		self._progress = 0.0
+		self._tasks = self.import_tasks(context)
+		wm = context.window_manager
+		self._timer = wm.event_timer_add(0.01, window=context.window)
+		wm.progress_begin(0, 100)
+		wm.modal_handler_add(self)
+		return {"RUNNING_MODAL"}
+
+	def modal(self, context, event):
+		if event.type == "ESC":
+			self.rollback()
+			self.finish(context)
+			self.report({"WARNING"}, "Import cancelled")
+			return {"CANCELLED"}
+		if event.type != "TIMER":
+			return {"PASS_THROUGH"}
+
+		deadline = time.perf_counter() + self.time_budget / 1000.0
+		try:
+			while time.perf_counter() < deadline:
+				self._progress = next(self._tasks)
+		except StopIteration:
+			self.finish(context)
+			return {"FINISHED"}
+		except Exception as e:
+			self.rollback()
+			self.finish(context)
+			self.report({"ERROR"}, f"Import failed: {e}")
+			return {"CANCELLED"}
+
+		context.window_manager.progress_update(int(self._progress * 100))
+		context.workspace.status_text_set(
+			f"Importing YMP {self._progress:.0%} (Esc to cancel)"
+		)
+		return {"RUNNING_MODAL"}
+
+	def rollback(self):
+		self._tasks.close()
+		if self._names is not None:
+			self._names.discard()
+			self._names = None
+		if bpy.context.object and bpy.context.object.mode != "OBJECT":
+			bpy.ops.object.mode_set(mode="OBJECT")
+
+	def finish(self, context):
+		wm = context.window_manager
+		wm.event_timer_remove(self._timer)
+		wm.progress_end()
+		context.workspace.status_text_set(None)
+
+
+class IMPORT_YMP_PS2(ImportYMP_PS2, Operator, ImportHelper):
+	pass
+
+
+class IMPORT_YMP_PS2_MODAL(ModalImport, ImportYMP_PS2, Operator, ImportHelper):
+	bl_idname = "import_scene.ymp_model_ps2_modal"
+	bl_description = "Imports Yuke's Models in the background, Esc cancels"
+
+
+class IMPORT_YMP_XBOX(ImportYMP_XBOX, Operator, ImportHelper):
+	pass
+
+
+class IMPORT_YMP_XBOX_MODAL(ModalImport, ImportYMP_XBOX, Operator, ImportHelper):
+	bl_idname = "import_scene.ymp_model_xbox_modal"
+	bl_description = "Imports Yuke's Models in the background, Esc cancels"
 
 
 class EXPORT_YMP_XBOX(Operator, ExportHelper):
 	bl_idname = "export_scene.ymp_model_xbox"
 	bl_label = "export YMP"
 	filename_ext = ".ymxen"
+
+	incremental: BoolProperty(
+		name="Reuse Unchanged Collections",
+		description="Only re-encode the collections edited since the last export in this session",
+		default=True,
+	)
+	max_influences: IntProperty(
+		name="Max Influences",
+		description="Bones per vertex, the weakest beyond this are dropped and the rest renormalised. 0 keeps them all",
+		min=0,
+		max=20,
+		default=4,
+	)
+	apply_modifiers: BoolProperty(
+		name="Apply Modifiers",
+		description="Export the meshes as the modifiers leave them, with the armature in its rest pose",
+		default=False,
+	)
+	band_strips: BoolProperty(
+		name="Banded Strips",
+		description="Cut strips short and lay them side by side for fewer vertex cache misses. About three times slower to export",
+		default=False,
+	)
+	export_textures: BoolProperty(
+		name="Write Textures",
+		description="Also write the .tex filepack next to the model. Unchanged textures are copied as imported, edited ones compressed again",
+		default=False,
+	)
+
 	def execute(self, context):
-		col = list(bpy.data.collections)
+		col = [c for c in bpy.data.collections if any(o.type == 'MESH' for o in c.objects)]
 		arm = None
 		for obj in bpy.context.scene.collection.objects:
 			if obj.type == 'ARMATURE':
 				arm = obj
 				break
 		assert arm
-		textures = list(bpy.data.images)
-		handler = YMXEN(col, arm, textures)
-		handler.write()
+		# The model's own images, as the batch export takes them, so both write the same file
+		textures = collection_images(col)
+		handler = (IncrementalYMXEN if self.incremental else YMXEN)(
+			col,
+			arm,
+			textures,
+			max_influences=self.max_influences,
+			apply_modifiers=self.apply_modifiers,
+			strip_length=MAX_LENGTH if self.band_strips else 0,
+		)
+		pack = filepack = None
+		try:
+			data = handler.write()
+			if self.export_textures:
+				# Before anything is written, an image without data fails the export instead of becoming an empty texture
+				# Textures only named by parameters can come from any imported image
+				pack = YMXEN_Textures(handler.texture_names, textures + [img for img in bpy.data.images if "ymp_name" in img])
+				filepack = pack.write()
+		except ValueError as e:
+			self.report({'ERROR'}, str(e))
+			return {'CANCELLED'}
 		with open(self.filepath, 'wb') as ymp:
-			for f in handler.structs:
-				ymp.write(f.getvalue())
+			ymp.write(data)
+		packed = ""
+		if filepack is not None:
+			with open(os.path.splitext(self.filepath)[0] + ".tex", 'wb') as tex:
+				tex.write(filepack)
+			packed = f", {pack.encoded} textures compressed and {pack.reused} copied"
+		triangles = sum(s.triangles for s in handler.strips)
+		self.report(
+			{'INFO'},
+			f"{len(handler.strips)} sub-objects, {triangles} triangles in {sum(s.indices for s in handler.strips)} strip indices, "
+			f"ACMR {sum(s.misses for s in handler.strips) / max(triangles, 1):.3f}"
+			+ (f", {handler.encoded} of {len(col)} collections re-encoded" if self.incremental else "")
+			+ packed,
+		)
 		return {'FINISHED'}
 
+class EXPORT_YMP_XBOX_PATCH(Operator, ExportHelper):
+	bl_idname = "export_scene.ymp_model_xbox_patch"
+	bl_label = "Patch YMP"
+	bl_description = "Write vertex, UV and shader parameter edits of imported sub-objects into a copy of the file they came from"
+	filename_ext = ".ymxen"
+
+	use_selection: BoolProperty(
+		name="Selected Only",
+		description="Only patch the selected sub-objects",
+		default=False,
+	)
+
+	def execute(self, context):
+		objects = context.selected_objects if self.use_selection else context.scene.objects
+		objects = [o for o in objects if o.type == 'MESH' and "ymp_source" in o]
+		if not objects:
+			self.report({'ERROR'}, "No imported sub-objects to patch")
+			return {'CANCELLED'}
+		start = time.perf_counter()
+		try:
+			handler = YMXEN_Patch(objects)
+			patcher = handler.write(self.filepath)
+		except (OSError, ValueError) as e:
+			self.report({'ERROR'}, str(e))
+			return {'CANCELLED'}
+		self.report(
+			{'INFO'},
+			f"{handler.subobjects} of {len(objects)} sub-objects changed, {patcher.changed} bytes in {patcher.spans} spans "
+			f"({(time.perf_counter() - start) * 1000:.0f} ms)",
+		)
+		return {'FINISHED'}
+
+
+class EXPORT_YMP_XBOX_BATCH(Operator):
+	bl_idname = "export_scene.ymp_model_xbox_batch"
+	bl_label = "Export YMP Roster"
+	bl_description = "Export every model in the file to its own .ymxen in a folder, encoding them in parallel"
+
+	directory: StringProperty(subtype="DIR_PATH")
+	filter_folder: BoolProperty(default=True, options={'HIDDEN'})
+
+	use_selection: BoolProperty(
+		name="Selected Only",
+		description="Only export the models with a selected mesh",
+		default=False,
+	)
+	max_influences: IntProperty(
+		name="Max Influences",
+		description="Bones per vertex, the weakest beyond this are dropped and the rest renormalised. 0 keeps them all",
+		min=0,
+		max=20,
+		default=4,
+	)
+	apply_modifiers: BoolProperty(
+		name="Apply Modifiers",
+		description="Export the meshes as the modifiers leave them, with the armature in its rest pose",
+		default=False,
+	)
+	band_strips: BoolProperty(
+		name="Banded Strips",
+		description="Cut strips short and lay them side by side for fewer vertex cache misses. About three times slower to export",
+		default=False,
+	)
+	export_textures: BoolProperty(
+		name="Write Textures",
+		description="Also write each model's .tex filepack. Unchanged textures are copied as imported, edited ones compressed again",
+		default=False,
+	)
+	jobs: IntProperty(
+		name="Workers",
+		description="Encoding processes, 0 uses every core",
+		min=0,
+		default=0,
+	)
+
+	def invoke(self, context, event):
+		context.window_manager.fileselect_add(self)
+		return {'RUNNING_MODAL'}
+
+	def execute(self, context):
+		targets = export_targets(selected_only=self.use_selection)
+		if not targets:
+			self.report({'ERROR'}, "No models to export")
+			return {'CANCELLED'}
+		start = time.perf_counter()
+		reports = export_roster(
+			targets,
+			bpy.path.abspath(self.directory),
+			self.jobs or None,
+			lambda report: print("EXPORT_YMP_XBOX_BATCH:", format_report(report)),
+			textures=self.export_textures,
+			max_influences=self.max_influences,
+			apply_modifiers=self.apply_modifiers,
+			strip_length=MAX_LENGTH if self.band_strips else 0,
+		)
+		failed = [r for r in reports if r["error"]]
+		for report in failed:
+			self.report({'WARNING'}, format_report(report))
+		self.report(
+			{'ERROR' if len(failed) == len(reports) else 'INFO'},
+			f"{len(reports) - len(failed)} of {len(reports)} models exported in {time.perf_counter() - start:.2f}s, "
+			"timings per model in the console",
+		)
+		return {'FINISHED'} if len(failed) < len(reports) else {'CANCELLED'}
+
+
 class IMPORT_MT_ymp(bpy.types.Menu):
 	bl_label = "Yuke's Model Properties"
 
@@ -200,6 +656,11 @@ class IMPORT_MT_ymp(bpy.types.Menu):
 			"import_scene.ymp_model_ps2", text="PlayStation 2 (.YMP, .YOBJ)"
 		)
 		layout.operator("import_scene.ymp_model_xbox", text="XBOX (.YMXEN, .JBOY)")
+		layout.separator()
+		layout.operator(
+			"import_scene.ymp_model_ps2_modal", text="PlayStation 2 (Background)"
+		)
+		layout.operator("import_scene.ymp_model_xbox_modal", text="XBOX (Background)")
 
 
 class EXPORT_MT_ymp(bpy.types.Menu):
@@ -208,6 +669,8 @@ class EXPORT_MT_ymp(bpy.types.Menu):
 	def draw(self, context):
 		layout = self.layout
 		layout.operator("export_scene.ymp_model_xbox", text="XBOX")
+		layout.operator("export_scene.ymp_model_xbox_patch", text="XBOX (Patch Original)")
+		layout.operator("export_scene.ymp_model_xbox_batch", text="XBOX (Batch)")
 
 
 
@@ -228,6 +691,55 @@ class VIEW3D_PT_preview_panel(bpy.types.Panel):
 			open="image.open"
 		)
 
+class VIEW3D_OT_ymp_cull(Operator):
+	bl_idname = "view3d.ymp_cull"
+	bl_label = "Cull Sub-Objects"
+	bl_description = "Hide or draw as bounds the imported sub-objects outside the view"
+
+	mode: EnumProperty(
+		name="Mode",
+		items=(
+			("BOUNDS", "Bounds", "Draw culled sub-objects as bounding boxes"),
+			("HIDE", "Hide", "Hide culled sub-objects in the viewport"),
+		),
+		default="BOUNDS",
+	)
+	distance: FloatProperty(name="Distance", min=0.0, default=0.0, subtype="DISTANCE")
+	live: BoolProperty(name="Live", description="Keep culling as the view moves", default=True)
+
+	def execute(self, context):
+		if self.live:
+			install_culling(self.mode, self.distance)
+		else:
+			region_3d = context.space_data.region_3d if context.space_data and context.space_data.type == "VIEW_3D" else None
+			cull(region_3d, self.mode, self.distance)
+		return {"FINISHED"}
+
+
+class VIEW3D_OT_ymp_cull_clear(Operator):
+	bl_idname = "view3d.ymp_cull_clear"
+	bl_label = "Show All Sub-Objects"
+	bl_description = "Stop culling and restore every imported sub-object"
+
+	def execute(self, context):
+		uninstall_culling()
+		return {"FINISHED"}
+
+
+class VIEW3D_PT_ymp_culling(bpy.types.Panel):
+	bl_label = "Sub-Object Culling"
+	bl_space_type = 'VIEW_3D'
+	bl_region_type = 'UI'
+	bl_category = "Preview"
+
+	def draw(self, context):
+		layout = self.layout
+		if culling_installed():
+			layout.operator("view3d.ymp_cull_clear")
+		else:
+			layout.operator("view3d.ymp_cull")
+
+
 def menu_func_import(self, context):
 	self.layout.menu("IMPORT_MT_ymp", text="Yuke's Models")
 
@@ -236,8 +748,12 @@ def menu_func_export(self, context):
 	self.layout.menu("EXPORT_MT_ymp", text="Yuke's Models")
 
 def register():
+	bpy.utils.register_class(YMP_Preferences)
 	bpy.utils.register_class(YMP_PreviewProps)
 	bpy.utils.register_class(VIEW3D_PT_preview_panel)
+	bpy.utils.register_class(VIEW3D_OT_ymp_cull)
+	bpy.utils.register_class(VIEW3D_OT_ymp_cull_clear)
+	bpy.utils.register_class(VIEW3D_PT_ymp_culling)
 
 	bpy.types.Scene.preview_props = bpy.props.PointerProperty(
 		type=YMP_PreviewProps
@@ -245,25 +761,41 @@ def register():
 
 	bpy.utils.register_class(IMPORT_YMP_PS2)
 	bpy.utils.register_class(IMPORT_YMP_XBOX)
+	bpy.utils.register_class(IMPORT_YMP_PS2_MODAL)
+	bpy.utils.register_class(IMPORT_YMP_XBOX_MODAL)
 	bpy.utils.register_class(EXPORT_YMP_XBOX)
+	bpy.utils.register_class(EXPORT_YMP_XBOX_PATCH)
+	bpy.utils.register_class(EXPORT_YMP_XBOX_BATCH)
 	bpy.utils.register_class(IMPORT_MT_ymp)
 	bpy.utils.register_class(EXPORT_MT_ymp)
 	bpy.types.TOPBAR_MT_file_import.append(menu_func_import)
 	bpy.types.TOPBAR_MT_file_export.append(menu_func_export)
+	install_export_tracking()
 
 
 
 def unregister():
+	uninstall_camera_switcher()
+	uninstall_culling()
+	uninstall_export_tracking()
 	bpy.types.TOPBAR_MT_file_import.remove(menu_func_import)
 	bpy.types.TOPBAR_MT_file_export.remove(menu_func_export)
 
 	del bpy.types.Scene.preview_props
 
+	bpy.utils.unregister_class(VIEW3D_PT_ymp_culling)
+	bpy.utils.unregister_class(VIEW3D_OT_ymp_cull_clear)
+	bpy.utils.unregister_class(VIEW3D_OT_ymp_cull)
 	bpy.utils.unregister_class(VIEW3D_PT_preview_panel)
 	bpy.utils.unregister_class(YMP_PreviewProps)
 
 	bpy.utils.unregister_class(IMPORT_YMP_PS2)
 	bpy.utils.unregister_class(IMPORT_YMP_XBOX)
+	bpy.utils.unregister_class(IMPORT_YMP_PS2_MODAL)
+	bpy.utils.unregister_class(IMPORT_YMP_XBOX_MODAL)
 	bpy.utils.unregister_class(EXPORT_YMP_XBOX)
+	bpy.utils.unregister_class(EXPORT_YMP_XBOX_PATCH)
+	bpy.utils.unregister_class(EXPORT_YMP_XBOX_BATCH)
 	bpy.utils.unregister_class(IMPORT_MT_ymp)
 	bpy.utils.unregister_class(EXPORT_MT_ymp)
+	bpy.utils.unregister_class(YMP_Preferences)
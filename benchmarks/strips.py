@@ -0,0 +1,95 @@
+"""Compare the export strip strategies on synthetic meshes.
+
+	python benchmarks/strips.py [--size 100000] [--cache 16]
+
+For each mesh (a grid and a subdivided icosahedron, both with their triangles
+shuffled the way an arbitrary Blender face order looks) it prints the index
+count, indices per triangle, ACMR and ATVR under a FIFO cache, and the time
+taken. Every strip is decoded again and checked against the input triangles.
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.decode.xbox import strips_to_triangles  # noqa: E402
+from src.encode.strips import CACHE_SIZE, grow_strips, stitch, strip_stats, tipsify  # noqa: E402
+from src.encode.xbox import triangles_to_strip  # noqa: E402
+
+
+def grid(triangles: int) -> np.ndarray:
+	n = max(int((triangles / 2) ** 0.5), 1)
+	v = np.arange((n + 1) * (n + 1)).reshape(n + 1, n + 1)
+	a, b, c, d = v[:-1, :-1].ravel(), v[:-1, 1:].ravel(), v[1:, 1:].ravel(), v[1:, :-1].ravel()
+	return np.concatenate((np.stack((a, b, c), 1), np.stack((a, c, d), 1)))
+
+
+def icosphere(triangles: int) -> np.ndarray:
+	faces = np.array(
+		[
+			(0, 11, 5), (0, 5, 1), (0, 1, 7), (0, 7, 10), (0, 10, 11), (1, 5, 9), (5, 11, 4),
+			(11, 10, 2), (10, 7, 6), (7, 1, 8), (3, 9, 4), (3, 4, 2), (3, 2, 6), (3, 6, 8),
+			(3, 8, 9), (4, 9, 5), (2, 4, 11), (6, 2, 10), (8, 6, 7), (9, 8, 1),
+		]
+	)
+	count = 12
+	while len(faces) * 4 <= triangles:
+		# Split every edge once, midpoints numbered by their sorted edge
+		edges = np.sort(np.concatenate((faces[:, (0, 1)], faces[:, (1, 2)], faces[:, (2, 0)])), 1)
+		unique, inverse = np.unique(edges, axis=0, return_inverse=True)
+		mid = (count + inverse.ravel()).reshape(3, -1)
+		count += len(unique)
+		a, b, c = faces.T
+		ab, bc, ca = mid
+		faces = np.concatenate(
+			(np.stack((a, ab, ca), 1), np.stack((b, bc, ab), 1), np.stack((c, ca, bc), 1), np.stack((ab, bc, ca), 1))
+		)
+	return faces
+
+
+def canonical(faces: np.ndarray) -> np.ndarray:
+	"""Triangles rotated to start at their lowest index, sorted, for comparing winding and content."""
+	first = np.argmin(faces, 1)
+	rotated = np.take_along_axis(faces, (first[:, None] + np.arange(3)) % 3, 1)
+	return rotated[np.lexsort(rotated.T[::-1])]
+
+
+STRATEGIES = {
+	"list": lambda f, cache: triangles_to_strip(f),
+	"tipsify list": lambda f, cache: triangles_to_strip(f[tipsify(f, cache_size=cache)]),
+	"strips": lambda f, cache: stitch(grow_strips(f)),
+	"tipsify strips": lambda f, cache: stitch(grow_strips(f, tipsify(f, cache_size=cache))),
+	"banded strips": lambda f, cache: stitch(grow_strips(f, tipsify(f, cache_size=cache), cache - 2, cache)),
+}
+
+
+def main(argv: list[str] | None = None):
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("--size", type=int, default=100_000, help="triangles per mesh, roughly")
+	parser.add_argument("--cache", type=int, default=CACHE_SIZE, help="FIFO cache entries")
+	parser.add_argument("--seed", type=int, default=0)
+	args = parser.parse_args(argv)
+	rng = np.random.default_rng(args.seed)
+
+	print(f"{'mesh':<10} {'strategy':<16} {'indices':>9} {'idx/tri':>8} {'ACMR':>6} {'ATVR':>6} {'seconds':>8}")
+	for name, build in (("grid", grid), ("sphere", icosphere)):
+		faces = build(args.size)
+		faces = faces[rng.permutation(len(faces))]
+		expected = canonical(faces)
+		for strategy, run in STRATEGIES.items():
+			start = time.perf_counter()
+			strip = np.asarray(run(faces, args.cache), dtype=np.int64)
+			seconds = time.perf_counter() - start
+			if not np.array_equal(canonical(strips_to_triangles(strip)), expected):
+				raise SystemExit(f"{name}/{strategy}: strip does not decode to the input triangles")
+			stats = strip_stats(strip, args.cache)
+			print(
+				f"{name:<10} {strategy:<16} {stats.indices:>9} {stats.indices / len(faces):>8.2f}"
+				f" {stats.acmr:>6.3f} {stats.atvr:>6.3f} {seconds:>8.3f}"
+			)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,121 @@
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
+from multiprocessing.shared_memory import SharedMemory
+import os
+import time
+import bpy
+import numpy as np
+
+from ...batch_export import export_workers, run
+from ...worker import pool
+from ...decode.model import flatten
+from ...decode.parallel import to_shared
+from ...globals.naming import SEP
+from .textures import YMXEN_Textures
+from .ymxen import YMXEN
+
+
+@dataclass(slots=True)
+class ExportTarget:
+	"""One model of a roster: its namespace stem, armature and collections, in file order."""
+
+	name: str
+	armature: bpy.types.Object | None
+	collections: list[bpy.types.Collection] = field(default_factory=list)
+
+
+def skinned_to(obj: bpy.types.Object) -> bpy.types.Object | None:
+	"""The armature obj is deformed by, its parent or its first armature modifier's."""
+	if obj.parent is not None and obj.parent.type == 'ARMATURE':
+		return obj.parent
+	for modifier in obj.modifiers:
+		if modifier.type == 'ARMATURE' and modifier.object is not None:
+			return modifier.object
+	return None
+
+
+def export_targets(patterns: list[str] = (), selected_only: bool = False) -> list[ExportTarget]:
+	"""The models in the file, collections grouped by the stem of their names.
+
+	patterns are wildcards the stem has to match, if any. With selected_only a
+	model is kept when one of its meshes is selected.
+	"""
+	targets: dict[str, ExportTarget] = {}
+	for col in bpy.data.collections:
+		meshes = [o for o in col.objects if o.type == 'MESH']
+		if not meshes:
+			continue
+		stem = col.name.split(SEP, 1)[0]
+		if patterns and not any(fnmatchcase(stem, p.strip()) for p in patterns):
+			continue
+		target = targets.setdefault(stem, ExportTarget(stem, None))
+		target.collections.append(col)
+		if target.armature is None:
+			target.armature = next(filter(None, map(skinned_to, meshes)), None)
+	found = list(targets.values())
+	if selected_only:
+		found = [t for t in found if any(o.select_get() for c in t.collections for o in c.objects if o.type == 'MESH')]
+	return found
+
+
+def collection_images(collections: list[bpy.types.Collection]) -> list[bpy.types.Image]:
+	"""Imported images on the materials of the meshes in collections, in node order. They open the texture table."""
+	own = {}
+	for col in collections:
+		for obj in col.objects:
+			for slot in obj.material_slots:
+				mat = slot.material
+				if mat is None or mat.node_tree is None:
+					continue
+				for node in mat.node_tree.nodes:
+					if node.type == 'TEX_IMAGE' and node.image is not None and "ymp_name" in node.image:
+						own.setdefault(node.image.name, node.image)
+	return list(own.values())
+
+
+def read_target(target: ExportTarget, textures: bool = False, **options) -> tuple[dict, SharedMemory, dict, list | None, int]:
+	"""Read a model out of Blender into a shared memory block, the job batch_export.run submits.
+
+	The block is left open, batch_export.run closes it once the worker is done.
+	"""
+	if target.armature is None:
+		raise ValueError(f"{target.name}: no mesh is skinned to an armature")
+	images = collection_images(target.collections)
+	handler = YMXEN(target.collections, target.armature, images, **options)
+	meta, arrays = flatten(handler.model())
+	entries = None
+	if textures:
+		pack = YMXEN_Textures(handler.texture_names, images + [img for img in bpy.data.images if "ymp_name" in img])
+		files, jobs = pack.gather()
+		encode = {i: (rgba, fourcc, mips) for i, rgba, fourcc, mips in jobs}
+		entries = []
+		for i, (name, data) in enumerate(files):
+			if data is None:
+				rgba, fourcc, mips = encode[i]
+				arrays[f"texture.{i}"] = rgba
+				entries.append((name, fourcc, mips))
+			else:
+				arrays[f"texture.{i}"] = np.frombuffer(data, dtype=np.uint8)
+				entries.append((name, None, None))
+	block, layout = to_shared(arrays)
+	return meta, block, layout, entries, handler.strip_length
+
+
+def export_roster(targets: list[ExportTarget], directory: str, max_workers: int | None, log, **options) -> list[dict]:
+	"""Export every target to ``<directory>/<name>.ymxen``, reading each while the pool encodes the ones before."""
+
+	def reads():
+		for target in targets:
+			start = time.perf_counter()
+			try:
+				job = read_target(target, **options)
+			except Exception as e:
+				job = e
+			yield target.name, os.path.join(directory, target.name + ".ymxen"), time.perf_counter() - start, job
+
+	if not targets:
+		return []
+	workers = export_workers(max_workers, len(targets))
+	with pool(workers) as executor:
+		# Two models a worker: one encoding, one read and waiting, and no more blocks alive than that
+		return run(executor, reads(), log, 2 * workers)
@@ -0,0 +1,126 @@
+"""Everything the exporter reads out of Blender, in bulk.
+
+Each attribute comes out in one ``foreach_get`` into a preallocated array:
+bone rest matrices, positions, loops, loop triangles, split normals, UVs and
+colours. With a depsgraph the evaluated mesh is read instead of the original
+(modifiers applied, the armature held in its rest pose so the geometry is not
+posed). Vertex group weights have no bulk accessor and take one pass over
+the vertices, everything else is a copy.
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass
+import bpy
+import numpy as np
+
+
+@dataclass(slots=True)
+class MeshArrays:
+	co: np.ndarray  # float32 (vertices, 3)
+	loop_vertex: np.ndarray  # int32 (loops,)
+	triangles: np.ndarray  # int32 (triangles * 3,) loop indices
+	normals: np.ndarray  # float32 (loops, 3) split normals
+	uvs: np.ndarray | None  # float32 (loops, 2)
+	corner_diffuse: np.ndarray | None  # uint32 ARGB per loop
+	point_diffuse: np.ndarray | None  # uint32 ARGB per vertex
+	weight_offsets: np.ndarray  # int32 CSR over vertices
+	weight_groups: np.ndarray  # int32 vertex group index
+	weight_values: np.ndarray  # float32
+
+
+def read(data, attribute: str, dtype, width: int = 1) -> np.ndarray:
+	"""One attribute of a whole bpy collection."""
+	values = np.empty(len(data) * width, dtype=dtype)
+	data.foreach_get(attribute, values)
+	return values.reshape(-1, width) if width > 1 else values
+
+
+def bone_matrices(bones) -> np.ndarray:
+	"""(n, 4, 4) ``matrix_local`` of every bone, row major."""
+	return read(bones, "matrix_local", np.float32, 16).reshape(-1, 4, 4).transpose(0, 2, 1).astype(np.float64)
+
+
+def bone_parents(bones) -> np.ndarray:
+	index = {b.name: i for i, b in enumerate(bones)}
+	return np.array([index[b.parent.name] if b.parent else -1 for b in bones], dtype=np.int32)
+
+
+def loop_normals(mesh: bpy.types.Mesh) -> np.ndarray:
+	if hasattr(mesh, "corner_normals"):
+		return read(mesh.corner_normals, "vector", np.float32, 3)
+	mesh.calc_normals_split()
+	return read(mesh.loops, "normal", np.float32, 3)
+
+
+def diffuse_colors(mesh: bpy.types.Mesh, domain: str, count: int) -> np.ndarray | None:
+	"""The D3DFVF_DIFFUSE attribute the importer makes, packed back to ARGB, if it is on domain."""
+	attr = mesh.color_attributes.get("D3DFVF_DIFFUSE")
+	if attr is None or attr.domain != domain:
+		return None
+	rgba = np.empty(count * 4, dtype=np.float32)
+	attr.data.foreach_get("color_srgb", rgba)
+	r, g, b, a = np.rint(rgba.reshape(-1, 4) * 255.0).clip(0, 255).astype(np.uint32).T
+	return (a << 24) | (r << 16) | (g << 8) | b
+
+
+def vertex_weights(mesh: bpy.types.Mesh) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+	"""Vertex group weights as CSR (offsets, group indices, weights), in one pass over the vertices."""
+	counts = np.fromiter((len(v.groups) for v in mesh.vertices), dtype=np.int32, count=len(mesh.vertices))
+	offsets = np.zeros(len(counts) + 1, dtype=np.int32)
+	np.cumsum(counts, out=offsets[1:])
+	pairs = np.fromiter(
+		(x for v in mesh.vertices for g in v.groups for x in (g.group, g.weight)),
+		dtype=np.float64,
+		count=int(offsets[-1]) * 2,
+	).reshape(-1, 2)
+	return offsets, pairs[:, 0].astype(np.int32), pairs[:, 1].astype(np.float32)
+
+
+def armature_space(obj: bpy.types.Object, positions: np.ndarray, normals: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+	"""Geometry goes out in armature space, as the importer parents it."""
+	matrix = np.array(obj.matrix_local, dtype=np.float32)
+	if np.allclose(matrix, np.identity(4)):
+		return positions, normals
+	positions = positions @ matrix[:3, :3].T + matrix[:3, 3]
+	normals = normals @ np.linalg.inv(matrix[:3, :3])
+	normals /= np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-12)
+	return positions, normals
+
+
+def mesh_arrays(mesh: bpy.types.Mesh, uv_name: str = "TEXCOORD0") -> MeshArrays:
+	mesh.calc_loop_triangles()
+	uv_layer = mesh.uv_layers.get(uv_name) or mesh.uv_layers.active
+	return MeshArrays(
+		read(mesh.vertices, "co", np.float32, 3),
+		read(mesh.loops, "vertex_index", np.int32),
+		read(mesh.loop_triangles, "loops", np.int32, 3).ravel(),
+		loop_normals(mesh),
+		read(uv_layer.data, "uv", np.float32, 2) if uv_layer is not None else None,
+		diffuse_colors(mesh, "CORNER", len(mesh.loops)),
+		diffuse_colors(mesh, "POINT", len(mesh.vertices)),
+		*vertex_weights(mesh),
+	)
+
+
+def extract_mesh(obj: bpy.types.Object, depsgraph: bpy.types.Depsgraph | None = None) -> MeshArrays:
+	"""The arrays of obj's mesh, evaluated through depsgraph when one is given."""
+	if depsgraph is None:
+		return mesh_arrays(obj.data)
+	evaluated = obj.evaluated_get(depsgraph)
+	mesh = evaluated.to_mesh(preserve_all_data_layers=True, depsgraph=depsgraph)
+	try:
+		return mesh_arrays(mesh)
+	finally:
+		evaluated.to_mesh_clear()
+
+
+@contextmanager
+def rest_pose(armature: bpy.types.Object):
+	"""The depsgraph with armature in its rest pose, restored afterwards."""
+	position = armature.data.pose_position
+	armature.data.pose_position = 'REST'
+	try:
+		bpy.context.view_layer.update()
+		yield bpy.context.evaluated_depsgraph_get()
+	finally:
+		armature.data.pose_position = position
+		bpy.context.view_layer.update()
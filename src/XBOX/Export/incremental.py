@@ -0,0 +1,151 @@
+"""Repeated exports of the same scene, re-encoding only the collections that changed.
+
+The costly part of an export is reading each mesh out of Blender (loop
+splitting, the vertex group walk) and stripifying it. Writing the file is a
+vectorised copy once the sub-objects exist. IncrementalYMXEN therefore keeps
+the sub-objects of every exported collection, with a fingerprint of what
+they were built from. A depsgraph handler marks collections dirty as their
+objects are edited, and the fingerprint catches what the handler cannot see
+(edits made while it was not installed). Strips are memoised by their faces.
+The layout is planned afresh on every export, so the pointers and the POF0
+table are always those of the file being written.
+
+Materials are read again on every export, parameter edits and texture
+indices never come from the cache.
+"""
+import hashlib
+import bpy
+from bpy.app.handlers import persistent
+import numpy as np
+
+from ...decode.model import SubObject
+from ...encode.xbox import strip_key
+from .ymxen import YMXEN
+
+_dirty: set[str] = set()  # collection names edited since they were cached
+_collections: dict[str, tuple[str, list[tuple[str, SubObject]]]] = {}  # name -> (fingerprint, [(object, sub-object)])
+_strips: dict[bytes, np.ndarray] = {}
+
+
+def fingerprint(col: bpy.types.Collection, bone_names: list[str], *settings) -> str:
+	"""Hash of what the sub-objects of col are built from, apart from weights and materials.
+
+	Weight painting is only seen by the depsgraph handler, the vertex group
+	walk it would take to hash weights is the cost being saved. settings are
+	the export options that change the sub-objects.
+	"""
+	h = hashlib.blake2b(digest_size=20)
+	h.update(repr((bone_names, settings)).encode())
+	for obj in col.objects:
+		if obj.type != 'MESH':
+			continue
+		mesh = obj.data
+		h.update(repr((obj.name, mesh.name, [g.name for g in obj.vertex_groups], tuple(map(tuple, obj.matrix_local)))).encode())
+		h.update(repr([(m.name, m.type, m.show_viewport) for m in obj.modifiers]).encode())
+		h.update(np.array((len(mesh.vertices), len(mesh.loops), len(mesh.polygons)), dtype=np.int64).tobytes())
+		for data, attribute, dtype, width in (
+			(mesh.vertices, "co", np.float32, 3),
+			(mesh.loops, "vertex_index", np.int32, 1),
+			(mesh.polygons, "loop_start", np.int32, 1),
+		):
+			values = np.empty(len(data) * width, dtype=dtype)
+			data.foreach_get(attribute, values)
+			h.update(values.tobytes())
+		for layer in mesh.uv_layers:
+			uvs = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+			layer.data.foreach_get("uv", uvs)
+			h.update(layer.name.encode() + uvs.tobytes())
+		colors = mesh.color_attributes.get("D3DFVF_DIFFUSE")
+		if colors is not None:
+			rgba = np.empty(len(colors.data) * 4, dtype=np.float32)
+			colors.data.foreach_get("color_srgb", rgba)
+			h.update(colors.domain.encode() + rgba.tobytes())
+	return h.hexdigest()
+
+
+class IncrementalYMXEN(YMXEN):
+	"""YMXEN reusing the sub-objects of collections unchanged since the last export."""
+
+	strip_cache = _strips
+
+	def __init__(self, collections: list[bpy.types.Collection], armature: bpy.types.Object, textures: list[bpy.types.Image], **options):
+		super().__init__(collections, armature, textures, **options)
+		self.bone_names = [b.name for b in armature.data.bones]
+		self.encoded = 0  # collections read out of Blender this export
+
+	def write(self) -> bytearray:
+		data = super().write()
+		# Forget collections and strips that are no longer exported
+		names = {col.name for col in self.collections}
+		for name in list(_collections):
+			if name not in names:
+				del _collections[name]
+		live = {strip_key(sub, self.strip_length) for _, subs in _collections.values() for _, sub in subs}
+		for key in list(_strips):
+			if key not in live:
+				del _strips[key]
+		return data
+
+	def write_collections(self, col: bpy.types.Collection, og_index: int) -> list[SubObject]:
+		stamp = fingerprint(col, self.bone_names, self.max_influences, self.apply_modifiers)
+		cached = _collections.get(col.name)
+		if col.name not in _dirty and cached is not None and cached[0] == stamp:
+			subs = []
+			for name, sub in cached[1]:
+				sub.collection = og_index
+				sub.materials = []
+				self.write_shader(sub, bpy.data.objects[name].active_material)
+				subs.append(sub)
+			return subs
+		pairs = [(obj.name, sub) for obj in col.objects if obj.type == 'MESH' for sub in self.write_object(obj, og_index)]
+		for i, (_, sub) in enumerate(pairs):
+			sub.index = i
+		_collections[col.name] = (stamp, pairs)
+		subs = [sub for _, sub in pairs]
+		_dirty.discard(col.name)
+		self.encoded += 1
+		return subs
+
+
+def _mark_collections(objects):
+	for obj in objects:
+		_dirty.update(c.name for c in obj.users_collection)
+
+
+@persistent
+def _track_edits(scene, depsgraph):
+	for update in depsgraph.updates:
+		id = update.id.original
+		if isinstance(id, bpy.types.Collection):
+			_dirty.add(id.name)  # objects linked or unlinked
+		elif isinstance(id, bpy.types.Object):
+			if id.type == 'MESH' and (update.is_updated_geometry or update.is_updated_transform):
+				_mark_collections((id,))
+		elif isinstance(id, bpy.types.Mesh):
+			_mark_collections(o for o in bpy.data.objects if o.data == id)
+
+
+@persistent
+def _forget(*args):
+	clear_export_cache()
+
+
+def clear_export_cache():
+	_dirty.clear()
+	_collections.clear()
+	_strips.clear()
+
+
+def install_export_tracking():
+	if _track_edits not in bpy.app.handlers.depsgraph_update_post:
+		bpy.app.handlers.depsgraph_update_post.append(_track_edits)
+	if _forget not in bpy.app.handlers.load_post:
+		bpy.app.handlers.load_post.append(_forget)
+
+
+def uninstall_export_tracking():
+	if _track_edits in bpy.app.handlers.depsgraph_update_post:
+		bpy.app.handlers.depsgraph_update_post.remove(_track_edits)
+	if _forget in bpy.app.handlers.load_post:
+		bpy.app.handlers.load_post.remove(_forget)
+	clear_export_cache()
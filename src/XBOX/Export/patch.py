@@ -0,0 +1,66 @@
+import bpy
+import numpy as np
+
+from ...encode.patch import Patcher
+from .extract import armature_space, diffuse_colors, loop_normals, read
+from .ymxen import parameter_records
+
+
+def vertex_attributes(obj: bpy.types.Object) -> tuple[np.ndarray, np.ndarray, np.ndarray | None, np.ndarray | None]:
+	"""Positions, normals, UVs and colours per vertex of an imported mesh.
+
+	The importer makes one Blender vertex per file vertex, so corner data is
+	gathered back onto the vertices instead of splitting them as YMXEN does.
+	"""
+	mesh = obj.data
+	vertex_count = len(mesh.vertices)
+	co = read(mesh.vertices, "co", np.float32, 3)
+	loop_vertex = read(mesh.loops, "vertex_index", np.int32)
+
+	normals = np.zeros((vertex_count, 3), dtype=np.float32)
+	normals[loop_vertex] = loop_normals(mesh)
+	positions, normals = armature_space(obj, co, normals)
+
+	uvs = None
+	uv_layer = mesh.uv_layers.get("TEXCOORD0")
+	if uv_layer is not None:
+		uvs = np.zeros((vertex_count, 2), dtype=np.float32)
+		uvs[loop_vertex] = read(uv_layer.data, "uv", np.float32, 2)
+	return positions, normals, uvs, diffuse_colors(mesh, "POINT", vertex_count)
+
+
+class YMXEN_Patch:
+	"""Edits of imported sub-objects written into a copy of the file they came from.
+
+	Every object must carry the ``ymp_source`` the importer leaves on it, and
+	all of them must come from the same file.
+	"""
+
+	def __init__(self, objects: list[bpy.types.Object]):
+		sources = {obj["ymp_source"]["path"] for obj in objects}
+		if len(sources) != 1:
+			raise ValueError(f"The objects come from {len(sources)} files, patch one file at a time")
+		self.source = sources.pop()
+		self.objects = objects
+		self.subobjects = 0  # sub-objects that changed
+
+	def write(self, target: str) -> Patcher:
+		"""Patch a copy of the source file at target (the file itself if they are the same).
+
+		target is only written once every object went in, an error leaves it as it was.
+		"""
+		with Patcher(self.source, target) as patcher:
+			for obj in self.objects:
+				remembered = obj["ymp_source"].to_dict()
+				where = patcher.locate(remembered.pop("index"), remembered)
+				positions, normals, uvs, diffuse = vertex_attributes(obj)
+				changed = patcher.vertices(where, positions, normals, diffuse)
+				if changed:
+					patcher.bounds(where, positions)
+				if uvs is not None:
+					changed |= patcher.uvs(where, uvs)
+				mat = obj.active_material
+				if mat is not None and "ymp_parameters" in mat:
+					changed |= patcher.parameters(where, parameter_records(mat, patcher.textures, extend=False)) > 0
+				self.subobjects += changed
+		return patcher
@@ -0,0 +1,84 @@
+import os
+import bpy
+import numpy as np
+
+from ...encode.dds import BLOCK_BYTES, HEADER, dds_info
+from ...encode.filepack import encode_textures, texture_hash, write_filepack
+
+
+def image_file(img: bpy.types.Image, size: int = -1) -> bytes | None:
+	"""The first size bytes (all by default) of the file behind img, packed or on disk."""
+	if img.packed_file:
+		data = bytes(img.packed_file.data)
+		return data if size < 0 else data[:size]
+	path = bpy.path.abspath(img.filepath)
+	if not os.path.isfile(path):
+		return None
+	with open(path, "rb") as f:
+		return f.read(size)
+
+
+def original_dds(img: bpy.types.Image) -> bytes | None:
+	"""The DDS img was imported from, if neither it nor the image has changed since."""
+	if img.is_dirty or "ymp_hash" not in img:
+		return None
+	data = image_file(img)
+	if data is None or texture_hash(data) != img["ymp_hash"]:
+		return None
+	return data
+
+
+def image_rgba(img: bpy.types.Image) -> np.ndarray:
+	"""The pixels as ``uint8`` RGBA, top row first."""
+	width, height = img.size
+	if not (width and height and img.has_data):
+		raise ValueError(f"{img.name}: no image data, {img.filepath or 'its file'} is missing. Pack or reload the image")
+	pixels = np.empty(width * height * 4, dtype=np.float32)
+	img.pixels.foreach_get(pixels)
+	return np.rint(pixels.reshape(height, width, 4)[::-1] * 255.0).clip(0, 255).astype(np.uint8)
+
+
+def dds_format(img: bpy.types.Image, rgba: np.ndarray) -> tuple[bytes, int | None]:
+	"""FourCC and mip count to encode img with, those of its DDS when it has one."""
+	fourcc, mips = b"", None
+	header = image_file(img, HEADER.size)
+	if header:
+		try:
+			fourcc, _, _, mips = dds_info(header)
+		except ValueError:
+			pass
+	if fourcc not in BLOCK_BYTES:
+		fourcc = b"DXT5" if (rgba[..., 3] < 255).any() else b"DXT1"
+	return fourcc, mips
+
+
+class YMXEN_Textures:
+	"""The .tex filepack for an export's texture table, from the images carrying ``ymp_name``."""
+
+	def __init__(self, names: list[str], images: list[bpy.types.Image]):
+		by_name = {}
+		for img in images:
+			by_name.setdefault(img.get("ymp_name", img.name), img)
+		self.images = [(name, by_name[name]) for name in names if name in by_name]
+		self.reused = 0  # written as imported
+		self.encoded = 0  # compressed again
+
+	def gather(self) -> tuple[list[tuple[str, bytes | None]], list[tuple[int, np.ndarray, bytes, int | None]]]:
+		"""(name, DDS as imported or None) per texture, and (slot, rgba, fourcc, mips) for those to compress."""
+		files, jobs = [], []
+		for i, (name, img) in enumerate(self.images):
+			data = original_dds(img)
+			files.append((name, data))
+			if data is None:
+				rgba = image_rgba(img)
+				jobs.append((i, rgba, *dds_format(img, rgba)))
+		self.encoded = len(jobs)
+		self.reused = len(files) - len(jobs)
+		return files, jobs
+
+	def write(self, max_workers: int | None = None) -> bytearray:
+		files, jobs = self.gather()
+		encoded = encode_textures([job[1:] for job in jobs], max_workers)
+		for (i, *_), data in zip(jobs, encoded):
+			files[i] = (files[i][0], data)
+		return write_filepack(files)
@@ -1,44 +1,203 @@
-from io import BytesIO
-from struct import Struct, pack
-from typing import Iterable
+from struct import unpack_from
 import math
 import bpy
+import numpy as np
 from mathutils import Matrix
 
+from ...decode.model import Material, Model, Skeleton, SubObject, decode_name
+from ...encode.strips import StripStats
+from ...encode.palette import split_subobject
+from ...encode.skeleton import bone_table, keep_imported
+from ...encode.xbox import PALETTE_SIZE, encode_jboy, set_parameter
+from ...globals.skeleton import imported_bone_table
+from .extract import armature_space, bone_matrices, bone_parents, extract_mesh, rest_pose
+
+# Loop attributes that have to match for two loops to share an exported vertex
+LOOP_KEY = np.dtype([("vertex", "<i4"), ("uv", "<f4", 2), ("normal", "<f4", 3), ("diffuse", "<u4")])
+
+
+def parameter_records(mat: bpy.types.Material, texture_names: list[str], extend: bool = True) -> list[bytes]:
+	"""The material's parameter records as the importer stored them, with edits applied.
+
+	A custom property named after a parameter (``mat["g_fSpecPow"]``) replaces
+	its value. Texture indices point into texture_names, found by name; a
+	texture that is not there is appended when extend, else it is an error.
+	"""
+	records = []
+	for parameter in mat.get("ymp_parameters", ()):
+		record = bytes.fromhex(parameter["record"])
+		name = decode_name(record[:16])
+		texture = parameter.get("texture")
+		if texture:
+			# Texture indices point into the table being written, not the imported one
+			if texture not in texture_names:
+				if not extend:
+					raise ValueError(f"{mat.name}: {name} names texture {texture}, which the file does not have")
+				texture_names.append(texture)
+			record = set_parameter(record, texture_names.index(texture))
+		elif name in mat:
+			value = mat[name]
+			record = set_parameter(record, value.to_list() if hasattr(value, "to_list") else value)
+		records.append(record)
+	return records
+
+
 class YMXEN:
-	ymxenBone = Struct('>16s4f4f4i4f')
 	AXIS_FIX = Matrix.Rotation(math.radians(-90.0), 4, 'X').inverted()
 
-	tag = b'YOBJ'
-	def __init__(self, collections: list[bpy.types.Collection], armature: bpy.types.Object, textures: list[bpy.types.Image]):
+	tag = b'JBOY'
+	strip_cache: dict[bytes, np.ndarray] | None = None  # stripify memo, see encode.xbox.encode_subobject
+
+	def __init__(
+		self,
+		collections: list[bpy.types.Collection],
+		armature: bpy.types.Object,
+		textures: list[bpy.types.Image],
+		max_influences: int = 4,
+		apply_modifiers: bool = False,
+		strip_length: int = 0,
+	):
 		if collections is None or armature is None or textures is None:
 			raise ValueError('Args not provided')# go home
 		self.collections = collections
 		self.armature = armature
 		self.textures = textures
-		self.structs: list[BytesIO] = []
-
-	def write(self):
-		self.write_armature()
-		for col in self.collections:
-			self.write_collections(col, len(col.objects)) # only used as a editor side metadata so we dont need to filter meshes
-
-	def write_collections(self, col: bpy.types.Collection, count: int): ...
-	def write_armature(self):
-		arm = self.armature.data
-		bone_index = {b: i for i, b in enumerate(arm.bones)}
-
-		bone = BytesIO()
-		for bpy_bone in arm.bones:
-			if bpy_bone.parent:
-				matrix = bpy_bone.parent.matrix_local.inverted() @ bpy_bone.matrix_local
-			else:
-				matrix = bpy_bone.matrix_local
-			matrix = YMXEN.AXIS_FIX @ matrix
-
-			parent_index = bone_index.get(bpy_bone.parent, -1)
-			rot = matrix.to_3x3().normalized()
-			loc = matrix.to_translation()
-
-			bone.write(YMXEN.ymxenBone.pack(bpy_bone.name.encode('shift_jis').ljust(16, b'\x00'), *loc, 0.0,  *rot.to_euler('ZYX'), 0.0, parent_index, 0, 0, 0, 0.0, 0.0, 0.0, 0.0))
-		self.structs.append(bone)
\ No newline at end of file
+		self.max_influences = max_influences  # per vertex, 0 keeps them all
+		self.apply_modifiers = apply_modifiers  # read evaluated meshes, in the rest pose
+		self.strip_length = strip_length  # triangles per strip, 0 grows them as far as they go
+		self.depsgraph: bpy.types.Depsgraph | None = None
+		self.bone_index = {b.name: i for i, b in enumerate(armature.data.bones)}
+		# Texture table, parameters naming other textures append to it
+		self.texture_names = [img.get("ymp_name", img.name) for img in textures]
+
+	def write(self) -> bytearray:
+		"""The whole .ymxen file, JBOY chunk and POF0 footer."""
+		model = self.model()
+		self.strips: list[StripStats] = []
+		return encode_jboy(model, self.strips, self.strip_cache, self.strip_length).chunk(self.tag)
+
+	def model(self) -> Model:
+		"""Everything the file is encoded from, read out of Blender. Nothing after this touches bpy."""
+		skeleton = self.write_armature()
+		subobjects = []
+		if self.apply_modifiers:
+			with rest_pose(self.armature) as self.depsgraph:
+				for og_index, col in enumerate(self.collections):
+					subobjects += self.write_collections(col, og_index)
+			self.depsgraph = None
+		else:
+			for og_index, col in enumerate(self.collections):
+				subobjects += self.write_collections(col, og_index)
+		return Model(
+			format="JBOY",
+			skeleton=skeleton,
+			collections=[col.get("ymp_name", col.name) for col in self.collections],
+			textures=self.texture_names,
+			subobjects=subobjects,
+		)
+
+	def write_collections(self, col: bpy.types.Collection, og_index: int) -> list[SubObject]:
+		"""The sub-objects of every mesh object in col."""
+		subobjects = [sub for obj in col.objects if obj.type == 'MESH' for sub in self.write_object(obj, og_index)]
+		for i, sub in enumerate(subobjects):
+			sub.index = i
+		return subobjects
+
+	def write_object(self, obj: bpy.types.Object, og_index: int) -> list[SubObject]:
+		"""One sub-object for obj, or several when it is skinned to more bones than a palette holds."""
+		return split_subobject(self.write_subobject(obj, og_index, 0), PALETTE_SIZE, self.max_influences)
+
+	def write_subobject(self, obj: bpy.types.Object, og_index: int, index: int) -> SubObject:
+		mesh = extract_mesh(obj, self.depsgraph)
+		loop_count = len(mesh.loop_vertex)
+
+		# A file vertex carries one UV, normal and colour, split Blender vertices where loops differ
+		keys = np.zeros(loop_count, dtype=LOOP_KEY)
+		keys["vertex"] = mesh.loop_vertex
+		if mesh.uvs is not None:
+			keys["uv"] = mesh.uvs
+		keys["normal"] = mesh.normals
+		if mesh.corner_diffuse is not None:
+			keys["diffuse"] = mesh.corner_diffuse
+		_, first, inverse = np.unique(keys.view(f"V{LOOP_KEY.itemsize}"), return_index=True, return_inverse=True)
+		order = np.argsort(first)  # keep the vertices in loop order
+		rank = np.empty_like(order)
+		rank[order] = np.arange(len(order))
+		source = first[order]  # a loop for each exported vertex
+		vertices = mesh.loop_vertex[source]
+
+		positions, normals = armature_space(obj, mesh.co[vertices], mesh.normals[source])
+		if mesh.corner_diffuse is not None:
+			diffuse = mesh.corner_diffuse[source]
+		else:
+			diffuse = mesh.point_diffuse[vertices] if mesh.point_diffuse is not None else None
+
+		offsets, bones, values = self.read_weights(obj, mesh.weight_offsets, mesh.weight_groups, mesh.weight_values)
+		counts = np.diff(offsets)[vertices]
+		weight_offsets = np.zeros(len(vertices) + 1, dtype=np.int32)
+		np.cumsum(counts, out=weight_offsets[1:])
+		gather = np.repeat(offsets[vertices] - weight_offsets[:-1], counts) + np.arange(weight_offsets[-1])
+
+		centre = (positions.min(0) + positions.max(0)) / 2 if len(positions) else np.zeros(3)
+		radius = float(np.linalg.norm(positions - centre, axis=1).max()) if len(positions) else 0.0
+		sub = SubObject(
+			index=index,
+			collection=og_index,
+			positions=positions,
+			normals=normals,
+			uvs=keys["uv"][source],
+			faces=rank[inverse][mesh.triangles].reshape(-1, 3),
+			weight_offsets=weight_offsets,
+			weight_bones=bones[gather],
+			weight_values=values[gather],
+			groups=[],
+			centre=tuple(centre.tolist()),
+			radius=radius,
+			bone_count=len(self.bone_index),
+			diffuse=diffuse,
+		)
+		self.write_shader(sub, obj.active_material)
+		return sub
+
+	def read_weights(
+		self, obj: bpy.types.Object, offsets: np.ndarray, groups: np.ndarray, weights: np.ndarray
+	) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+		"""Vertex group weights (CSR over obj's groups) as CSR over skeleton indices, normalised per vertex.
+
+		Groups that name no bone and zero weights are dropped.
+		"""
+		bone_of = np.array([self.bone_index.get(g.name, -1) for g in obj.vertex_groups] + [-1], dtype=np.int32)
+		counts = np.diff(offsets)
+		vertex = np.repeat(np.arange(len(counts)), counts)
+
+		bones = bone_of[groups]
+		keep = (bones >= 0) & (weights > 0.0)
+		vertex, bones, weights = vertex[keep], bones[keep], weights[keep]
+		sums = np.bincount(vertex, weights=weights, minlength=len(counts))
+		offsets = np.zeros(len(counts) + 1, dtype=np.int32)
+		np.cumsum(np.bincount(vertex, minlength=len(counts)), out=offsets[1:])
+		return offsets, bones, (weights / sums[vertex]).astype(np.float32)
+
+	def write_shader(self, sub: SubObject, mat: bpy.types.Material | None):
+		"""Shader, technique and parameter records, as the importer stored them on the material."""
+		if mat is None:
+			return
+		sub.shader = mat.get("ymp_shader", mat.name)
+		sub.technique = int(mat.get("ymp_technique", 0))
+		for record in parameter_records(mat, self.texture_names):
+			mat_type, mat_size = unpack_from(">2H", record, 16)
+			sub.materials.append(Material(decode_name(record[:16]), mat_type, mat_size, (), record[20:36]))
+
+	def write_armature(self) -> Skeleton:
+		"""Bone table from the rest matrices, only roots carry the axis change.
+
+		Bones not moved since import keep the values they were imported with.
+		"""
+		bones = self.armature.data.bones
+		parents = bone_parents(bones)
+		matrices = bone_matrices(bones)
+		positions, rotations = bone_table(matrices, parents, np.array(YMXEN.AXIS_FIX))
+		imported = imported_bone_table(self.armature)
+		if imported is not None:
+			keep_imported(positions, rotations, matrices, parents, imported)
+		return Skeleton([b.name for b in bones], parents, positions, rotations)
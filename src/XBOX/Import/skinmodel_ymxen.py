@@ -2,9 +2,17 @@ import math
 from typing import TextIO
 from bpy.types import ParticleSettingsTextureSlot
 from mathutils import Euler, Matrix, Vector, Quaternion
-from ...globals.be import get_view, resolve_view
+from ...decode import Material, Model, decode_jboy
+from ...encode.filepack import texture_hash
+from ...encode.xbox import encode_parameter
+from ...globals.bounds import SphereBVH, register_bounds
+from ...globals.skeleton import armature_bone_names, find_armature, fingerprint, register_armature
+from ...globals.naming import Namespace
+from ...globals.mesh import add_weights, fill_mesh, find_mesh, mesh_key, register_mesh, set_loop_uvs
 from struct import unpack_from, unpack
 import bpy
+import numpy as np
+import os
 import tempfile
 import uuid
 
@@ -137,8 +145,15 @@ def load_dds_from_memory(name: str, data: bytes, prefix: str):
 	tmp.write(data)
 	tmp.close()
 
-	img = bpy.data.images.load(tmp.name, check_existing=True)
+	try:
+		img = bpy.data.images.load(tmp.name, check_existing=True)
+		# Packed, so the DDS outlives the temporary file and the exporter can copy it back
+		img.pack()
+	finally:
+		os.remove(tmp.name)
 	img.name = f"{prefix}_{name}"
+	img["ymp_name"] = name
+	img["ymp_hash"] = texture_hash(data)  # the exporter copies it back while this still matches
 	img.alpha_mode = "CHANNEL_PACKED"
 	return img
 
@@ -156,21 +171,35 @@ def link(obj: bpy.types.Object, mode="EDIT"):
 class YMXEN_SkinModel:
 	AXIS_FIX = Matrix.Rotation(math.radians(-90.0), 4, "X")
 
-	def __init__(self, file: memoryview, scale: float):
+	def __init__(
+		self,
+		file: memoryview | Model,
+		scale: float,
+		share_armature: bool = True,
+		names: Namespace | None = None,
+		share_meshes: bool = True,
+		source: str = "",
+	):
 		self.uid = uuid.uuid4().hex[:8]
+		self.source = source  # the file's path, remembered on the objects for patch export
+		self.names = names or Namespace("ymxen")
+		self.share_armature = share_armature
+		self.share_meshes = share_meshes
+		self.shared = False
 
 		if not file:
 			return
-		self.file = file
+		self.model = file if isinstance(file, Model) else decode_jboy(file)
 		self.scale = scale
-		self.use_tangents = (
-			True if unpack(">I", file[:4])[0] == 16 else False
-		)  # also a hint that Autodesk is used (i.e Biped rigs)
+		# also a hint that Autodesk is used (i.e Biped rigs)
+		self.use_tangents = self.model.use_tangents
 		if self.use_tangents:
 			self.scale += 10.0
 		self.create()
 
 	def create_attachment_points(self, path: str):
+		if self.shared:
+			return  # already attached to the shared rig
 		try:
 			with open(path, "rb") as abd:
 				eof = [abd.seek(0, 2), abd.tell(), abd.seek(0)][1]
@@ -185,7 +214,7 @@ class YMXEN_SkinModel:
 						continue
 					else:
 						bone_id -= 1
-					empty = bpy.data.objects.new(f"abd{id1}", None)
+					empty = bpy.data.objects.new(self.names(f"abd{id1}"), None)
 					empty.parent = self.armature
 					empty.parent_type = "BONE"
 					empty.parent_bone = self.bone_names[bone_id]
@@ -205,10 +234,18 @@ class YMXEN_SkinModel:
 		return None
 
 	def create(self):
-		bone_count: int = unpack_from(">I", self.file, 24)[0]
-		bone = get_view(self.file, 32)
-		s = bpy.data.armatures.new("0")
-		self.armature = bpy.data.objects.new("ymxenBone", s)
+		skeleton = self.model.skeleton
+		bone_count = len(skeleton)
+		self.texture_slots: list[bpy.types.Image | None] = []
+		self.skeleton = fingerprint(skeleton, "JBOY", self.scale, self.use_tangents)
+		if self.share_armature and (arm := find_armature(self.skeleton)):
+			print("YMXEN_SkinModel: Reusing armature %s" % arm.name)
+			self.armature = arm
+			self.shared = True
+			self.bone_names = armature_bone_names(arm, skeleton)
+			return
+		s = bpy.data.armatures.new(self.names("Skeleton"))
+		self.armature = bpy.data.objects.new(self.names("ymxenBone"), s)
 		NULL = -1
 		link(self.armature)
 		self.bones: list[bpy.types.EditBone] = [None] * bone_count
@@ -216,10 +253,7 @@ class YMXEN_SkinModel:
 		self.local = [Matrix.Identity(4) for i in range(bone_count)]
 		self.bone_names = [None] * bone_count
 		for i in range(bone_count):
-			b = bone[i * 80 : (i * 80) + 80]
-			raw = b.cast("c")[:16].tobytes().split(b"\x00", 1)[0]
-
-			safe_name = raw.decode("shift_jis", errors="replace")
+			safe_name = skeleton.names[i]
 			print("YMXEN_SkinModel: Added bone %s" % safe_name)
 
 			bpy_bone = self.armature.data.edit_bones.new(safe_name)
@@ -227,9 +261,9 @@ class YMXEN_SkinModel:
 			self.bones[i] = bpy_bone
 			self.bone_names[i] = safe_name
 
-			positions = Vector(unpack_from(">3f", b, 16))
-			rotations = Euler(unpack_from(">3f", b, 32), "ZYX")
-			parent = unpack_from(">i", b, 48)[0]
+			positions = Vector(skeleton.positions[i])
+			rotations = Euler(skeleton.rotations[i], "ZYX")
+			parent = int(skeleton.parents[i])
 			local = Matrix.LocRotScale(positions, rotations, None)
 
 			if parent == NULL:
@@ -243,10 +277,7 @@ class YMXEN_SkinModel:
 				bpy_bone.parent = self.bones[parent]
 
 		DEFAULT_LEN = 0.05 * self.scale
-		parents = [
-			unpack(">i", bone[i * 80 : (i * 80) + 80][48:52])[0]
-			for i in range(bone_count)
-		]
+		parents = skeleton.parents.tolist()
 		for i, bpy_bone in enumerate(self.bones):
 			mat = self.world[i]
 
@@ -269,7 +300,12 @@ class YMXEN_SkinModel:
 			bpy_bone.tail = head + direction * max(length, 1e-5)
 			bpy_bone.align_roll(mat.to_3x3() @ Vector((0, 0, 1)))
 
-		self.texture_slots: list[bpy.types.Image | None] = []
+		# Edit bones die with edit mode, keep the names they ended up with, and the
+		# matrices they got so the exporter can tell which bones were moved since
+		self.bone_names = [b.name for b in self.bones]
+		matrices = [np.array(b.matrix) for b in self.bones]
+		# Tangent models' roots lack the axis change the exporter's (non-tangent) format has
+		register_armature(self.armature, self.skeleton, self.bone_names, skeleton, matrices, not self.use_tangents)
 
 	def set_textures(self, filepack: tuple[memoryview, ...]):
 		header = filepack.cast("I")
@@ -308,161 +344,97 @@ class YMXEN_SkinModel:
 		self.texture_slots = local_slots
 
 	def start(self):
-		object_groups = get_view(self.file, 40)
-		assert object_groups != -1
-		obj_g_count = unpack_from(">I", self.file, 44)[0]
+		for _ in self.build():
+			pass
+
+	def build(self):
+		"""Build the sub-objects one at a time, yielding (built, total) after each."""
 		self.cols: list[bpy.types.Collection] = []
-		for i in range(obj_g_count):
-			o = object_groups[i * 32 : (i * 32) + 32].cast("c")
-			name = (
-				o[:16]
-				.tobytes()
-				.split(b"\x00", 1)[0]
-				.decode("shift_jis", errors="replace")
-			)
+		for name in self.model.collections:
 			print("YMXEN_SkinModel: Added collection %s" % name)
-			collect = bpy.data.collections.new(name)
+			collect = bpy.data.collections.new(self.names(name))
+			collect["ymp_name"] = name
 			bpy.context.scene.collection.children.link(collect)
 			self.cols.append(collect)
-		SIZEOF = 184 if self.use_tangents else 180
-		subobject_count = unpack_from(">I", self.file, 16)[0]
-		subobject_ptr = get_view(self.file, 20)
-		for i in range(subobject_count):
-			_ = bpy.data.meshes.new("ymxenSubObject")
-
-			bpy_obj = bpy.data.objects.new(f"Object{i:02d}", _)
-			subobj = subobject_ptr[i * SIZEOF : (i * SIZEOF) + SIZEOF]
-			vertex_count, unk_bool, bone_count = unpack(">3I", subobj[:12])
-			unk_bool = bool(unk_bool)  # treated as 32-bit, akin to Windows' BOOL
-			bone_indices = unpack(">20i", subobj[12:92])  # dont ask
-			(
-				bone_weight_count,
-				og_index,
-				unk_bool_2,
-				vert_offset,
-				weight_offset,
-				uv_offset,
-			) = unpack(">6I", subobj[92:116])
-			# Custom tangents is a bit tricky in Blender, we just calculate it automatically
-			if self.use_tangents:
-				# earlier revisions neglected this field in serialisation
-				tangent_offset = unpack(">I", subobj[116:120])[0]
-			else:
-				tangent_offset = None  # just use Blender's default tangents
-			fmt = ">I16s7If3f"
-			offset = 120 if self.use_tangents else 116
-
-			(
-				effect_technique_index,
-				shader_name,
-				unk_int_1,
-				unk_int_2,
-				material_count,
-				material_offset,
-				batch_offset,
-				redundant_vertex_count,
-				unk_int_3,
-				radius,
-				cx,
-				cy,
-				cz,
-			) = unpack_from(fmt, subobj, offset)
-
-			centre = (cx, cy, cz)
-
-			material = resolve_view(self.file, material_offset)
-			batch = resolve_view(self.file, batch_offset)
-			vertices = resolve_view(self.file, vert_offset)
-			weights = resolve_view(self.file, weight_offset)
-			uvs = resolve_view(self.file, uv_offset)
-			if tangent_offset:
-				tangent = resolve_view(self.file, tangent_offset)
-			else:
-				tangent = None
-			self.cols[og_index].objects.link(bpy_obj)
-			centre = YMXEN_SkinModel.AXIS_FIX @ Vector(centre)
-			sphere = bpy.data.objects.new(f"ySphere_{i:02d}", None)
+		subobject_count = len(self.model.subobjects)
+		self.bounds = SphereBVH()
+		textures = tuple(img.name if img else None for img in self.texture_slots)
+		for built, sub in enumerate(self.model.subobjects, 1):
+			i = sub.index  # file index, stable when only some sub-objects were decoded
+			key = mesh_key(sub, self.bone_names, "JBOY", textures)
+			_ = find_mesh(key) if self.share_meshes else None
+			reused = _ is not None
+			if not reused:
+				_ = bpy.data.meshes.new(self.names(f"ymxenSubObject{i:02d}"))
+
+			bpy_obj = bpy.data.objects.new(self.names(f"Object{i:02d}"), _)
+			self.cols[sub.collection].objects.link(bpy_obj)
+			if self.source and sub.offsets:
+				bpy_obj["ymp_source"] = {
+					"path": self.source,
+					"index": i,
+					"count": len(sub.positions),
+					"parameters": [m.offset for m in sub.materials],
+					**sub.offsets,
+				}
+			centre = Vector(sub.centre)
+			sphere = bpy.data.objects.new(self.names(f"ySphere_{i:02d}"), None)
 			sphere.empty_display_type = "SPHERE"
-			sphere.empty_display_size = radius
+			sphere.empty_display_size = sub.radius
 			sphere.location = centre
-			self.cols[og_index].objects.link(sphere)
+			self.cols[sub.collection].objects.link(sphere)
 
 			sphere.parent = bpy_obj
 			sphere.hide_select = True
 			sphere.hide_render = True
 			sphere.hide_viewport = True
+			self.bounds.add(bpy_obj, centre, sub.radius)
 
 			bpy_obj.display_type = "TEXTURED"
 			bpy_obj.parent = self.armature
 			mod = bpy_obj.modifiers.new(name="Armature", type="ARMATURE")
 			mod.object = self.armature
 
-			for b in bone_indices:
-				if b != -1:
-					idx = b - 1
-					if not idx:
-						continue
-					name = self.bone_names[idx]
-
-					if name not in bpy_obj.vertex_groups:
-						bpy_obj.vertex_groups.new(name=name)
-			NORMALS, XYZS, DIFFUSES = self.send_fvf(vertex_count, vertices, bpy_obj)
-			NORMALS = [-n for n in NORMALS]
-			vertex_weights = self.send_weights(vertex_count, weights, bone_count)
-
-			for v_idx, influences in enumerate(vertex_weights):
-				if not influences:
-					continue
-
-				total = sum(w for _, w in influences)
-				if total <= 0.0:
-					continue
-
-				for bone_idx, w in influences:
-					bone_name = self.bone_names[bone_idx]
+			for idx in sub.groups:
+				name = self.bone_names[idx]
 
-					group = bpy_obj.vertex_groups.get(bone_name)
-					if group:
-						group.add([v_idx], w / total, "REPLACE")
-			faces = self.send_faces(batch, bpy_obj)
-			bpy_obj.data.from_pydata(XYZS, [], faces)
-			bpy_obj.data.normals_split_custom_set_from_vertices(NORMALS)
-			UVS = self.send_TEXCOORD(uvs, vertex_count)
+				if name not in bpy_obj.vertex_groups:
+					bpy_obj.vertex_groups.new(name=name)
 
+			if reused:
+				# Geometry, weights and material are already on the mesh
+				yield built, subobject_count
+				continue
 			mesh = bpy_obj.data
-			uv_layer = mesh.uv_layers.new(name="TEXCOORD0").data
-
-			for poly in mesh.polygons:
-				for loop_idx in poly.loop_indices:
-					vert_idx = mesh.loops[loop_idx].vertex_index
-					uv_layer[loop_idx].uv = UVS[vert_idx]
+			fill_mesh(mesh, sub.positions, sub.faces)
+			add_weights(bpy_obj, sub, self.bone_names)
+			mesh.normals_split_custom_set_from_vertices(sub.normals)
+			uv_layer = set_loop_uvs(mesh, "TEXCOORD0", sub.uvs, sub.faces).data
 
 			col = bpy_obj.data.color_attributes.new(
 				name="D3DFVF_DIFFUSE", domain="POINT", type="BYTE_COLOR"
 			)
 
-			for i, d in enumerate(DIFFUSES):
-				a = (d >> 24) & 0xFF
-				r = (d >> 16) & 0xFF
-				g = (d >> 8) & 0xFF
-				b = d & 0xFF
-				col.data[i].color = (r, g, b, a)
+			d = sub.diffuse
+			argb = np.stack(((d >> 16) & 0xFF, (d >> 8) & 0xFF, d & 0xFF, (d >> 24) & 0xFF), 1)
+			col.data.foreach_set("color_srgb", argb.astype(np.float32).ravel() / 255.0)
 			if uv_layer:
 				mesh.calc_tangents(uvmap="TEXCOORD0")
 			self.set_shader(
-				shader_name.split(b"\x00")[0].decode("shift_jis", errors="replace"),
-				effect_technique_index,
-				material,
-				material_count,
+				sub.shader,
+				sub.technique,
+				sub.materials,
 				bpy_obj,
 			)
+			register_mesh(mesh, key)
+			yield built, subobject_count
+		register_bounds(self.bounds.build(self.armature))
 
 	def set_shader(
 		self,
 		name: str,
 		effect_technique_index: int,
-		material: memoryview,
-		material_count: int,
+		materials: list[Material],
 		subobj: bpy.types.Object,
 	):
 		noise_node = None
@@ -479,8 +451,12 @@ class YMXEN_SkinModel:
 				noise_node.inputs["Detail"].default_value = 2.0
 			return noise_node
 
-		mat = bpy.data.materials.new(name=f"{self.uid}_{name}")
+		mat = bpy.data.materials.new(name=self.names(name))
 		print(f"created material: {mat.name}")
+		# What the exporter writes back, the node tree only shows part of it
+		mat["ymp_shader"] = name
+		mat["ymp_technique"] = effect_technique_index
+		mat["ymp_parameters"] = [self.parameter_record(record) for record in materials]
 		nodes = mat.node_tree.nodes
 		links = mat.node_tree.links
 		nodes.clear()
@@ -508,34 +484,9 @@ class YMXEN_SkinModel:
 		level_base = 0
 
 		print("YMXEN_SkinModel: Added shader %s" % name)
-		for i in range(material_count):
-			START = i * 4
-			END = (i * 4) + 4
-			got = material[START:END]
-			offset = unpack(">I", got)[0]
-			material_view = resolve_view(self.file, offset)
-			MAT_name = (
-				unpack_from("16s", material_view, 0)[0]
-				.split(b"\x00")[0]
-				.decode("shift_jis", errors="replace")
-			)
-			mat_type, mat_size = unpack_from(">2H", material_view, 16)
-			match mat_type:
-				case 13:
-					data = unpack_from(">4f", material_view, 20)
-				case 10:
-					data = unpack_from(">1f", material_view, 20)
-				case 16:
-					data = unpack_from(">i", material_view, 20)  # microsoft style BOOL
-
-				case 5:
-					data = list(unpack_from(">i", material_view, 20))
-					if data[0] == -1:
-						data[0] = None
-					data = tuple(data)
-
-				case 15:
-					data = unpack_from(">I", material_view, 20)
+		for record in materials:
+			MAT_name = record.name
+			data = record.data
 			print("YMXEN_SkinModel: Added material %s" % MAT_name)
 			match MAT_name:
 				case "g_f4LightVec3":
@@ -555,26 +506,26 @@ class YMXEN_SkinModel:
 					bsdf.inputs["Specular Tint"].default_value = (r, g, b, a)
 
 				case 'g_fSpecLev':
-					(v,) = unpack_from(">f", material_view, 20)
+					(v,) = unpack_from(">f", record.raw)
 					bsdf.inputs["Specular IOR Level"].default_value = v / 10
 
 				case "g_fSpecularLev":
-					(v,) = unpack_from(">f", material_view, 20)
+					(v,) = unpack_from(">f", record.raw)
 					bsdf.inputs["Specular IOR Level"].default_value = v
 
 				case "g_fSpecPow":
-					(p,) = unpack_from(">f", material_view, 20)
+					(p,) = unpack_from(">f", record.raw)
 					bsdf.inputs["Roughness"].default_value = p / 10
 
 
 				case "g_iSpecularPow":
-					(p,) = unpack_from(">i", material_view, 20)
+					(p,) = unpack_from(">i", record.raw)
 					bsdf.inputs["Roughness"].default_value = max(
 						0.0, min(1.0, 1.0 - (p / 128.0))
 					)
 
 				case "g_fHDRAlpha":
-					(ha,) = unpack_from(">f", material_view, 20)
+					(ha,) = unpack_from(">f", record.raw)
 					bsdf.inputs["Emission Strength"].default_value = 1.0 - ha
 				case "g_bUseRefRegMap":
 					mat["g_bUseRefRegMap"] = bool(data[0])
@@ -584,7 +535,7 @@ class YMXEN_SkinModel:
 				case "g_fReflectAlpha":
 					mat["g_fReflectAlpha"] = float(data[0])
 				case "g_fSweatLev":
-					(sweat,) = unpack_from(">f", material_view, 20)
+					(sweat,) = unpack_from(">f", record.raw)
 					sweat = max(0.0, sweat)
 					bsdf.inputs["Coat Weight"].default_value = _clamp(sweat, 0.0, 1.0)
 					bsdf.inputs["Coat Roughness"].default_value = 0.1
@@ -813,105 +764,16 @@ class YMXEN_SkinModel:
 		links.new(diffuse_source, bsdf.inputs["Base Color"])
 		subobj.data.materials.append(mat)
 
-	def send_TEXCOORD(self, uv: memoryview, vertex: int):
-		SIZEOF = 8
-		UVS = []
-		for i in range(vertex):
-			view = uv[i * SIZEOF : (i * SIZEOF) + SIZEOF]
-			U, V = unpack(">2f", view)
-			V = 1.0 - V
-			UVS.append((U, V))
-		return UVS
-
-	def send_faces(self, batch: memoryview, subobj: bpy.types.Object):
-		MAGIC = 6
-		view = batch
-		FACES: list[tuple[int, ...]] = []
-		while True:
-			if unpack(">I", view[:4])[0] != MAGIC:
-				break
-			view = view[4:]
-			face_count = unpack(">I", view[:4])[0]
-			view = view[4:]
-			face_offset = unpack(">I", view[:4])[0]
-			view = view[4:]
-			face_view = resolve_view(self.file, face_offset)
-			cur_faces = []
-			for i in range(face_count):
-				cur_faces.append(unpack(">H", face_view[i * 2 : (i * 2) + 2])[0])
-			FACES.append(tuple(cur_faces))
-		faces = []
-
-		for strip in FACES:
-			if len(strip) < 3:
-				continue
-
-			for i in range(len(strip) - 2):
-				a, b, c = strip[i], strip[i + 1], strip[i + 2]
-
-				# Degenerate triangle, skip it
-				if a == b or b == c or a == c:
-					continue
-
-				# Flip winding every other triangle
-				if i & 1:
-					tri = (a, c, b)
-				else:
-					tri = (a, b, c)
-
-				# DX9 (LH, CW) → Blender (RH, CCW)
-				faces.append((tri[0], tri[2], tri[1]))
-
-		mesh = subobj.data
-		return faces
-
-	def send_weights(self, vertex_count: int, weights: memoryview, bones: int):
-		MORE = 0xFF
-		offset = 0
-		vertex_weights: list[list[tuple[int, float]]] = []
-
-		for v in range(vertex_count):
-			influences: list[tuple[int, float]] = []
-
-			bone_index, weight, status = unpack_from(">IfI", weights, offset)
-			offset += 16
-
-			if 0 <= bone_index < bones and weight > 0.0:
-				influences.append((bone_index, weight))
-
-			if (status & 0xFF) == MORE:
-				while True:
-					w = unpack_from(">f", weights, offset)[0]
-					offset += 4
-
-					idx = unpack_from(">I", weights, offset)[0]
-					offset += 4
-
-					if 0 <= idx < bones and w > 0.0:
-						influences.append((idx, w))
-					else:
-						break
-
-			vertex_weights.append(influences)
-
-		return vertex_weights
+	def parameter_record(self, record: Material) -> dict:
+		"""A shader parameter as a custom property, texture indices also by name."""
+		stored = {"record": encode_parameter(record).hex()}
+		if record.type == 5 and record.data[0] is not None and 0 <= record.data[0] < len(self.model.textures):
+			stored["texture"] = self.model.textures[record.data[0]]
+		return stored
 
 	def build_texture_slots(self):
-		textures = get_view(self.file, 0x24)
-		count = unpack_from(">I", self.file, 0x1C)[0]
-
-		self.texture_slots = []
-		self.texture_names = []
-
-		for i in range(count):
-			entry = textures[i * 16 : (i + 1) * 16]
-			name = (
-				unpack("16s", entry)[0]
-				.split(b"\x00", 1)[0]
-				.decode("shift_jis", errors="replace")
-			)
-			self.texture_slots.append(None)
-			self.texture_names.append(name.lower())
+		self.texture_slots = [None] * len(self.model.textures)
+		self.texture_names = [name.lower() for name in self.model.textures]
 
 	def load_tex_files(self, filepacks: tuple[memoryview, ...]):
 		self.loaded_textures: dict[str, bpy.types.Image] = {}
@@ -954,25 +816,6 @@ class YMXEN_SkinModel:
 			if img:
 				self.texture_slots[i] = img
 
-	def send_fvf(self, count: int, vertices: memoryview, subobj: bpy.types.Object):
-		packet = unpack(">I", vertices[:4])[0]
-		FVF_PACKET = resolve_view(self.file, packet)
-		SIZEOF = 28
-		NORMALS: list[Vector] = []
-		XYZS: list[Vector] = []
-		DIFFUSES: list[int] = []
-		for i in range(count):
-			packet = FVF_PACKET[i * SIZEOF : (i * SIZEOF) + SIZEOF]
-			XYZ = YMXEN_SkinModel.AXIS_FIX @ Vector(unpack_from(">3f", packet, 0))
-			NORMAL = YMXEN_SkinModel.AXIS_FIX @ Vector(unpack_from(">3f", packet, 12))
-			DIFFUSE = unpack_from(">i", packet, 24)[0]
-			NORMALS.append(NORMAL)
-			XYZS.append(XYZ)
-			DIFFUSES.append(DIFFUSE)
-		return NORMALS, XYZS, DIFFUSES
-
-		# Create colour attribute
-
 	def match_bones(self, config_name: str):
 
 		matches = []
@@ -1006,6 +849,8 @@ class YMXEN_SkinModel:
 				bone.constraints.remove(c)
 
 	def apply_muscle_config(self, cfg_path: str):
+		if self.shared:
+			return  # springs are already on the shared rig
 		bones_cfg = self.read_muscle_springs(cfg_path)
 
 		bpy.context.view_layer.objects.active = self.armature
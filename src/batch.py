@@ -0,0 +1,307 @@
+"""Headless batch conversion of YMP files.
+
+Decode only, in plain Python, one ``.npz`` per model (see decode.io.save_model)::
+
+	python io_mesh_ymp/src/batch.py "dump/**/*.ymxen" "dump/**/*.yobj" -o out
+
+Full import inside Blender, one ``.blend`` per model::
+
+	blender -b --factory-startup --python io_mesh_ymp/src/batch.py -- "dump/**/*.ymxen" -o out --format blend
+
+Files are decoded in a process pool. Every file gets a manifest entry (status,
+output, seconds, error) that is saved as soon as it finishes, so a rerun with
+the same output directory skips what is already done. A file that was being
+converted when the process died is recorded as crashed and skipped on the next
+run, unless ``--retry-failed`` is given. A file that kills a pool worker is
+failed on its own, the files that were in the pool with it are converted
+again.
+"""
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+import argparse
+import glob
+import importlib
+import json
+import os
+import sys
+import time
+import traceback
+
+ADDON_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if __package__:
+	from .decode.header import Selection, parse_selection
+	from .decode.io import FORMATS, decode_file, map_file, save_model
+	from .decode.parallel import decode_files
+	from .worker import entry, pool
+else:
+	# Run as a script, import the package as top-level src like the pool workers do
+	if ADDON_ROOT not in sys.path:
+		sys.path.insert(0, ADDON_ROOT)
+	from src.decode.header import Selection, parse_selection
+	from src.decode.io import FORMATS, decode_file, map_file, save_model
+	from src.decode.parallel import decode_files
+	from src.worker import entry, pool
+
+MANIFEST = "manifest.json"
+EXTENSIONS = {"npz": ".npz", "blend": ".blend"}
+
+
+class Manifest:
+	"""Per-input conversion record, written to disk after every change."""
+
+	def __init__(self, path: str):
+		self.path = path
+		self.entries: dict[str, dict] = {}
+		if os.path.exists(path):
+			with open(path, "r", encoding="utf-8") as f:
+				self.entries = json.load(f).get("files", {})
+		for entry in self.entries.values():
+			if entry["status"] == "running":
+				entry["status"] = "failed"
+				entry["error"] = "crashed during conversion"
+
+	def pending(self, path: str, retry_failed: bool = False) -> bool:
+		"""Whether path still needs converting."""
+		entry = self.entries.get(path)
+		if entry is None:
+			return True
+		st = os.stat(path)
+		if (entry["size"], entry["mtime_ns"]) != (st.st_size, st.st_mtime_ns):
+			return True
+		if entry["status"] == "ok":
+			return not os.path.exists(entry["output"])
+		return retry_failed
+
+	def start(self, path: str, output: str):
+		"""Mark path as in progress, so a crash while converting it shows on the next run."""
+		self.finish(path, output, 0.0, status="running")
+
+	def finish(self, path: str, output: str, seconds: float, error: str | None = None, status: str | None = None):
+		st = os.stat(path)
+		self.entries[path] = {
+			"status": status or ("failed" if error else "ok"),
+			"output": output,
+			"size": st.st_size,
+			"mtime_ns": st.st_mtime_ns,
+			"seconds": round(seconds, 4),
+			"error": error,
+		}
+		self.save()
+
+	def save(self):
+		tmp = self.path + ".tmp"
+		with open(tmp, "w", encoding="utf-8") as f:
+			json.dump({"version": 1, "files": self.entries}, f, indent="\t")
+		os.replace(tmp, self.path)
+
+
+def expand(patterns: list[str], magic: bytes | None = None) -> list[str]:
+	"""Absolute paths of the files matched by the globs, optionally of one format only."""
+	paths = []
+	seen = set()
+	for pattern in patterns:
+		for path in sorted(glob.glob(pattern, recursive=True)):
+			path = os.path.abspath(path)
+			if path in seen or not os.path.isfile(path):
+				continue
+			seen.add(path)
+			with open(path, "rb") as f:
+				found = f.read(4)
+			if found in FORMATS and (magic is None or found == magic):
+				paths.append(path)
+	return paths
+
+
+def output_paths(paths: list[str], out_dir: str, ext: str) -> dict[str, str]:
+	"""Input -> output path, mirroring the input tree under out_dir."""
+	if not paths:
+		return {}
+	root = os.path.commonpath([os.path.dirname(p) for p in paths])
+	return {
+		p: os.path.join(out_dir, os.path.splitext(os.path.relpath(p, root))[0] + ext)
+		for p in paths
+	}
+
+
+def convert_npz(path: str, output: str, selection: tuple | None = None) -> float:
+	"""Pool worker: decode path and dump it to output, returns the seconds taken."""
+	start = time.perf_counter()
+	os.makedirs(os.path.dirname(output), exist_ok=True)
+	save_model(output, decode_file(path, selection=Selection(*selection) if selection else None))
+	return time.perf_counter() - start
+
+
+def run_npz(todo: dict[str, str], manifest: Manifest, jobs: int | None, selection: Selection | None, log):
+	"""Convert todo in the pool. A file that kills its worker fails alone, the rest go on in a new pool.
+
+	A dead worker breaks the pool and every file in it, so no more files are
+	in flight than there are workers. Those are then the suspects, converted
+	again one at a time, and only the one that kills its worker again fails.
+	"""
+	task = entry("batch.convert_npz")
+	workers = min(jobs or os.cpu_count() or 1, len(todo)) or 1
+	fields = (selection.collections, selection.indices, selection.shaders) if selection else None
+
+	def convert(queue: deque, workers: int) -> list[str]:
+		"""Convert the paths of queue, returns those in flight if the pool broke (queue keeps the rest)."""
+		broken = []
+		with pool(workers) as executor:
+			futures = {}
+			while queue or futures:
+				while queue and len(futures) < workers:
+					path = queue.popleft()
+					futures[executor.submit(task, path, todo[path], fields)] = path
+				for future in wait(futures, return_when=FIRST_COMPLETED).done:
+					path = futures.pop(future)
+					try:
+						manifest.finish(path, todo[path], future.result())
+					except BrokenProcessPool:
+						broken.append(path)
+						continue
+					except Exception as e:
+						manifest.finish(path, todo[path], 0.0, f"{type(e).__name__}: {e}")
+					log(path, manifest.entries[path])
+				if broken:
+					return broken + list(futures.values())
+		return broken
+
+	queue = deque(todo)
+	while queue:
+		for path in convert(queue, workers):
+			if convert(deque([path]), 1):
+				manifest.finish(path, todo[path], 0.0, "BrokenProcessPool: the worker process died converting it")
+				log(path, manifest.entries[path])
+
+
+def sibling_files(directory: str, cache: dict) -> dict[str, list[str]]:
+	"""Texture packs, muscle configs and attachment files next to the models, what the XBOX operator scans for."""
+	found = cache.get(directory)
+	if found is None:
+		found = cache[directory] = {"tex": [], "bane": [], "abd": []}
+		for name in sorted(os.listdir(directory)):
+			lname = name.lower()
+			path = os.path.join(directory, name)
+			if lname.endswith(".tex"):
+				found["tex"].append(path)
+			elif lname.startswith("bane_muscle"):
+				found["bane"].append(path)
+			elif lname.endswith(".abd"):
+				found["abd"].append(path)
+	return found
+
+
+def build_blend(path: str, model, output: str, args, siblings: dict):
+	"""Import one decoded model into an empty file and save it."""
+	import bpy
+	package = __package__ or "src"
+	Namespace = importlib.import_module(f"{package}.globals.naming").Namespace
+	SkinModel = importlib.import_module(f"{package}.ps2.Import.skinmodel").SkinModel
+	YMXEN_SkinModel = importlib.import_module(f"{package}.XBOX.Import.skinmodel_ymxen").YMXEN_SkinModel
+
+	bpy.ops.wm.read_factory_settings(use_empty=True)
+	name = os.path.basename(path)
+	if model.format == "JBOY":
+		m = YMXEN_SkinModel(model, args.scale, True, Namespace(name), share_meshes=True)
+		found = sibling_files(os.path.dirname(path), siblings)
+		m.build_texture_slots()
+		m.load_tex_files(tuple(map_file(tex) for tex in found["tex"]))
+		m.resolve_texture_slots()
+		for cfg in found["bane"]:
+			m.apply_muscle_config(cfg)
+		for abd in found["abd"]:
+			m.create_attachment_points(abd)
+	else:
+		m = SkinModel(model, args.scale, True, Namespace(name), share_meshes=True)
+		if args.textures:
+			m.set_texture(args.textures)
+	m.start()
+	if bpy.context.object and bpy.context.object.mode != "OBJECT":
+		bpy.ops.object.mode_set(mode="OBJECT")
+	os.makedirs(os.path.dirname(output), exist_ok=True)
+	bpy.ops.file.pack_all()
+	bpy.ops.wm.save_as_mainfile(filepath=output, check_existing=False, compress=args.compress)
+
+
+def run_blend(todo: dict[str, str], manifest: Manifest, jobs: int | None, selection: Selection | None, args, log):
+	"""Decode in the pool, build and save one file at a time in this Blender."""
+	siblings = {}
+	for path, result in decode_files(list(todo), max_workers=jobs, selection=selection):
+		output = todo[path]
+		if isinstance(result, Exception):
+			manifest.finish(path, output, 0.0, f"{type(result).__name__}: {result}")
+		else:
+			manifest.start(path, output)
+			start = time.perf_counter()
+			try:
+				build_blend(path, result, output, args, siblings)
+			except Exception as e:
+				traceback.print_exc()
+				manifest.finish(path, output, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+			else:
+				manifest.finish(path, output, time.perf_counter() - start)
+		log(path, manifest.entries[path])
+
+
+def parse_args(argv: list[str]):
+	parser = argparse.ArgumentParser(
+		prog="batch.py",
+		description="Convert YMP/YMXEN files to .npz dumps or, inside Blender, .blend files",
+	)
+	parser.add_argument("inputs", nargs="+", help="input files or globs, ** recurses")
+	parser.add_argument("-o", "--output", required=True, help="output directory, also holds the manifest")
+	parser.add_argument("--format", choices=tuple(EXTENSIONS), default="npz")
+	parser.add_argument("--only", choices=[m.decode() for m in FORMATS], help="convert one platform only")
+	parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes, defaults to the CPU count")
+	parser.add_argument("--collections", default="", help="only these object groups, comma separated names (wildcards allowed) or indices")
+	parser.add_argument("--subobjects", default="", help="only these sub-object indices, e.g. 0,3-5")
+	parser.add_argument("--shaders", default="", help="only sub-objects with these shaders, comma separated (wildcards allowed)")
+	parser.add_argument("--scale", type=float, default=1.0)
+	parser.add_argument("--textures", help="TGA folder for PS2 models (blend only)")
+	parser.add_argument("--compress", action="store_true", help="compress .blend files")
+	parser.add_argument("--retry-failed", action="store_true", help="retry files that failed or crashed last run")
+	return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+	if argv is None:
+		argv = sys.argv[sys.argv.index("--") + 1 :] if "--" in sys.argv else sys.argv[1:]
+	args = parse_args(argv)
+	if args.format == "blend":
+		try:
+			import bpy  # noqa: F401
+		except ImportError:
+			print("batch.py: --format blend needs to run inside Blender (blender -b --python)", file=sys.stderr)
+			return 2
+
+	selection = parse_selection(args.collections, args.subobjects, args.shaders)
+	os.makedirs(args.output, exist_ok=True)
+	manifest = Manifest(os.path.join(args.output, MANIFEST))
+	paths = expand(args.inputs, args.only.encode() if args.only else None)
+	outputs = output_paths(paths, os.path.abspath(args.output), EXTENSIONS[args.format])
+	todo = {p: o for p, o in outputs.items() if manifest.pending(p, args.retry_failed)}
+	print(f"batch.py: {len(paths)} files, {len(paths) - len(todo)} already done")
+
+	done = 0
+	total = time.perf_counter()
+
+	def log(path: str, entry: dict):
+		nonlocal done
+		done += 1
+		status = "ok" if entry["status"] == "ok" else f"FAILED ({entry['error']})"
+		print(f"[{done}/{len(todo)}] {entry['seconds']:8.3f}s {path}: {status}")
+
+	if todo:
+		if args.format == "blend":
+			run_blend(todo, manifest, args.jobs, selection, args, log)
+		else:
+			run_npz(todo, manifest, args.jobs, selection, log)
+
+	failed = [p for p in paths if manifest.entries.get(p, {}).get("status") != "ok"]
+	print(f"batch.py: {len(paths) - len(failed)} ok, {len(failed)} failed in {time.perf_counter() - total:.2f}s")
+	return 1 if failed else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
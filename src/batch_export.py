@@ -0,0 +1,191 @@
+"""Batch export of a roster, one ``.ymxen`` per model of the open ``.blend``.
+
+Inside Blender::
+
+	blender -b roster.blend --python io_mesh_ymp/src/batch_export.py -- -o out --textures
+
+or File > Export > Yuke's Models > XBOX (Batch). A model is the collections
+sharing a namespace stem (``<stem>:<name>``, as the importer names them)
+and the armature their meshes are skinned to; it is written to
+``<out>/<stem>.ymxen``, with ``<stem>.tex`` next to it when asked.
+
+Blender data can only be read on the main thread, so each model is read
+there (XBOX.Export.batch) and handed to a process pool in one shared memory
+block, as decode.parallel ships decoded models the other way. Workers
+stripify, lay out and compress textures without ``bpy`` and write their own
+files, so reading the next model overlaps the encoding of the previous ones.
+Each model gets a report line: read, encode and write seconds and what went
+into the file.
+"""
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+import argparse
+import importlib
+import os
+import sys
+import time
+
+ADDON_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if __package__:
+	from .decode.model import restore
+	from .decode.parallel import from_shared
+	from .encode.dds import encode_dds
+	from .encode.filepack import write_filepack
+	from .encode.strips import MAX_LENGTH
+	from .encode.xbox import encode_jboy
+	from .worker import entry
+else:
+	# Run as a script, import the package as top-level src like the pool workers do
+	if ADDON_ROOT not in sys.path:
+		sys.path.insert(0, ADDON_ROOT)
+	from src.decode.model import restore
+	from src.decode.parallel import from_shared
+	from src.encode.dds import encode_dds
+	from src.encode.filepack import write_filepack
+	from src.encode.strips import MAX_LENGTH
+	from src.encode.xbox import encode_jboy
+	from src.worker import entry
+
+
+def encode_target(meta: dict, block: str, layout: dict, output: str, textures: list | None, strip_length: int = 0) -> dict:
+	"""Pool worker: encode one model read by XBOX.Export.batch.read_target and write it.
+
+	textures are (name, fourcc, mips) per filepack entry, fourcc None for a
+	DDS copied as imported. strip_length is encode_jboy's. Returns the report
+	fields of the model.
+	"""
+	start = time.perf_counter()
+	arrays = from_shared(block, layout)
+	strips = []
+	data = encode_jboy(restore(meta, arrays), strips, strip_length=strip_length).chunk(b"JBOY")
+	pack = None
+	if textures is not None:
+		pack = write_filepack(
+			[
+				(name, arrays[f"texture.{i}"].tobytes() if fourcc is None else encode_dds(arrays[f"texture.{i}"], fourcc, mips))
+				for i, (name, fourcc, mips) in enumerate(textures)
+			]
+		)
+	encoded = time.perf_counter()
+
+	os.makedirs(os.path.dirname(output), exist_ok=True)
+	with open(output, "wb") as f:
+		f.write(data)
+	if pack is not None:
+		with open(os.path.splitext(output)[0] + ".tex", "wb") as f:
+			f.write(pack)
+	triangles = sum(s.triangles for s in strips)
+	return {
+		"encode": encoded - start,
+		"write": time.perf_counter() - encoded,
+		"bytes": len(data) + (len(pack) if pack is not None else 0),
+		"subobjects": len(strips),
+		"triangles": triangles,
+		"acmr": sum(s.misses for s in strips) / max(triangles, 1),
+	}
+
+
+def export_workers(max_workers: int | None, targets: int) -> int:
+	return min(max_workers or os.cpu_count() or 1, targets) or 1
+
+
+def run(executor: ProcessPoolExecutor, reads, log, in_flight: int) -> list[dict]:
+	"""Encode every (name, output, read seconds, job or exception) of reads, logging each model as it finishes.
+
+	A job is (meta, block, layout, textures, strip_length) with block the open
+	SharedMemory to_shared made. It stays open here until its worker is done,
+	on Windows it would vanish with its last handle. reads is consumed
+	lazily, so a model is read while the ones before it encode, but no
+	further than in_flight models ahead: each holds its block until encoded.
+	"""
+	task = entry("batch_export.encode_target")
+	reports = []
+	futures = {}
+
+	def finish(done):
+		for future in done:
+			report, block = futures.pop(future)
+			try:
+				report.update(future.result())
+			except Exception as e:
+				report["error"] = f"{type(e).__name__}: {e}"
+				try:
+					block.unlink()  # the worker died before freeing it
+				except Exception:
+					pass
+			block.close()
+			reports.append(report)
+			log(report)
+
+	for name, output, seconds, job in reads:
+		report = {"name": name, "output": output, "read": seconds, "error": None}
+		if isinstance(job, Exception):
+			report["error"] = f"{type(job).__name__}: {job}"
+			reports.append(report)
+			log(report)
+			continue
+		meta, block, layout, textures, strip_length = job
+		futures[executor.submit(task, meta, block.name, layout, output, textures, strip_length)] = report, block
+		if len(futures) >= in_flight:
+			finish(wait(futures, return_when=FIRST_COMPLETED).done)
+	finish(as_completed(list(futures)))
+	return reports
+
+
+def format_report(report: dict) -> str:
+	if report["error"]:
+		return f"{report['name']}: FAILED ({report['error']}) after {report['read']:.3f}s reading"
+	return (
+		f"{report['name']}: read {report['read']:.3f}s, encode {report['encode']:.3f}s, write {report['write']:.3f}s, "
+		f"{report['subobjects']} sub-objects, {report['triangles']} triangles, ACMR {report['acmr']:.3f}, {report['bytes']} bytes"
+	)
+
+
+def parse_args(argv: list[str]):
+	parser = argparse.ArgumentParser(
+		prog="batch_export.py",
+		description="Export every model of the open .blend to its own .ymxen (run inside Blender)",
+	)
+	parser.add_argument("-o", "--output", required=True, help="output directory")
+	parser.add_argument("--targets", default="", help="only these models, comma separated stems (wildcards allowed)")
+	parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes, defaults to the CPU count")
+	parser.add_argument("--textures", action="store_true", help="also write each model's .tex filepack")
+	parser.add_argument("--max-influences", type=int, default=4, help="bones per vertex, 0 keeps them all")
+	parser.add_argument("--apply-modifiers", action="store_true", help="export meshes as their modifiers leave them")
+	parser.add_argument(
+		"--band-strips", action="store_true", help="short strips side by side, fewer cache misses but slower to encode"
+	)
+	return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+	if argv is None:
+		argv = sys.argv[sys.argv.index("--") + 1 :] if "--" in sys.argv else sys.argv[1:]
+	args = parse_args(argv)
+	try:
+		import bpy  # noqa: F401
+	except ImportError:
+		print("batch_export.py: needs to run inside Blender (blender -b roster.blend --python)", file=sys.stderr)
+		return 2
+	batch = importlib.import_module(f"{__package__ or 'src'}.XBOX.Export.batch")
+
+	targets = batch.export_targets(patterns=[p for p in args.targets.split(",") if p.strip()])
+	print(f"batch_export.py: {len(targets)} models")
+	total = time.perf_counter()
+	reports = batch.export_roster(
+		targets,
+		os.path.abspath(args.output),
+		args.jobs,
+		lambda report: print(format_report(report)),
+		textures=args.textures,
+		max_influences=args.max_influences,
+		apply_modifiers=args.apply_modifiers,
+		strip_length=MAX_LENGTH if args.band_strips else 0,
+	)
+	failed = [r for r in reports if r["error"]]
+	print(f"batch_export.py: {len(reports) - len(failed)} ok, {len(failed)} failed in {time.perf_counter() - total:.2f}s")
+	return 1 if failed else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,5 @@
+from .header import Header, Selection, SubObjectInfo, parse_selection
+from .model import Material, Model, Skeleton, SubObject
+from .pof0 import Relocations, decode_pof0
+from .ps2 import decode_yobj
+from .xbox import decode_jboy
@@ -0,0 +1,49 @@
+"""Summarise YOBJ/JBOY files from the addon folder::
+
+	python -m src.decode dump/*.ymxen [--json] [--check]
+
+--check also reads the POF0 table of each file and checks every pointer it
+lists against the payload.
+"""
+import argparse
+import json
+import sys
+
+from .io import check_file, inspect_file
+
+
+def main(argv: list[str] | None = None) -> int:
+	parser = argparse.ArgumentParser(prog="python -m src.decode", description="Summarise YOBJ/JBOY files")
+	parser.add_argument("files", nargs="+")
+	parser.add_argument("--json", action="store_true", help="one JSON object per line")
+	parser.add_argument("--check", action="store_true", help="check every pointer listed in the POF0 table")
+	args = parser.parse_args(argv)
+
+	failed = 0
+	for path in args.files:
+		try:
+			header = inspect_file(path)
+			pointers = len(check_file(path)) if args.check else None
+		except Exception as e:
+			failed += 1
+			if args.json:
+				print(json.dumps({"path": path, "error": str(e)}))
+			else:
+				print(e, file=sys.stderr)
+			continue
+		if args.json:
+			extra = {} if pointers is None else {"pointers": pointers}
+			print(json.dumps({"path": path, **header.to_dict(), **extra}, ensure_ascii=False))
+			continue
+		print(
+			f"{path}: {header.format}, {len(header.bones)} bones, {len(header.textures)} textures, "
+			f"{len(header.collections)} collections, {len(header.subobjects)} sub-objects"
+			+ ("" if pointers is None else f", {pointers} pointers ok")
+		)
+		for sub in header.subobjects:
+			collection = header.collections[sub.collection] if sub.collection < len(header.collections) else "?"
+			print(f"  {sub.index:3d} {collection:16} {sub.vertex_count:6d} verts {sub.strip_count:4d} strips  {sub.shader}")
+	return 1 if failed else 0
+
+
+sys.exit(main())
@@ -0,0 +1,111 @@
+"""On-disk cache of decoded models.
+
+Entries are uncompressed ``.npz`` files (decode.io.save_model) named by a hash
+of the payload, the decoder version and the sub-object selection, so a changed
+file or a decoder change simply misses. Loading one is a plain array read, no
+strip, weight or material decoding. Least recently used entries are removed
+once the directory grows past its size cap.
+"""
+import hashlib
+import os
+import time
+import uuid
+
+from .header import Selection
+from .io import decode_payload, load_model, read_payload, save_model
+from .model import Model
+
+# Bump whenever the decoders' output changes, it invalidates every entry
+DECODER_VERSION = 3
+EXTENSION = ".npz"
+STALE_TMP = 3600  # seconds before an unfinished write is considered abandoned
+
+
+class ModelCache:
+	def __init__(self, directory: str, max_bytes: int = 2 << 30):
+		self.directory = directory
+		self.max_bytes = max_bytes
+
+	def key(self, magic: bytes, payload: memoryview, selection: Selection | None = None) -> str:
+		h = hashlib.blake2b(digest_size=20)
+		h.update(b"%d:%s:" % (DECODER_VERSION, magic))
+		if selection:
+			h.update(repr((selection.collections, selection.indices, selection.shaders)).encode())
+		h.update(payload)
+		return h.hexdigest()
+
+	def path(self, key: str) -> str:
+		return os.path.join(self.directory, key + EXTENSION)
+
+	def load(self, key: str) -> Model | None:
+		path = self.path(key)
+		try:
+			model = load_model(path)
+		except FileNotFoundError:
+			return None
+		except Exception:
+			# Truncated or corrupt (BadZipFile, a bad header, missing arrays), drop it so the next
+			# store replaces it instead of every import failing on it
+			try:
+				os.remove(path)
+			except OSError:
+				pass
+			return None
+		try:
+			os.utime(path)  # mtime is the LRU clock
+		except OSError:
+			pass
+		return model
+
+	def store(self, key: str, model: Model):
+		os.makedirs(self.directory, exist_ok=True)
+		# Written under a unique name and renamed, so readers never see a partial entry
+		tmp = os.path.join(self.directory, f"{key}.{uuid.uuid4().hex}.tmp{EXTENSION}")
+		save_model(tmp, model)
+		os.replace(tmp, self.path(key))
+		self.evict()
+
+	def evict(self):
+		"""Remove least recently used entries until the directory fits max_bytes."""
+		entries = []
+		total = 0
+		now = time.time()
+		with os.scandir(self.directory) as it:
+			for entry in it:
+				if not entry.name.endswith(EXTENSION):
+					continue
+				try:
+					st = entry.stat()
+					if ".tmp" in entry.name:
+						if now - st.st_mtime > STALE_TMP:
+							os.remove(entry.path)
+						continue
+				except OSError:
+					continue
+				entries.append((st.st_mtime_ns, st.st_size, entry.path))
+				total += st.st_size
+		entries.sort()
+		for _, size, path in entries:
+			if total <= self.max_bytes:
+				break
+			try:
+				os.remove(path)
+			except OSError:
+				continue  # already gone, or open elsewhere
+			total -= size
+
+	def decode(self, path: str, magic: bytes | None = None, selection: Selection | None = None) -> Model:
+		"""decode.io.decode_file through the cache."""
+		found, payload = read_payload(path)
+		if magic is not None and found != magic:
+			raise ValueError(f"{path}: expected {magic.decode()} but found {found.decode()}")
+		return self.fetch(found, payload, selection)
+
+	def fetch(self, magic: bytes, payload: memoryview, selection: Selection | None = None) -> Model:
+		"""decode.io.decode_payload through the cache."""
+		key = self.key(magic, payload, selection)
+		model = self.load(key)
+		if model is None:
+			model = decode_payload(magic, payload, selection)
+			self.store(key, model)
+		return model
@@ -0,0 +1,185 @@
+"""Header and table-of-contents summaries without decoding any geometry.
+
+Only the header words and the fixed-size records they point at are read (bone,
+texture and object-group names, one record per sub-object), so a file costs a
+few table lookups however big its vertex and weight streams are. The command
+line front end is ``python -m src.decode``.
+"""
+from dataclasses import asdict, dataclass, field
+from fnmatch import fnmatchcase
+from struct import unpack_from
+
+from ..globals.be import Resolver
+from . import ps2, xbox
+from .model import decode_name
+
+
+@dataclass(slots=True)
+class SubObjectInfo:
+	index: int
+	collection: int
+	vertex_count: int
+	bone_count: int = 0
+	shader: str = ""
+	technique: int = 0
+	material_count: int = 0
+	strip_count: int = 0  # XBOX batch records, PS2 primitives
+	index_count: int = 0  # strip indices over all batches, XBOX only
+	centre: tuple[float, float, float] = (0.0, 0.0, 0.0)
+	radius: float = 0.0
+
+
+@dataclass(slots=True)
+class Header:
+	format: str
+	size: int  # payload bytes
+	use_tangents: bool = False
+	bones: list[str] = field(default_factory=list)
+	textures: list[str] = field(default_factory=list)
+	collections: list[str] = field(default_factory=list)
+	subobjects: list[SubObjectInfo] = field(default_factory=list)
+
+	def to_dict(self) -> dict:
+		return asdict(self)
+
+
+def jboy_subobjects(r: Resolver) -> list[SubObjectInfo]:
+	use_tangents = r.unpack(xbox.U32, 0, "version")[0] == 16
+	SIZEOF = 184 if use_tangents else 180
+	tail = 120 if use_tangents else 116
+	count = r.unpack(xbox.U32, 16, "subobject_count")[0]
+	records = r.deref(20, "subobjects", count * SIZEOF)
+	infos = []
+	for i in range(count):
+		record = records[i * SIZEOF : (i + 1) * SIZEOF]
+		vertex_count, _, bone_count = unpack_from(">3I", record, 0)
+		og_index = unpack_from(">I", record, 96)[0]
+		technique, shader, _, _, material_count, _, batch_offset, _, _, radius, cx, cy, cz = unpack_from(
+			">I16s7If3f", record, tail
+		)
+		strip_count = index_count = 0
+		field = f"subobjects[{i}].batches"
+		while r.pointer(batch_offset + strip_count * 12, field) == xbox.MAGIC:
+			index_count += r.unpack(xbox.BATCH, batch_offset + strip_count * 12 + 4, field)[0]
+			strip_count += 1
+		infos.append(
+			SubObjectInfo(
+				index=i,
+				collection=og_index,
+				vertex_count=vertex_count,
+				bone_count=bone_count,
+				shader=decode_name(shader),
+				technique=technique,
+				material_count=material_count,
+				strip_count=strip_count,
+				index_count=index_count,
+				centre=(cx, cz, -cy),
+				radius=radius,
+			)
+		)
+	return infos
+
+
+def yobj_subobjects(r: Resolver) -> list[SubObjectInfo]:
+	count = r.unpack(ps2.U32, 16, "subobject_count")[0]
+	records = r.deref(28, "subobjects", count * 64)
+	infos = []
+	for i in range(count):
+		record = records[i * 64 : (i + 1) * 64]
+		skin_tbl_count, primitive_count, _, _, og_index = unpack_from("<5I", record, 0)
+		vtx_indirect_ptr = unpack_from("<I", record, 0x18)[0]
+		vtx_indirect = r.deref(vtx_indirect_ptr, f"subobjects[{i}].vertices", 0x10)
+		cx, cy, cz, radius = unpack_from("<4f", record, 48)
+		infos.append(
+			SubObjectInfo(
+				index=i,
+				collection=og_index,
+				vertex_count=vtx_indirect[0x0E],
+				bone_count=skin_tbl_count,
+				strip_count=primitive_count,
+				centre=(cx, cz, -cy),
+				radius=radius,
+			)
+		)
+	return infos
+
+
+def bone_names(r: Resolver, count: int) -> list[str]:
+	bones = r.deref(32, "bones", count * 80) if count else r.bytes[:0]
+	return [decode_name(bones[i * 80 : i * 80 + 16].tobytes()) for i in range(count)]
+
+
+def read_header(magic: bytes, file: memoryview) -> Header:
+	"""Summary of a payload (the bytes after the 8-byte chunk header)."""
+	if magic == b"JBOY":
+		r = Resolver(file, ">")
+		return Header(
+			format="JBOY",
+			size=r.length,
+			use_tangents=r.unpack(xbox.U32, 0, "version")[0] == 16,
+			bones=bone_names(r, r.unpack(xbox.U32, 24, "bone_count")[0]),
+			textures=xbox.decode_textures(r),
+			collections=xbox.decode_collections(r),
+			subobjects=jboy_subobjects(r),
+		)
+	if magic == b"YOBJ":
+		r = Resolver(file, "<")
+		return Header(
+			format="YOBJ",
+			size=r.length,
+			bones=bone_names(r, r.unpack(ps2.U32, 20, "bone_count")[0]),
+			textures=ps2.decode_textures(r),
+			collections=ps2.decode_collections(r),
+			subobjects=yobj_subobjects(r),
+		)
+	raise ValueError(f"not a YOBJ/JBOY payload (magic {magic!r})")
+
+
+@dataclass(slots=True)
+class Selection:
+	"""Which sub-objects to import. Every filter that is set must match, unset ones match all."""
+
+	collections: tuple[str, ...] | None = None  # object-group names (fnmatch patterns) or og_index numbers
+	indices: tuple[int, ...] | None = None  # sub-object indices
+	shaders: tuple[str, ...] | None = None  # shader names (fnmatch patterns), XBOX only
+
+	def pick(self, header: Header) -> list[int]:
+		"""Indices of the sub-objects in header that pass the filters."""
+		picked = []
+		for sub in header.subobjects:
+			if self.indices is not None and sub.index not in self.indices:
+				continue
+			if self.shaders is not None and not any(fnmatchcase(sub.shader.lower(), p.lower()) for p in self.shaders):
+				continue
+			if self.collections is not None:
+				name = header.collections[sub.collection] if sub.collection < len(header.collections) else ""
+				if not any(p == str(sub.collection) or fnmatchcase(name.lower(), p.lower()) for p in self.collections):
+					continue
+			picked.append(sub.index)
+		return picked
+
+
+def parse_selection(collections: str = "", indices: str = "", shaders: str = "") -> Selection | None:
+	"""Selection from comma separated filters, indices also take ranges ("0,3-5").
+
+	None when no filter is given, i.e. import everything.
+	"""
+
+	def split(text: str) -> tuple[str, ...] | None:
+		items = tuple(t.strip() for t in text.split(",") if t.strip())
+		return items or None
+
+	picked = None
+	if parts := split(indices):
+		picked = []
+		for part in parts:
+			first, _, last = part.partition("-")
+			try:
+				picked.extend(range(int(first), int(last or first) + 1))
+			except ValueError:
+				raise ValueError(f"{part!r} is not a sub-object index or range such as 3 or 3-5") from None
+		picked = tuple(picked)
+	selection = Selection(split(collections), picked, split(shaders))
+	if selection.collections is selection.indices is selection.shaders is None:
+		return None
+	return selection
@@ -0,0 +1,102 @@
+"""Reading YMP chunks from disk."""
+import json
+import mmap
+import numpy as np
+
+from .header import Header, Selection, read_header
+from .model import Model, flatten, restore
+from .pof0 import POF0, Relocations, decode_pof0
+from .ps2 import decode_yobj
+from .xbox import decode_jboy
+
+# magic -> (byte order of the size field, decoder)
+FORMATS = {
+	b"YOBJ": ("little", decode_yobj),
+	b"JBOY": ("big", decode_jboy),
+}
+
+
+def map_file(path: str) -> memoryview:
+	"""Read-only view of a whole file, backed by a memory map instead of a copy.
+
+	The map is closed once the view and every slice of it are gone. The decoders
+	copy whatever they keep into their own arrays, so nothing they return pins it.
+	"""
+	with open(path, "rb") as f:
+		if not f.seek(0, 2):
+			return memoryview(b"")
+		return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def read_payload(path: str) -> tuple[bytes, memoryview]:
+	"""The chunk magic and a zero-copy view of the payload that follows the 8-byte header."""
+	view = map_file(path)
+	magic = view[:4].tobytes()
+	if magic not in FORMATS:
+		raise ValueError(f"{path}: not a YOBJ/JBOY file (magic {magic!r})")
+	size = int.from_bytes(view[4:8], FORMATS[magic][0])
+	return magic, view[8 : 8 + size]
+
+
+def read_relocations(path: str) -> tuple[bytes, Relocations]:
+	"""The chunk magic and every pointer of the payload, from the POF0 footer after it."""
+	view = map_file(path)
+	magic = view[:4].tobytes()
+	if magic not in FORMATS:
+		raise ValueError(f"{path}: not a YOBJ/JBOY file (magic {magic!r})")
+	byteorder = FORMATS[magic][0]
+	size = int.from_bytes(view[4:8], byteorder)
+	footer = view[8 + size :]
+	if footer[:4].tobytes() != POF0:
+		raise ValueError(f"{path}: no POF0 block after the {size}-byte payload")
+	length = int.from_bytes(footer[4:8], byteorder)
+	if 8 + length > len(footer):
+		raise ValueError(f"{path}: POF0 block of {length} bytes is cut off")
+	fields = decode_pof0(footer[8 : 8 + length])
+	return magic, Relocations.read(view[8 : 8 + size], fields, ">" if byteorder == "big" else "<")
+
+
+def check_file(path: str) -> Relocations:
+	"""The relocations of a file, after checking that every pointer stays inside its payload."""
+	_, relocations = read_relocations(path)
+	try:
+		relocations.validate()
+	except ValueError as e:
+		raise ValueError(f"{path}: {e}") from None
+	return relocations
+
+
+def decode_file(path: str, magic: bytes | None = None, selection: Selection | None = None) -> Model:
+	"""Decode a file, optionally insisting on one format and only the selected sub-objects."""
+	found, payload = read_payload(path)
+	if magic is not None and found != magic:
+		raise ValueError(f"{path}: expected {magic.decode()} but found {found.decode()}")
+	return decode_payload(found, payload, selection)
+
+
+def decode_payload(magic: bytes, payload: memoryview, selection: Selection | None = None) -> Model:
+	"""Decode a payload, only the selected sub-objects when a selection is given."""
+	subobjects = selection.pick(read_header(magic, payload)) if selection else None
+	return FORMATS[magic][1](payload, subobjects)
+
+
+def inspect_file(path: str) -> Header:
+	"""Summary of a file, only the pages holding the header and tables are read."""
+	magic, payload = read_payload(path)
+	try:
+		return read_header(magic, payload)
+	except Exception as e:
+		raise ValueError(f"{path}: {type(e).__name__}: {e}") from None
+
+
+def save_model(path: str, model: Model):
+	"""Dump a decoded model as ``.npz``, arrays by name plus the JSON metadata under ``meta``."""
+	meta, arrays = flatten(model)
+	np.savez(path, meta=np.array(json.dumps(meta)), **arrays)
+
+
+def load_model(path: str) -> Model:
+	"""Inverse of save_model."""
+	with np.load(path) as npz:
+		arrays = {key: npz[key] for key in npz.files}
+	return restore(json.loads(str(arrays.pop("meta"))), arrays)
@@ -0,0 +1,211 @@
+"""Intermediate model produced by the decoders and consumed by the Blender builders.
+
+Nothing in here touches ``bpy``. Geometry is already in Blender's axes (the
+importers' AXIS_FIX applied) with V flipped, the skeleton is kept as the raw
+engine values since the builders derive rest matrices from it.
+"""
+from dataclasses import dataclass, field
+import hashlib
+import numpy as np
+
+
+@dataclass(slots=True)
+class Skeleton:
+	names: list[str]
+	parents: np.ndarray  # int32 (n,), -1 for roots
+	positions: np.ndarray  # float32 (n, 3)
+	rotations: np.ndarray  # float32 (n, 3), Euler ZYX in radians
+
+	def __len__(self):
+		return len(self.names)
+
+
+@dataclass(slots=True)
+class Material:
+	"""One shader parameter record (``16s`` name, ``>2H`` type and size, data)."""
+
+	name: str
+	type: int
+	size: int
+	data: tuple
+	raw: bytes  # the bytes at +20, for parameters read with another type
+	offset: int = 0  # record offset in the payload
+
+
+@dataclass(slots=True)
+class SubObject:
+	index: int
+	collection: int
+	positions: np.ndarray  # float32 (v, 3)
+	normals: np.ndarray  # float32 (v, 3)
+	uvs: np.ndarray  # float32 (v, 2)
+	faces: np.ndarray  # int32 (f, 3)
+	# Skin weights in CSR form, the influences of vertex i are
+	# weight_bones[weight_offsets[i]:weight_offsets[i + 1]]
+	weight_offsets: np.ndarray  # int32 (v + 1,)
+	weight_bones: np.ndarray  # int32
+	weight_values: np.ndarray  # float32
+	groups: list[int]  # skeleton indices to create vertex groups for, in order
+	centre: tuple[float, float, float]
+	radius: float
+	shader: str = ""
+	technique: int = 0
+	palette: tuple[int, ...] = ()
+	bone_count: int = 0
+	diffuse: np.ndarray | None = None  # uint32 (v,) ARGB
+	face_materials: np.ndarray | None = None  # int32 (f,)
+	materials: list[Material] = field(default_factory=list)
+	digest: str = ""  # content hash of everything a mesh is built from, see subobject_digest
+	offsets: dict[str, int] = field(default_factory=dict)  # payload offsets it was decoded from ("record", "vertices", "uvs")
+
+	def influences(self, vertex: int) -> list[tuple[int, float]]:
+		start, end = self.weight_offsets[vertex], self.weight_offsets[vertex + 1]
+		return list(
+			zip(
+				self.weight_bones[start:end].tolist(),
+				self.weight_values[start:end].tolist(),
+			)
+		)
+
+
+@dataclass(slots=True)
+class Model:
+	format: str  # "JBOY" (Xbox) or "YOBJ" (PS2)
+	skeleton: Skeleton
+	collections: list[str]
+	textures: list[str]
+	subobjects: list[SubObject]
+	use_tangents: bool = False
+
+
+def csr(influences: list[list[tuple[int, float]]]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+	"""Per-vertex influence lists to (offsets, bones, weights) arrays."""
+	counts = np.fromiter((len(i) for i in influences), dtype=np.int32, count=len(influences))
+	offsets = np.zeros(len(influences) + 1, dtype=np.int32)
+	np.cumsum(counts, out=offsets[1:])
+	bones = np.fromiter((b for i in influences for b, _ in i), dtype=np.int32, count=int(offsets[-1]))
+	weights = np.fromiter((w for i in influences for _, w in i), dtype=np.float32, count=int(offsets[-1]))
+	return offsets, bones, weights
+
+
+def decode_name(raw: bytes, errors: str = "replace") -> str:
+	return raw.split(b"\x00", 1)[0].decode("shift_jis", errors=errors)
+
+
+def subobject_digest(sub: SubObject) -> str:
+	"""Hash of the geometry, weights, palette and shader parameters, not of where the sub-object sits."""
+	h = hashlib.blake2b(digest_size=20)
+	for key in SUBOBJECT_ARRAYS:
+		value = getattr(sub, key)
+		if value is None:
+			h.update(b"-")
+			continue
+		value = np.ascontiguousarray(value)
+		h.update(f"{key}{value.dtype.str}{value.shape}".encode())
+		h.update(value.tobytes())
+	h.update(repr((sub.groups, sub.palette, sub.bone_count, sub.shader, sub.technique)).encode())
+	for m in sub.materials:
+		h.update(repr((m.name, m.type, m.size, m.data)).encode())
+		h.update(m.raw)
+	return h.hexdigest()
+
+
+SUBOBJECT_ARRAYS = (
+	"positions",
+	"normals",
+	"uvs",
+	"faces",
+	"weight_offsets",
+	"weight_bones",
+	"weight_values",
+	"diffuse",
+	"face_materials",
+)
+
+
+def flatten(model: Model) -> tuple[dict, dict[str, np.ndarray]]:
+	"""Split a model into JSON-able metadata and a flat dict of arrays.
+
+	Used to ship decoded models across processes and to store them on disk.
+	"""
+	skeleton = model.skeleton
+	arrays = {
+		"skeleton.parents": skeleton.parents,
+		"skeleton.positions": skeleton.positions,
+		"skeleton.rotations": skeleton.rotations,
+	}
+	subobjects = []
+	for i, sub in enumerate(model.subobjects):
+		for key in SUBOBJECT_ARRAYS:
+			value = getattr(sub, key)
+			if value is not None:
+				arrays[f"{i}.{key}"] = value
+		subobjects.append(
+			{
+				"index": sub.index,
+				"collection": sub.collection,
+				"groups": list(sub.groups),
+				"centre": list(sub.centre),
+				"radius": float(sub.radius),
+				"shader": sub.shader,
+				"technique": sub.technique,
+				"palette": list(sub.palette),
+				"bone_count": sub.bone_count,
+				"materials": [
+					[m.name, m.type, m.size, list(m.data), m.raw.hex(), m.offset]
+					for m in sub.materials
+				],
+				"digest": sub.digest,
+				"offsets": dict(sub.offsets),
+			}
+		)
+	meta = {
+		"format": model.format,
+		"use_tangents": model.use_tangents,
+		"collections": model.collections,
+		"textures": model.textures,
+		"bones": skeleton.names,
+		"subobjects": subobjects,
+	}
+	return meta, arrays
+
+
+def restore(meta: dict, arrays) -> Model:
+	"""Inverse of flatten."""
+	skeleton = Skeleton(
+		list(meta["bones"]),
+		arrays["skeleton.parents"],
+		arrays["skeleton.positions"],
+		arrays["skeleton.rotations"],
+	)
+	subobjects = []
+	for i, info in enumerate(meta["subobjects"]):
+		values = {key: arrays.get(f"{i}.{key}") for key in SUBOBJECT_ARRAYS}
+		subobjects.append(
+			SubObject(
+				index=info["index"],
+				collection=info["collection"],
+				groups=list(info["groups"]),
+				centre=tuple(info["centre"]),
+				radius=info["radius"],
+				shader=info["shader"],
+				technique=info["technique"],
+				palette=tuple(info["palette"]),
+				bone_count=info["bone_count"],
+				materials=[
+					Material(name, mat_type, size, tuple(data), bytes.fromhex(raw), offset)
+					for name, mat_type, size, data, raw, offset in info["materials"]
+				],
+				digest=info.get("digest", ""),
+				offsets=dict(info.get("offsets", {})),
+				**values,
+			)
+		)
+	return Model(
+		format=meta["format"],
+		skeleton=skeleton,
+		collections=list(meta["collections"]),
+		textures=list(meta["textures"]),
+		subobjects=subobjects,
+		use_tangents=meta["use_tangents"],
+	)
@@ -0,0 +1,129 @@
+"""Multi-file decoding in a process pool.
+
+Workers decode a file into a Model, pack its arrays into one shared memory
+block and return only the block name and the layout. The main process copies
+the arrays out and frees the block, so results never go through pickle.
+
+A named block only outlives the handles on it on POSIX. On Windows it is
+destroyed when its last handle closes, so a worker could not close its own
+before the main process attaches; there the arrays come back by pickle
+instead (HANDOFF). Blocks going the other way (XBOX.Export.batch) are kept
+open by the main process, which made them, until the worker is done.
+
+Workers run through src.worker, importing this package as the top-level
+``src`` in the worker only, so they never import the addon (and with it
+``bpy``).
+"""
+from concurrent.futures import as_completed
+from multiprocessing.shared_memory import SharedMemory
+import os
+import numpy as np
+
+from .cache import ModelCache
+from .header import Selection
+from .io import decode_file
+from .model import Model, flatten, restore
+from ..worker import entry, pool
+
+ALIGN = 16
+HANDOFF = os.name != "nt"  # a worker's block survives it closing its handle
+
+
+def to_shared(arrays: dict[str, np.ndarray]) -> tuple[SharedMemory, dict]:
+	"""Copy arrays into a new shared memory block, returns it (still open) and the layout.
+
+	The caller closes it once from_shared has run on the other side, or
+	straight away where HANDOFF allows.
+	"""
+	layout = {}
+	size = 0
+	for key, value in arrays.items():
+		size = (size + ALIGN - 1) // ALIGN * ALIGN
+		layout[key] = (size, value.dtype.str, value.shape)
+		size += value.nbytes
+	shm = SharedMemory(create=True, size=max(size, 1))
+	for key, value in arrays.items():
+		offset, dtype, shape = layout[key]
+		np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)[...] = value
+	return shm, layout
+
+
+def from_shared(name: str, layout: dict) -> dict[str, np.ndarray]:
+	"""Copy arrays out of a block made by to_shared and free it."""
+	shm = SharedMemory(name=name)
+	try:
+		return {
+			key: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset).copy()
+			for key, (offset, dtype, shape) in layout.items()
+		}
+	finally:
+		shm.close()
+		shm.unlink()
+
+
+def decode_to_shared(
+	path: str,
+	magic: bytes | None = None,
+	selection: tuple | None = None,
+	cache: tuple | None = None,
+) -> tuple[dict, str | None, dict]:
+	"""Worker entry point, selection and cache come as their fields.
+
+	Returns the metadata, then the block name and layout, or None and the
+	arrays themselves where HANDOFF does not hold.
+	"""
+	selection = Selection(*selection) if selection else None
+	if cache:
+		model = ModelCache(*cache).decode(path, magic, selection)
+	else:
+		model = decode_file(path, magic, selection)
+	meta, arrays = flatten(model)
+	if not HANDOFF:
+		return meta, None, arrays
+	shm, layout = to_shared(arrays)
+	shm.close()
+	return meta, shm.name, layout
+
+
+def receive(name: str | None, payload: dict) -> dict[str, np.ndarray]:
+	"""The arrays decode_to_shared sent, by block or by value."""
+	return payload if name is None else from_shared(name, payload)
+
+
+def decode_files(
+	paths: list[str],
+	magic: bytes | None = None,
+	max_workers: int | None = None,
+	selection: Selection | None = None,
+	cache: ModelCache | None = None,
+):
+	"""Yield (path, Model or exception) as each file finishes decoding."""
+	task = entry("decode.parallel.decode_to_shared")
+	workers = min(max_workers or os.cpu_count() or 1, len(paths)) or 1
+	with pool(workers) as executor:
+		# Plain tuples only, the addon's own classes cannot be unpickled in a worker
+		fields = (selection.collections, selection.indices, selection.shaders) if selection else None
+		cached = (cache.directory, cache.max_bytes) if cache else None
+		futures = {executor.submit(task, path, magic, fields, cached): path for path in paths}
+		pending = set(futures)
+		try:
+			for future in as_completed(futures):
+				pending.discard(future)
+				path = futures[future]
+				try:
+					meta, name, payload = future.result()
+					model: Model = restore(meta, receive(name, payload))
+				except Exception as e:
+					yield path, e
+					continue
+				yield path, model
+		finally:
+			# Abandoned early, free the blocks of anything already decoded
+			for future in pending:
+				if future.cancel():
+					continue
+				try:
+					_, name, payload = future.result()
+					receive(name, payload)
+				except Exception:
+					pass
@@ -0,0 +1,92 @@
+"""POF0 relocation tables, the footer that lists every pointer field of a chunk.
+
+The footer is ``POF0``, a size word in the chunk's byte order, then one entry
+per pointer field: the distance from the previous field in 4-byte words,
+big endian in 1 (``0x40 | d``), 2 (``0x8000 | d``) or 4 (``0xC0000000 | d``)
+bytes, padded with zeroes. encode.layout.encode_pof0 writes it.
+
+The decoders follow pointers from the header as they need them. The table
+instead gives all of them at once, so a payload can be checked in one
+vectorised pass and asked which fields point at a given offset.
+"""
+from dataclasses import dataclass, field
+import numpy as np
+
+from ..globals.be import PointerError
+
+POF0 = b"POF0"
+
+
+def decode_pof0(table) -> np.ndarray:
+	"""Payload offsets of the pointer fields listed in a POF0 table (without its header), sorted."""
+	data = bytes(table)
+	deltas = []
+	i = 0
+	while i < len(data):
+		b = data[i]
+		match b >> 6:
+			case 1:
+				deltas.append(b & 0x3F)
+				i += 1
+			case 2:
+				if i + 2 > len(data):
+					raise ValueError(f"POF0: entry at +{i} is cut off")
+				deltas.append((b & 0x3F) << 8 | data[i + 1])
+				i += 2
+			case 3:
+				if i + 4 > len(data):
+					raise ValueError(f"POF0: entry at +{i} is cut off")
+				deltas.append(int.from_bytes(data[i : i + 4], "big") & 0x3FFFFFFF)
+				i += 4
+			case _:
+				break  # padding
+	if any(data[i:]):
+		raise ValueError(f"POF0: unexpected byte 0x{data[i]:02X} at +{i}")
+	return np.cumsum(np.array(deltas, dtype=np.int64) << 2)
+
+
+@dataclass(slots=True)
+class Relocations:
+	"""The pointer fields of one payload and the offsets stored in them."""
+
+	fields: np.ndarray  # payload offsets of the pointer fields, sorted
+	targets: np.ndarray  # offset stored in each field
+	length: int  # payload bytes
+	index: np.ndarray | None = field(default=None, repr=False)  # fields sorted by target, built on demand
+
+	@classmethod
+	def read(cls, payload: memoryview, fields: np.ndarray, order: str = ">") -> "Relocations":
+		"""Gather every pointer listed in fields from payload."""
+		length = len(payload)
+		bad = (fields & 3) | (fields + 4 > length)
+		if bad.any():
+			at = int(fields[np.flatnonzero(bad)[0]])
+			raise PointerError("POF0 field", at, 4, length)
+		words = np.frombuffer(payload, dtype=order + "u4", count=length // 4)
+		return cls(fields, words[fields >> 2].astype(np.int64), length)
+
+	def __len__(self) -> int:
+		return len(self.fields)
+
+	def invalid(self) -> np.ndarray:
+		"""Positions (into fields) of the pointers that reach outside the payload.
+
+		A pointer to the very end is allowed, it is where an empty stream at the
+		end of the payload starts.
+		"""
+		return np.flatnonzero(self.targets > self.length)
+
+	def validate(self):
+		"""Raise PointerError for the first pointer outside the payload."""
+		bad = self.invalid()
+		if len(bad):
+			i = int(bad[0])
+			raise PointerError(f"pointer at 0x{int(self.fields[i]):X}", int(self.targets[i]), 0, self.length)
+
+	def referrers(self, target: int) -> np.ndarray:
+		"""Offsets of the fields that point at target."""
+		if self.index is None:
+			self.index = np.argsort(self.targets, kind="stable")
+		ordered = self.targets[self.index]
+		lo, hi = np.searchsorted(ordered, target, "left"), np.searchsorted(ordered, target, "right")
+		return self.fields[np.sort(self.index[lo:hi])]
@@ -0,0 +1,259 @@
+"""PlayStation 2 ``YOBJ`` (.ymp) decoder, little endian VIF packets."""
+from struct import Struct
+import numpy as np
+
+from ..globals.be import Resolver
+from .model import Model, Skeleton, SubObject, csr, decode_name, subobject_digest
+from .xbox import axis_fix
+
+BONE_SIZE = 80
+VIF_UNPACK_WEIGHTS = 0x280
+U32 = Struct("<I")
+SUBOBJECT = Struct("<8I")
+
+
+def emit_strip_faces(strip, faces, face_materials, mat_id):
+	for t in range(len(strip) - 2):
+		if t & 1:
+			a, b, c = strip[t + 1], strip[t], strip[t + 2]
+		else:
+			a, b, c = strip[t], strip[t + 1], strip[t + 2]
+
+		if a == b or b == c or a == c:
+			continue
+
+		faces.append((a, b, c))
+		face_materials.append(mat_id)
+
+
+def decode_skeleton(r: Resolver) -> Skeleton:
+	bone_count = r.unpack(U32, 20, "bone_count")[0]
+	if bone_count <= 0:
+		empty = np.empty((0, 3), dtype=np.float32)
+		return Skeleton([], np.empty(0, dtype=np.int32), empty, empty.copy())
+	bone = r.deref(32, "bones", bone_count * BONE_SIZE)
+	raw = np.frombuffer(bone, dtype=np.uint8, count=bone_count * BONE_SIZE).reshape(-1, BONE_SIZE)
+	names = [decode_name(row[:16].tobytes(), "strict") for row in raw]
+	positions = raw[:, 16:28].copy().view("<f4").reshape(-1, 3)
+	rotations = raw[:, 32:44].copy().view("<f4").reshape(-1, 3)
+	parents = raw[:, 48:52].copy().view("<i4").ravel()
+	return Skeleton(names, parents.astype(np.int32), positions.astype(np.float32), rotations.astype(np.float32))
+
+
+def decode_textures(r: Resolver) -> list[str]:
+	count = r.unpack(U32, 24, "texture_count")[0]
+	if count <= 0:
+		return []
+	textures = r.deref(36, "textures", count * 16)
+	return [decode_name(textures[i * 16 : (i * 16) + 16].tobytes(), "strict") for i in range(count)]
+
+
+def decode_collections(r: Resolver) -> list[str]:
+	count = r.unpack(U32, 44, "object_group_count")[0]
+	object_groups = r.deref(40, "object_groups", count * 32)
+	return [decode_name(object_groups[i * 32 : (i * 32) + 16].tobytes(), "strict") for i in range(count)]
+
+
+def decode_weights(weight: memoryview) -> np.ndarray:
+	"""Every (w0, w1, w2, w3) row of the UNPACK 0x280 VIF packets from weight onwards.
+
+	Packets are found like the original byte crawler (first header at or after the
+	current offset) but candidate headers are located with one vectorised scan.
+	"""
+	view = np.frombuffer(weight, dtype=np.uint8)
+	size = len(view)
+	if size < 16:
+		return np.empty((0, 4), dtype=np.float32)
+	nonzero = np.zeros(size + 1, dtype=np.int64)
+	np.cumsum(view != 0, out=nonzero[1:])
+	starts = np.arange(size - 15)
+	headers = starts[
+		(nonzero[starts + 12] == nonzero[starts])
+		& (view[starts + 12] == (VIF_UNPACK_WEIGHTS & 0xFF))
+		& (view[starts + 13] == (VIF_UNPACK_WEIGHTS >> 8))
+	]
+
+	rows = []
+	offset = 0
+	while True:
+		i = np.searchsorted(headers, offset)
+		if i >= len(headers):
+			break
+		offset = int(headers[i])
+		elements = int(view[offset + 15]) or 256
+		offset += 16  # Skip VIF header
+		elements = min(elements, (size - offset) // 16)
+		rows.append(np.frombuffer(weight, dtype="<f4", count=elements * 4, offset=offset))
+		offset += elements * 16
+
+	if not rows:
+		return np.empty((0, 4), dtype=np.float32)
+	return np.concatenate(rows).astype(np.float32).reshape(-1, 4)
+
+
+def decode_vertex_buffer(r: Resolver, subobj: memoryview, field: str) -> tuple[np.ndarray, np.ndarray]:
+	vtx_indirect_ptr = subobj.cast("I")[0x18 // 4]
+	vtx_ptr = r.pointer(vtx_indirect_ptr, field)
+	vtx_indirect = r.view(vtx_ptr, field, 0x10)
+
+	vtx_count = vtx_indirect[0x0E]
+	size = vtx_count * 16
+	r.check(vtx_ptr, 0x20 + size * 2, field)  # positions, a VIF header, normals
+	vtx_data = vtx_indirect[0x10:]
+	verts = np.frombuffer(vtx_data, dtype="<f4", count=vtx_count * 4).reshape(-1, 4)[:, :3]
+
+	packet = vtx_data[size:]
+	norms = np.frombuffer(packet[0x10:], dtype="<f4", count=vtx_count * 4).reshape(-1, 4)[:, :3]
+	return axis_fix(verts), axis_fix(norms)
+
+
+def decode_table(stream: memoryview) -> list[int]:
+	table = stream.cast("I")
+	indices = stream[16:32].cast("i")
+
+	bone_count = table[1]
+
+	palette: list[int] = []
+	for i in range(bone_count):
+		palette.append(indices[i] - 1 if indices[i] > 0 else -1)
+
+	return palette
+
+
+def decode_primitives(r: Resolver, field, stream, count, tables, global_verts, global_norms, parsed_weights):
+	source = []
+	uvs = []
+	faces = []
+	face_materials = []
+	influences = []
+	out_vi = 0
+
+	for i in range(count):
+		strea = stream[i * 208 : (i * 208) + 208]
+		t = strea.cast("I")
+
+		INFO2 = strea[192:208].cast("I")
+		loop_count = INFO2[1]
+		loop_table = INFO2[2]
+		LOOPS = r.view(loop_table, f"{field}[{i}].loops", loop_count * 16)
+		texture_id = t[10]
+
+		for j in range(loop_count):
+			strip = []
+
+			entry = LOOPS[j * 16 : (j * 16) + 16].cast("I")
+			block_count = entry[2]
+			block_start = r.view(entry[3], f"{field}[{i}].loops[{j}]", block_count * 32)
+
+			for k in range(block_count):
+				BLOCK = block_start[k * 32 : (k * 32) + 32]
+				BI = BLOCK.cast("I")
+				BF = BLOCK.cast("f")
+				global_vi = BI[3]
+
+				if global_vi < 0 or global_vi >= len(global_verts):
+					emit_strip_faces(strip, faces, face_materials, texture_id)
+					strip.clear()
+					continue
+
+				source.append(global_vi)
+				uvs.append((BF[0], 1.0 - BF[1]))
+
+				weights = []
+				if 0 <= global_vi < len(parsed_weights):
+					real_weights = parsed_weights[global_vi]
+					palette = tables[min(k, len(tables) - 1)]
+
+					for bone, w in zip(palette, real_weights.tolist()):
+						if bone >= 0 and w > 0.0:
+							weights.append((bone, w))
+				influences.append(weights)
+
+				strip.append(out_vi)
+				out_vi += 1
+
+			emit_strip_faces(strip, faces, face_materials, texture_id)
+
+	source = np.array(source, dtype=np.int64)
+	normals = global_norms[source]
+	lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+	normals = normals / np.where(lengths > 0.0, lengths, 1.0)
+	return (
+		global_verts[source],
+		normals.astype(np.float32),
+		np.array(uvs, dtype=np.float32).reshape(-1, 2),
+		np.array(faces, dtype=np.int32).reshape(-1, 3),
+		np.array(face_materials, dtype=np.int32),
+		influences,
+	)
+
+
+def decode_subobject(r: Resolver, subobj: memoryview, index: int) -> SubObject:
+	field = f"subobjects[{index}]"
+	skin_tbl_count, uv_count, a, b, og_index, c, d, e = SUBOBJECT.unpack_from(subobj)
+	sub = subobj.cast("I")
+	skin_stream = r.view(sub[2], f"{field}.skin_tables", skin_tbl_count * 32)
+	primitive_stream = r.view(sub[3], f"{field}.primitives", uv_count * 208)
+	vertex_colour = r.view(sub[7], f"{field}.weights")
+	bounding_sphere = subobj[48:64].cast("f")
+
+	global_verts, global_norms = decode_vertex_buffer(r, subobj, f"{field}.vertices")
+	tables = [decode_table(skin_stream[t * 32 : (t * 32) + 32]) for t in range(skin_tbl_count)]
+	groups = sorted({b for table in tables for b in table if b >= 0})
+
+	# May actually be vertex weights. Research into this
+	parsed_weights = decode_weights(vertex_colour)
+	positions, normals, uvs, faces, face_materials, influences = decode_primitives(
+		r,
+		f"{field}.primitives",
+		primitive_stream,
+		uv_count,
+		tables,
+		global_verts,
+		global_norms,
+		parsed_weights,
+	)
+	weight_offsets, weight_bones, weight_values = csr(influences)
+
+	centre = axis_fix(np.array([bounding_sphere.tolist()[:3]], dtype=np.float32))[0]
+	return SubObject(
+		index=index,
+		collection=og_index,
+		positions=positions,
+		normals=normals,
+		uvs=uvs,
+		faces=faces,
+		weight_offsets=weight_offsets,
+		weight_bones=weight_bones,
+		weight_values=weight_values,
+		groups=groups,
+		centre=tuple(centre.tolist()),
+		radius=bounding_sphere[3],
+		face_materials=face_materials,
+	)
+
+
+def decode_yobj(file: memoryview, subobjects: list[int] | None = None) -> Model:
+	"""Decode a ``YOBJ`` payload (the bytes after the 8-byte chunk header).
+
+	Only the sub-objects listed in subobjects are decoded when it is given.
+	"""
+	r = Resolver(file, "<")
+	subobject_count = r.unpack(U32, 16, "subobject_count")[0]
+	subobject_ptr = r.deref(28, "subobjects", subobject_count * 64)
+	if subobjects is None:
+		subobjects = range(subobject_count)
+	subobjects = [
+		decode_subobject(r, subobject_ptr[i * 64 : (i * 64) + 64], i)
+		for i in subobjects
+		if 0 <= i < subobject_count
+	]
+	for sub in subobjects:
+		sub.digest = subobject_digest(sub)
+	return Model(
+		format="YOBJ",
+		skeleton=decode_skeleton(r),
+		collections=decode_collections(r),
+		textures=decode_textures(r),
+		subobjects=subobjects,
+	)
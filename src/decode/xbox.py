@@ -0,0 +1,288 @@
+"""Xbox 360 ``JBOY`` (.ymxen) decoder, big endian."""
+from struct import Struct, error as StructError, unpack, unpack_from
+import numpy as np
+
+from ..globals.be import PointerError, Resolver
+from .model import Material, Model, Skeleton, SubObject, csr, decode_name, subobject_digest
+
+BONE_SIZE = 80
+FVF = np.dtype([("xyz", ">f4", 3), ("normal", ">f4", 3), ("diffuse", ">u4")])  # 28 bytes
+MAGIC = 6  # triangle strip batch record
+U32 = Struct(">I")
+BATCH = Struct(">2I")  # index count, strip pointer
+PARAMETER_SIZE = {13: 16, 10: 4, 16: 4, 5: 4, 15: 4}  # material data bytes by type
+
+
+def axis_fix(v: np.ndarray) -> np.ndarray:
+	"""Engine (x, y, z) to Blender (x, z, -y), the importers' AXIS_FIX."""
+	out = np.empty(v.shape, dtype=np.float32)
+	out[:, 0] = v[:, 0]
+	out[:, 1] = v[:, 2]
+	out[:, 2] = -v[:, 1]
+	return out
+
+
+def decode_skeleton(r: Resolver) -> Skeleton:
+	bone_count: int = r.unpack(U32, 24, "bone_count")[0]
+	bone = r.deref(32, "bones", bone_count * BONE_SIZE)
+	raw = np.frombuffer(bone, dtype=np.uint8, count=bone_count * BONE_SIZE).reshape(-1, BONE_SIZE)
+	names = [decode_name(row[:16].tobytes()) for row in raw]
+	positions = raw[:, 16:28].copy().view(">f4").astype(np.float32)
+	rotations = raw[:, 32:44].copy().view(">f4").astype(np.float32)
+	parents = raw[:, 48:52].copy().view(">i4").astype(np.int32).ravel()
+	return Skeleton(names, parents, positions.reshape(-1, 3), rotations.reshape(-1, 3))
+
+
+def decode_textures(r: Resolver) -> list[str]:
+	count = r.unpack(U32, 0x1C, "texture_count")[0]
+	textures = r.deref(0x24, "textures", count * 16)
+	return [decode_name(textures[i * 16 : (i + 1) * 16].tobytes()) for i in range(count)]
+
+
+def decode_collections(r: Resolver) -> list[str]:
+	count = r.unpack(U32, 44, "object_group_count")[0]
+	object_groups = r.deref(40, "object_groups", count * 32)
+	return [decode_name(object_groups[i * 32 : (i * 32) + 16].tobytes()) for i in range(count)]
+
+
+def decode_fvf(r: Resolver, count: int, vert_offset: int, field: str):
+	packet = r.pointer(vert_offset, field)
+	fvf = np.frombuffer(r.view(packet, field, count * FVF.itemsize), dtype=FVF, count=count)
+	positions = axis_fix(fvf["xyz"])
+	normals = -axis_fix(fvf["normal"])
+	return positions, normals, fvf["diffuse"].astype(np.uint32)
+
+
+def decode_texcoord(uv: memoryview, count: int) -> np.ndarray:
+	uvs = np.frombuffer(uv, dtype=">f4", count=count * 2).astype(np.float32).reshape(-1, 2)
+	uvs[:, 1] = 1.0 - uvs[:, 1]
+	return uvs
+
+
+def strips_to_triangles(strip: np.ndarray) -> np.ndarray:
+	"""Triangle list from one strip, DX9 (LH, CW) winding flipped for Blender."""
+	if len(strip) < 3:
+		return np.empty((0, 3), dtype=np.int32)
+	a, b, c = strip[:-2], strip[1:-1], strip[2:]
+	odd = (np.arange(len(a)) & 1).astype(bool)
+	tris = np.where(odd[:, None], np.stack((a, b, c), 1), np.stack((a, c, b), 1))
+	keep = (a != b) & (b != c) & (a != c)
+	return tris[keep]
+
+
+def decode_faces(r: Resolver, batch_offset: int, field: str) -> np.ndarray:
+	faces = []
+	offset = batch_offset
+	while r.pointer(offset, field) == MAGIC:
+		face_count, face_offset = r.unpack(BATCH, offset + 4, field)
+		strip = r.view(face_offset, f"{field}[{len(faces)}]", face_count * 2)
+		strip = np.frombuffer(strip, dtype=">u2", count=face_count)
+		faces.append(strips_to_triangles(strip.astype(np.int32)))
+		offset += 12
+	if not faces:
+		return np.empty((0, 3), dtype=np.int32)
+	return np.concatenate(faces).astype(np.int32)
+
+
+def decode_weights(vertex_count: int, weights: memoryview, bones: int) -> list[list[tuple[int, float]]]:
+	MORE = 0xFF
+	offset = 0
+	vertex_weights: list[list[tuple[int, float]]] = []
+
+	for v in range(vertex_count):
+		influences: list[tuple[int, float]] = []
+
+		bone_index, weight, status = unpack_from(">IfI", weights, offset)
+		offset += 16
+
+		if 0 <= bone_index < bones and weight > 0.0:
+			influences.append((bone_index, weight))
+
+		if (status & 0xFF) == MORE:
+			while True:
+				w, idx = unpack_from(">fI", weights, offset)
+				offset += 8
+
+				if 0 <= idx < bones and w > 0.0:
+					influences.append((idx, w))
+				else:
+					break
+
+		vertex_weights.append(influences)
+
+	return vertex_weights
+
+
+def decode_material(r: Resolver, offset: int, field: str) -> Material:
+	view = r.view(offset, field, 20)
+	name = decode_name(view[:16].tobytes())
+	mat_type, mat_size = unpack_from(">2H", view, 16)
+	r.check(offset, 20 + PARAMETER_SIZE.get(mat_type, 0), field)
+	match mat_type:
+		case 13:
+			data = unpack_from(">4f", view, 20)
+		case 10:
+			data = unpack_from(">1f", view, 20)
+		case 16:
+			data = unpack_from(">i", view, 20)  # microsoft style BOOL
+		case 5:
+			data = list(unpack_from(">i", view, 20))
+			if data[0] == -1:
+				data[0] = None
+			data = tuple(data)
+		case 15:
+			data = unpack_from(">I", view, 20)
+		case _:
+			data = ()
+	return Material(name, mat_type, mat_size, data, view[20:36].tobytes(), offset)
+
+
+def decode_materials(r: Resolver, material_offset: int, count: int, field: str) -> list[Material]:
+	records = []
+	for i in range(count):
+		offset = r.pointer(material_offset + i * 4, field)
+		# Parameter records are shared between sub-objects, decode each once
+		records.append(r.cached(("material", offset), lambda: decode_material(r, offset, f"{field}[{i}]")))
+	return records
+
+
+def decode_subobject(r: Resolver, record_offset: int, index: int, use_tangents: bool) -> SubObject:
+	field = f"subobjects[{index}]"
+	record = r.view(record_offset, field, 184 if use_tangents else 180)
+	vertex_count, unk_bool, bone_count = unpack(">3I", record[:12])
+	palette = unpack(">20i", record[12:92])
+	(
+		bone_weight_count,
+		og_index,
+		unk_bool_2,
+		vert_offset,
+		weight_offset,
+		uv_offset,
+	) = unpack(">6I", record[92:116])
+	offset = 120 if use_tangents else 116
+	(
+		effect_technique_index,
+		shader_name,
+		unk_int_1,
+		unk_int_2,
+		material_count,
+		material_offset,
+		batch_offset,
+		redundant_vertex_count,
+		unk_int_3,
+		radius,
+		cx,
+		cy,
+		cz,
+	) = unpack_from(">I16s7If3f", record, offset)
+
+	positions, normals, diffuse = decode_fvf(r, vertex_count, vert_offset, f"{field}.vertices")
+	offsets = {"record": record_offset, "vertices": r.pointer(vert_offset), "uvs": uv_offset}
+	uvs = decode_texcoord(r.view(uv_offset, f"{field}.uvs", vertex_count * 8), vertex_count)
+	faces = decode_faces(r, batch_offset, f"{field}.batches")
+	materials = decode_materials(r, material_offset, material_count, f"{field}.materials")
+
+	# Vertex groups come from the 1-based palette, slot value 1 (bone 0) is never grouped
+	groups = []
+	for b in palette:
+		if b != -1 and b - 1 and (b - 1) not in groups:
+			groups.append(b - 1)
+
+	# Only influences on grouped bones survive, normalised over all of the vertex's weights
+	grouped = set(groups)
+	influences = []
+	try:
+		chains = decode_weights(vertex_count, r.view(weight_offset, f"{field}.weights", vertex_count * 16), bone_count)
+	except StructError:
+		# A chain ran past the end of the payload
+		raise PointerError(f"{field}.weights", weight_offset, vertex_count * 16, r.length) from None
+	for vertex in chains:
+		total = sum(w for _, w in vertex)
+		if total <= 0.0:
+			influences.append([])
+			continue
+		influences.append([(b, w / total) for b, w in vertex if b in grouped])
+	weight_offsets, weight_bones, weight_values = csr(influences)
+
+	centre = axis_fix(np.array([[cx, cy, cz]], dtype=np.float32))[0]
+	return SubObject(
+		index=index,
+		collection=og_index,
+		positions=positions,
+		normals=normals,
+		uvs=uvs,
+		faces=faces,
+		weight_offsets=weight_offsets,
+		weight_bones=weight_bones,
+		weight_values=weight_values,
+		groups=groups,
+		centre=tuple(centre.tolist()),
+		radius=radius,
+		shader=decode_name(shader_name),
+		technique=effect_technique_index,
+		palette=palette,
+		bone_count=bone_count,
+		diffuse=diffuse,
+		materials=materials,
+		offsets=offsets,
+	)
+
+
+def locate_subobject(r: Resolver, index: int) -> dict:
+	"""Where sub-object index lives, read from its record without decoding anything.
+
+	The offsets of its record, vertex and UV streams (as SubObject.offsets
+	holds them), its vertex count, the offsets of its parameter records and of
+	its bounding sphere (radius, then centre).
+	"""
+	use_tangents = r.unpack(U32, 0, "version")[0] == 16
+	SIZEOF = 184 if use_tangents else 180
+	tail = 120 if use_tangents else 116
+	count = r.unpack(U32, 16, "subobject_count")[0]
+	if not 0 <= index < count:
+		raise ValueError(f"no sub-object {index}, the file has {count}")
+	field = f"subobjects[{index}]"
+	record = r.pointer(20, "subobjects") + index * SIZEOF
+	r.check(record, SIZEOF, field)
+	vertex_count = r.pointer(record, field)
+	vert_offset, _, uv_offset = r.unpack(Struct(">3I"), record + 104, field)
+	material_count, material_offset = r.unpack(Struct(">2I"), record + tail + 28, field)
+	r.check(material_offset, material_count * 4, f"{field}.materials")
+	return {
+		"record": record,
+		"vertices": r.pointer(vert_offset, f"{field}.vertices"),
+		"uvs": uv_offset,
+		"count": vertex_count,
+		"parameters": [r.pointer(material_offset + i * 4) for i in range(material_count)],
+		"bounds": record + tail + 48,
+	}
+
+
+def decode_jboy(file: memoryview, subobjects: list[int] | None = None) -> Model:
+	"""Decode a ``JBOY`` payload (the bytes after the 8-byte chunk header).
+
+	Only the sub-objects listed in subobjects are decoded when it is given.
+	"""
+	r = Resolver(file, ">")
+	use_tangents = r.unpack(U32, 0, "version")[0] == 16
+	SIZEOF = 184 if use_tangents else 180
+	subobject_count = r.unpack(U32, 16, "subobject_count")[0]
+	subobject_ptr = r.pointer(20, "subobjects")
+	r.check(subobject_ptr, subobject_count * SIZEOF, "subobjects")
+	if subobjects is None:
+		subobjects = range(subobject_count)
+	subobjects = [
+		decode_subobject(r, subobject_ptr + i * SIZEOF, i, use_tangents)
+		for i in subobjects
+		if 0 <= i < subobject_count
+	]
+	for sub in subobjects:
+		sub.digest = subobject_digest(sub)
+	return Model(
+		format="JBOY",
+		skeleton=decode_skeleton(r),
+		collections=decode_collections(r),
+		textures=decode_textures(r),
+		subobjects=subobjects,
+		use_tangents=use_tangents,
+	)
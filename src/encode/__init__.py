@@ -0,0 +1 @@
+from .xbox import encode_jboy
@@ -0,0 +1,58 @@
+"""``.tex`` filepacks, the texture archives next to the Xbox models.
+
+A 16-byte header holding the entry count, 32-byte entries (``16s`` name,
+``4s`` extension, then size and offset from the start of the pack, little
+endian) and the files themselves, each starting on an ALIGN boundary. The
+importer reads them in ImportYMP_XBOX.import_tasks.
+
+Textures whose DDS bytes still hash to what was imported go back untouched.
+The others are compressed by encode.dds in a process pool, one texture per
+task, so a roster of edited textures uses every core.
+"""
+from struct import Struct
+import hashlib
+import os
+import numpy as np
+
+from ..worker import entry, pool
+from .dds import encode_dds
+from .xbox import encode_name
+
+ENTRY = Struct("<16s4s2I4x")  # name, extension, size, offset
+HEADER_SIZE = 16
+ALIGN = 16
+
+
+def texture_hash(data) -> str:
+	"""Content hash of a texture file, recorded at import to tell if it is still the same."""
+	return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def write_filepack(files: list[tuple[str, bytes]], extension: str = "dds") -> bytearray:
+	"""A filepack of (name, data) pairs, in order."""
+	offset = HEADER_SIZE + ENTRY.size * len(files)
+	offsets = []
+	for _, data in files:
+		offset += -offset % ALIGN
+		offsets.append(offset)
+		offset += len(data)
+	pack = bytearray(offset)
+	pack[0:4] = len(files).to_bytes(4, "little")
+	ext = extension.encode("ascii").ljust(4, b"\x00")
+	for i, ((name, data), start) in enumerate(zip(files, offsets)):
+		ENTRY.pack_into(pack, HEADER_SIZE + i * ENTRY.size, encode_name(name), ext, len(data), start)
+		pack[start : start + len(data)] = data
+	return pack
+
+
+def encode_texture(rgba: np.ndarray, fourcc: bytes, mips: int | None) -> bytes:
+	"""Worker entry point, one texture."""
+	return encode_dds(rgba, fourcc, mips)
+
+
+def encode_textures(jobs: list[tuple[np.ndarray, bytes, int | None]], max_workers: int | None = None) -> list[bytes]:
+	"""encode_dds for every (rgba, fourcc, mips) job, in a process pool when there are several."""
+	if len(jobs) < 2:
+		return [encode_texture(*job) for job in jobs]
+	with pool(min(max_workers or os.cpu_count() or 1, len(jobs))) as executor:
+		return list(executor.map(entry("encode.filepack.encode_texture"), *zip(*jobs)))
@@ -0,0 +1,154 @@
+"""Payload layout for the exporters.
+
+Exporters declare blocks (a stream or record, with its size and alignment),
+the fields to pack into them and which fields point at which block. plan()
+then gives every block its offset in one pass, and chunk() allocates the whole
+file once (chunk header, payload, POF0 footer) and writes everything into it
+in place: streams are encoded into their slice or copied straight from their
+buffers, fields go in through
+``Struct.pack_into`` and pointers are filled in from the plan. The pointer
+fields are known from the declarations, so the POF0 table is generated rather
+than listed by hand.
+"""
+from struct import Struct
+from typing import Callable
+import numpy as np
+
+POF0 = b"POF0"
+
+
+def encode_pof0(pointers) -> np.ndarray:
+	"""POF0 relocation table for the pointer field offsets, padded to 4 bytes.
+
+	Each entry is the distance from the previous field in 4-byte words, stored
+	big endian in 1 (``0x40 | d``), 2 (``0x8000 | d``) or 4 (``0xC0000000 | d``)
+	bytes depending on its size.
+	"""
+	offsets = np.unique(np.asarray(pointers, dtype=np.int64))
+	if len(offsets) and (offsets[0] < 0 or (offsets & 3).any()):
+		raise ValueError("POF0: pointer fields must be at non-negative, 4-byte aligned offsets")
+	delta = np.diff(offsets, prepend=0) >> 2
+	if len(delta) and delta.max() >= 1 << 30:
+		raise ValueError(f"POF0: a gap of {int(delta.max()) << 2} bytes does not fit an entry")
+	width = np.where(delta < 0x40, 1, np.where(delta < 0x4000, 2, 4))
+	code = np.where(width == 1, 0x40, np.where(width == 2, 0x8000, 0xC0000000)).astype(np.uint64) | delta.astype(np.uint64)
+	start = np.cumsum(width) - width
+	size = int(width.sum()) if len(width) else 0
+	out = np.zeros(size + (-size % 4), dtype=np.uint8)
+	for byte in range(4):
+		has = width > byte
+		shift = (8 * (width[has] - 1 - byte)).astype(np.uint64)
+		out[start[has] + byte] = (code[has] >> shift) & 0xFF
+	return out
+
+
+class Block:
+	"""A span of the payload, offset is set by Layout.plan."""
+
+	__slots__ = ("name", "size", "align", "data", "fill", "offset")
+
+	def __init__(self, name: str, size: int, align: int, data=None, fill=None):
+		self.name = name
+		self.size = size
+		self.align = align
+		self.data = data
+		self.fill = fill
+		self.offset = -1
+
+	def __repr__(self):
+		return f"Block({self.name!r}, 0x{self.offset:X}, {self.size})"
+
+
+class Layout:
+	"""Blocks, packed fields and pointer fields of one payload, in declaration order."""
+
+	def __init__(self, order: str = ">"):
+		self.order = order
+		self.word = Struct(order + "I")
+		self.blocks: list[Block] = []
+		self.names: dict[str, Block] = {}
+		self.fields: list[tuple[Block, int, Struct, tuple]] = []
+		self.links: list[tuple[Block, int, Block, int]] = []
+		self.size = -1
+
+	def add(
+		self,
+		name: str,
+		data=None,
+		size: int | None = None,
+		align: int = 16,
+		fill: Callable[[memoryview], None] | None = None,
+	) -> Block:
+		"""Declare a block holding data (bytes or an array in file byte order), or size zeroed bytes.
+
+		fill, if given, is called with the block's (zeroed) slice of the output
+		buffer to encode straight into it, so large streams never exist twice.
+		"""
+		if isinstance(data, np.ndarray):
+			data = np.ascontiguousarray(data).reshape(-1).view(np.uint8)
+		elif data is not None:
+			data = memoryview(data).cast("B")
+		if size is None:
+			size = 0 if data is None else len(data)
+		block = Block(name, size, align, data, fill)
+		self.blocks.append(block)
+		self.names[name] = block
+		self.size = -1
+		return block
+
+	def pack(self, block: Block, at: int, fmt: Struct, *values):
+		"""Pack values into block at offset at once the buffer exists."""
+		if at + fmt.size > block.size:
+			raise ValueError(f"{block.name}: field at +{at} ({fmt.size} bytes) is outside the {block.size}-byte block")
+		self.fields.append((block, at, fmt, values))
+
+	def point(self, block: Block, at: int, target: Block, add: int = 0):
+		"""The word at block + at holds the offset of target (plus add), a POF0 entry."""
+		if at + 4 > block.size or at & 3:
+			raise ValueError(f"{block.name}: pointer at +{at} is outside the block or unaligned")
+		self.links.append((block, at, target, add))
+
+	def plan(self) -> int:
+		"""Assign offsets in declaration order, returns the payload size."""
+		offset = 0
+		for block in self.blocks:
+			offset += -offset % block.align
+			block.offset = offset
+			offset += block.size
+		self.size = offset
+		return offset
+
+	def pointers(self) -> np.ndarray:
+		"""Payload offsets of every pointer field, sorted."""
+		if self.size < 0:
+			self.plan()
+		return np.sort(np.fromiter((block.offset + at for block, at, _, _ in self.links), dtype=np.int64, count=len(self.links)))
+
+	def write_into(self, buffer, base: int = 0):
+		"""Write the planned payload into buffer at base, which must hold zeroes there."""
+		if self.size < 0:
+			self.plan()
+		view = memoryview(buffer)
+		for block in self.blocks:
+			start = base + block.offset
+			if block.data is not None and block.size:
+				view[start : start + len(block.data)] = block.data
+			if block.fill is not None:
+				block.fill(view[start : start + block.size])
+		for block, at, fmt, values in self.fields:
+			fmt.pack_into(buffer, base + block.offset + at, *values)
+		for block, at, target, add in self.links:
+			self.word.pack_into(buffer, base + block.offset + at, target.offset + add)
+
+	def chunk(self, magic: bytes) -> bytearray:
+		"""The whole chunk: magic and payload size, payload, then the POF0 block."""
+		size = self.plan()
+		pof0 = encode_pof0(self.pointers())
+		header = Struct(self.order + "4sI")
+		buffer = bytearray(header.size + size + header.size + len(pof0))
+		header.pack_into(buffer, 0, magic, size)
+		self.write_into(buffer, header.size)
+		tail = header.size + size
+		header.pack_into(buffer, tail, POF0, len(pof0))
+		buffer[tail + header.size :] = pof0.data
+		return buffer
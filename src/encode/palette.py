@@ -0,0 +1,126 @@
+"""Bone palettes for export.
+
+A sub-object names at most PALETTE_SIZE bones, so a mesh skinned to more is
+split. Every triangle needs the bones of its three vertices in one palette;
+triangles are grouped by that bone set (an np.unique over padded rows), and
+the groups, in sorted order so that similar sets meet, go to the palette they
+add the fewest new bones to. Only vertices on a border between palettes are
+duplicated. The work is a few sorts over the influences and triangles plus a
+loop over the distinct bone sets, which stay few on a real rig however dense
+the mesh.
+"""
+from dataclasses import replace
+import numpy as np
+
+from ..decode.model import SubObject
+from .xbox import PALETTE_SIZE
+
+
+def gather(offsets: np.ndarray, rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+	"""CSR offsets and entry indices of the given rows of a CSR array."""
+	counts = np.diff(offsets)[rows]
+	out = np.zeros(len(rows) + 1, dtype=np.int64)
+	np.cumsum(counts, out=out[1:])
+	index = np.repeat(offsets[rows].astype(np.int64) - out[:-1], counts) + np.arange(out[-1])
+	return out, index
+
+
+def cap_influences(
+	offsets: np.ndarray, bones: np.ndarray, values: np.ndarray, cap: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+	"""The cap strongest influences of every vertex, renormalised. A cap of 0 keeps them all."""
+	counts = np.diff(offsets)
+	if not cap or counts.max(initial=0) <= cap:
+		return offsets, bones, values
+	vertex = np.repeat(np.arange(len(counts)), counts)
+	order = np.lexsort((-values, vertex))
+	rank = np.arange(len(order)) - offsets[vertex[order]]
+	keep = np.sort(order[rank < cap])  # influence order within a vertex is kept
+	vertex = vertex[keep]
+	new_offsets = np.zeros(len(counts) + 1, dtype=np.int32)
+	np.cumsum(np.bincount(vertex, minlength=len(counts)), out=new_offsets[1:])
+	kept = values[keep]
+	sums = np.bincount(vertex, weights=kept, minlength=len(counts))
+	return new_offsets, bones[keep], (kept / sums[vertex]).astype(np.float32)
+
+
+def triangle_bones(faces: np.ndarray, offsets: np.ndarray, bones: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+	"""The distinct bones of each triangle's vertices in CSR form (offsets, sorted bones)."""
+	corner_offsets, index = gather(offsets, faces.ravel())
+	corner = np.repeat(np.arange(len(faces) * 3), np.diff(corner_offsets))
+	span = int(bones.max(initial=0)) + 1
+	pairs = np.sort((corner // 3) * span + bones[index].astype(np.int64))
+	pairs = pairs[np.r_[True, pairs[1:] != pairs[:-1]]]
+	triangle = pairs // span
+	tri_offsets = np.zeros(len(faces) + 1, dtype=np.int64)
+	np.cumsum(np.bincount(triangle, minlength=len(faces)), out=tri_offsets[1:])
+	return tri_offsets, pairs % span
+
+
+def partition(faces: np.ndarray, offsets: np.ndarray, bones: np.ndarray, size: int = PALETTE_SIZE) -> tuple[np.ndarray, list[list[int]]]:
+	"""Palette of every triangle and the bones of each palette, sorted."""
+	tri_offsets, tri_bones = triangle_bones(faces, offsets, bones)
+	widths = np.diff(tri_offsets)
+	widest = int(widths.max(initial=0))
+	if widest > size:
+		raise ValueError(f"a triangle is skinned to {widest} bones, a palette holds {size}; cap the influences per vertex")
+
+	# One padded row per triangle, np.unique sorts and groups the bone sets
+	rows = np.full((len(faces), max(widest, 1)), -1, dtype=np.int64)
+	triangle = np.repeat(np.arange(len(faces)), widths)
+	rows[triangle, np.arange(len(tri_bones)) - tri_offsets[triangle]] = tri_bones
+	sets, inverse = np.unique(rows, axis=0, return_inverse=True)
+
+	palettes: list[set[int]] = []
+	owner = np.empty(len(sets), dtype=np.int64)
+	for g, row in enumerate(sets.tolist()):
+		need = {b for b in row if b >= 0}
+		best, added = -1, size + 1
+		for p, have in enumerate(palettes):
+			grow = len(need - have)
+			if grow < added and len(have) + grow <= size:
+				best, added = p, grow
+				if not grow:
+					break
+		if best < 0:
+			best = len(palettes)
+			palettes.append(set())
+		palettes[best] |= need
+		owner[g] = best
+	return owner[inverse.ravel()], [sorted(p) for p in palettes]
+
+
+def split_subobject(sub: SubObject, size: int = PALETTE_SIZE, cap: int = 0) -> list[SubObject]:
+	"""sub with at most cap influences per vertex, split into sub-objects of at most size bones.
+
+	Each part keeps the bounding sphere of the whole, which holds it.
+	"""
+	offsets, bones, values = cap_influences(sub.weight_offsets, sub.weight_bones, sub.weight_values, cap)
+	if len(np.unique(bones)) <= size:
+		return [replace(sub, weight_offsets=offsets, weight_bones=bones, weight_values=values)]
+
+	faces = np.asarray(sub.faces, dtype=np.int64)
+	part_of, palettes = partition(faces, offsets, bones, size)
+	parts = []
+	for part, palette in enumerate(palettes):
+		triangles = np.flatnonzero(part_of == part)
+		used, local = np.unique(faces[triangles], return_inverse=True)
+		weight_offsets, index = gather(offsets, used)
+		parts.append(
+			replace(
+				sub,
+				positions=sub.positions[used],
+				normals=sub.normals[used],
+				uvs=sub.uvs[used],
+				faces=local.reshape(-1, 3).astype(np.int32),
+				weight_offsets=weight_offsets.astype(np.int32),
+				weight_bones=bones[index],
+				weight_values=values[index],
+				palette=tuple(b + 1 for b in palette),
+				diffuse=None if sub.diffuse is None else sub.diffuse[used],
+				face_materials=None if sub.face_materials is None else sub.face_materials[triangles],
+				materials=list(sub.materials),
+				offsets={},
+			)
+		)
+	return parts
@@ -0,0 +1,169 @@
+"""In-place patches of an existing ``JBOY`` (.ymxen) file.
+
+Edits that keep the structure (vertex positions, normals and colours, UVs,
+parameter values, which texture a parameter names) need nothing re-encoded.
+The file the model was imported from is copied and mapped, only the spans
+whose bytes changed are written, and the copy replaces the target only once
+every edit went in. Everything else stays byte for byte, including fields
+the exporter does not model, and the cost is that of the edited streams
+rather than of the whole model.
+
+Offsets come from SubObject.offsets as remembered at import and are checked
+against the file's own pointers before anything is written.
+"""
+import mmap
+import os
+import shutil
+import tempfile
+import traceback
+from struct import Struct
+import numpy as np
+
+from ..decode.model import decode_name
+from ..decode.xbox import FVF, PARAMETER_SIZE, decode_textures, locate_subobject
+from ..globals.be import Resolver
+from .xbox import unfix
+
+CHUNK_HEADER = 8
+BOUNDS = Struct(">4f")  # radius, centre
+NORMAL_TOLERANCE = 1e-4  # normals and UVs closer than this to the stored ones are left alone
+UV_TOLERANCE = 1e-6
+
+
+def keep_close(stored: np.ndarray, new: np.ndarray, tolerance: float) -> np.ndarray:
+	"""new, with the rows that only differ from stored by rounding put back to stored."""
+	close = (np.abs(new - stored) <= tolerance).all(axis=1)
+	return np.where(close[:, None], stored, new)
+
+
+class Patcher:
+	"""A copy of source mapped for writing, which replaces target once closed without an error.
+
+	The copy sits next to target, so nothing is written to target (which may
+	be source itself) unless every edit went in.
+	"""
+
+	def __init__(self, source: str, target: str):
+		self.target = target
+		fd, self.path = tempfile.mkstemp(prefix=os.path.basename(target) + ".", suffix=".tmp", dir=os.path.dirname(os.path.abspath(target)))
+		os.close(fd)
+		self.r = self.payload = self.map = None
+		self.file = None
+		try:
+			shutil.copy(source, self.path)
+			self.file = open(self.path, "r+b")
+			try:
+				self.map = mmap.mmap(self.file.fileno(), 0)
+			except ValueError:
+				raise ValueError(f"{source}: empty file") from None
+			with memoryview(self.map) as view:
+				if view[:4].tobytes() != b"JBOY":
+					raise ValueError(f"{source}: not a JBOY file")
+				self.payload = view[CHUNK_HEADER : CHUNK_HEADER + int.from_bytes(view[4:8], "big")]
+			self.r = Resolver(self.payload, ">")
+			self.textures = decode_textures(self.r)
+		except BaseException as e:
+			self.close(e.__traceback__)
+			raise
+		self.spans = 0  # spans written
+		self.changed = 0  # bytes that differ from before
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc, tb):
+		self.close(tb)
+
+	def close(self, tb=None):
+		"""Unmap the copy and move it over target, or with the traceback of a failure, delete it."""
+		if self.path is None:
+			return
+		if tb is not None:
+			# The failed calls' frames still hold views of the map, which must go before it closes
+			traceback.clear_frames(tb)
+		self.r = self.payload = None
+		keep = tb is None
+		try:
+			if self.map is not None:
+				if keep:
+					self.map.flush()
+				self.map.close()
+		except BaseException:
+			keep = False
+			raise
+		finally:
+			if self.file is not None:
+				self.file.close()
+			path, self.path = self.path, None
+			if keep:
+				os.replace(path, self.target)
+			else:
+				os.remove(path)
+
+	def update(self, offset: int, data) -> bool:
+		"""Write data at payload offset unless it is already there, returns whether it was written."""
+		new = np.ascontiguousarray(data).reshape(-1).view(np.uint8) if isinstance(data, np.ndarray) else np.frombuffer(data, np.uint8)
+		self.r.check(offset, len(new), "patch")
+		stored = np.frombuffer(self.payload, np.uint8, len(new), offset)
+		differ = int(np.count_nonzero(stored != new))
+		if not differ:
+			return False
+		stored[:] = new
+		self.spans += 1
+		self.changed += differ
+		return True
+
+	def locate(self, index: int, remembered: dict) -> dict:
+		"""Where sub-object index is, checked against the offsets remembered at import."""
+		found = locate_subobject(self.r, index)
+		for key, value in remembered.items():
+			if key in found and found[key] != (list(value) if key == "parameters" else value):
+				raise ValueError(f"sub-object {index}: {key} has moved since import, export the file in full")
+		return found
+
+	def check_count(self, where: dict, count: int):
+		if count != where["count"]:
+			raise ValueError(f"{count} vertices where the file has {where['count']}, a patch cannot add or remove any")
+
+	def vertices(self, where: dict, positions: np.ndarray, normals: np.ndarray, diffuse: np.ndarray | None = None) -> bool:
+		"""Positions, normals and (if given) colours in Blender's axes, as decode.xbox.decode_fvf returns them."""
+		self.check_count(where, len(positions))
+		stored = np.frombuffer(self.payload, FVF, where["count"], where["vertices"])
+		fvf = stored.copy()
+		fvf["xyz"] = unfix(positions)
+		fvf["normal"] = keep_close(stored["normal"].astype(np.float32), -unfix(normals), NORMAL_TOLERANCE)
+		if diffuse is not None:
+			fvf["diffuse"] = diffuse
+		return self.update(where["vertices"], fvf)
+
+	def uvs(self, where: dict, uvs: np.ndarray) -> bool:
+		self.check_count(where, len(uvs))
+		stored = np.frombuffer(self.payload, ">f4", where["count"] * 2, where["uvs"]).reshape(-1, 2).astype(np.float32)
+		new = np.stack((uvs[:, 0], 1.0 - uvs[:, 1]), 1)
+		return self.update(where["uvs"], keep_close(stored, new, UV_TOLERANCE).astype(">f4"))
+
+	def bounds(self, where: dict, positions: np.ndarray) -> bool:
+		"""Grow the bounding sphere to hold positions, its centre stays put."""
+		radius, *centre = BOUNDS.unpack_from(self.payload, where["bounds"])
+		if not len(positions):
+			return False
+		reach = float(np.linalg.norm(unfix(positions) - np.array(centre, dtype=np.float32), axis=1).max())
+		if reach <= radius:
+			return False
+		return self.update(where["bounds"], BOUNDS.pack(reach, *centre))
+
+	def parameters(self, where: dict, records: list[bytes]) -> int:
+		"""36-byte parameter records in table order, only their data is written. Returns how many changed."""
+		offsets = where["parameters"]
+		if len(records) != len(offsets):
+			raise ValueError(f"{len(records)} parameters where the file has {len(offsets)}, export the file in full")
+		changed = 0
+		for offset, record in zip(offsets, records):
+			stored = self.payload[offset : offset + 20].tobytes()
+			name = decode_name(record[:16])
+			if decode_name(stored[:16]) != name or stored[16:20] != record[16:20]:
+				raise ValueError(f"parameter {name} does not match the file, export the file in full")
+			# Records in the game's files are only as long as their data, nothing past it is ours
+			size = PARAMETER_SIZE.get(int.from_bytes(record[16:18], "big"), 0)
+			changed += self.update(offset + 20, record[20 : 20 + size])
+		return changed
@@ -0,0 +1,89 @@
+"""Bone tables from rest matrices, for the whole skeleton at once.
+
+The file stores every bone as a translation and an Euler ZYX rotation
+relative to its parent; roots are relative to the model and carry the axis
+change. Both steps are stacked matrix products here, so a skeleton costs a
+handful of NumPy calls however many bones it has.
+
+The importer builds bones from heads, tails and a roll, which does not give
+back the file's angles exactly, so keep_imported writes the imported values
+again for the bones that have not moved.
+"""
+import numpy as np
+
+
+def euler_zyx(rot: np.ndarray) -> np.ndarray:
+	"""(n, 3) X, Y, Z angles of (n, 3, 3) rotations, as mathutils ``to_euler('ZYX')`` gives them.
+
+	'ZYX' applies Z first, so each matrix is Rx @ Ry @ Rz. Of the two angle
+	sets that make a matrix, the one with the smaller sum of magnitudes is
+	returned, which is the choice mathutils makes.
+	"""
+	cy = np.hypot(rot[:, 0, 0], rot[:, 0, 1])
+	gimbal = cy <= 16 * np.finfo(np.float32).eps
+	first = np.stack(
+		(
+			np.where(gimbal, np.arctan2(rot[:, 2, 1], rot[:, 1, 1]), np.arctan2(-rot[:, 1, 2], rot[:, 2, 2])),
+			np.arctan2(rot[:, 0, 2], cy),
+			np.where(gimbal, 0.0, np.arctan2(-rot[:, 0, 1], rot[:, 0, 0])),
+		),
+		-1,
+	)
+	second = np.stack(
+		(
+			np.where(gimbal, first[:, 0], np.arctan2(rot[:, 1, 2], -rot[:, 2, 2])),
+			np.arctan2(rot[:, 0, 2], -cy),
+			np.where(gimbal, 0.0, np.arctan2(rot[:, 0, 1], -rot[:, 0, 0])),
+		),
+		-1,
+	)
+	pick = np.abs(second).sum(1) < np.abs(first).sum(1)
+	return np.where(pick[:, None], second, first).astype(np.float32)
+
+
+def bone_table(matrices: np.ndarray, parents: np.ndarray, root: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+	"""Positions and Euler ZYX rotations of bones relative to their parents.
+
+	matrices are (n, 4, 4) rest matrices in armature space, parents the index
+	of each bone's parent or -1, and root the matrix roots are put through.
+	Rotations are read off the normalised axes, so scale does not leak in.
+	"""
+	parents = np.asarray(parents)
+	has_parent = parents >= 0
+	inverse = np.linalg.inv(matrices)
+	parent_inverse = np.where(has_parent[:, None, None], inverse[np.maximum(parents, 0)], np.identity(4))
+	local = parent_inverse @ matrices
+	if root is not None:
+		local[~has_parent] = root @ local[~has_parent]
+	rot = local[:, :3, :3]
+	rot = rot / np.maximum(np.linalg.norm(rot, axis=1, keepdims=True), 1e-12)
+	return local[:, :3, 3].astype(np.float32), euler_zyx(rot)
+
+
+def keep_imported(
+	positions: np.ndarray,
+	rotations: np.ndarray,
+	matrices: np.ndarray,
+	parents: np.ndarray,
+	imported: dict[str, np.ndarray],
+	tolerance: float = 1e-5,
+) -> int:
+	"""Put the imported rows back into positions and rotations (from bone_table) where nothing changed.
+
+	imported holds the ``parents``, ``positions`` and ``rotations`` the bones
+	were built from and the ``matrices`` they had then. A bone is unchanged
+	when it has the same parent and neither its matrix nor its parent's has
+	moved by more than tolerance, relative (absolute near zero). Roots are
+	always computed when ``keep_roots`` is False. Returns how many rows were
+	put back.
+	"""
+	parents = np.asarray(parents)
+	if len(imported["parents"]) != len(parents):
+		return 0
+	moved = ~np.isclose(matrices, imported["matrices"], rtol=tolerance, atol=tolerance).reshape(len(parents), -1).all(1)
+	keep = (parents == imported["parents"]) & ~moved & ~np.where(parents >= 0, moved[np.maximum(parents, 0)], False)
+	if not imported.get("keep_roots", True):
+		keep &= parents >= 0
+	positions[keep] = imported["positions"][keep]
+	rotations[keep] = imported["rotations"][keep]
+	return int(keep.sum())
@@ -0,0 +1,288 @@
+"""Xbox 360 ``JBOY`` (.ymxen) encoder, the inverse of decode.xbox.
+
+Takes the same decode.model types the decoders produce (Blender axes, V
+flipped) and declares a big endian payload on a layout.Layout. Every stream
+is encoded with NumPy straight into its slice of the output buffer, in the
+file's byte order, nothing is packed per vertex.
+"""
+from struct import Struct, pack, unpack_from
+import hashlib
+import numpy as np
+
+from ..decode.model import Material, Model, Skeleton, SubObject, decode_name
+from ..decode.xbox import FVF, MAGIC
+from .layout import Block, Layout
+from .strips import StripStats, strip_stats, stripify
+
+U32 = Struct(">I")
+HEADER_SIZE = 0x40
+SUBOBJECT_SIZE = 180  # without the tangent pointer, use_tangents is never written
+PALETTE_SIZE = 20
+BONE = np.dtype(
+	[
+		("name", "S16"),
+		("position", ">f4", 4),
+		("rotation", ">f4", 4),
+		("parent", ">i4", 4),
+		("pad", ">f4", 4),
+	]
+)  # 80 bytes, the exporter's ymxenBone
+PARAMETER = Struct(">16s2H16s")  # name, type, size, data
+NO_BONE = 0xFFFFFFFF
+MORE = 0xFF
+
+
+def encode_name(name: str, size: int = 16) -> bytes:
+	return name.encode("shift_jis", errors="replace")[:size].ljust(size, b"\x00")
+
+
+def unfix(v: np.ndarray) -> np.ndarray:
+	"""Blender (x, y, z) back to engine (x, -z, y), undoing decode.xbox.axis_fix."""
+	out = np.empty(v.shape, dtype=np.float32)
+	out[:, 0] = v[:, 0]
+	out[:, 1] = -v[:, 2]
+	out[:, 2] = v[:, 1]
+	return out
+
+
+def encode_skeleton(skeleton: Skeleton) -> np.ndarray:
+	records = np.zeros(len(skeleton), dtype=BONE)
+	records["name"] = [encode_name(n) for n in skeleton.names]
+	records["position"][:, :3] = skeleton.positions
+	records["rotation"][:, :3] = skeleton.rotations
+	records["parent"][:, 0] = skeleton.parents
+	return records
+
+
+def encode_fvf(positions: np.ndarray, normals: np.ndarray, diffuse: np.ndarray | None, out: np.ndarray | None = None) -> np.ndarray:
+	fvf = np.empty(len(positions), dtype=FVF) if out is None else out
+	fvf["xyz"] = unfix(positions)
+	fvf["normal"] = -unfix(normals)
+	fvf["diffuse"] = 0xFFFFFFFF if diffuse is None else diffuse
+	return fvf
+
+
+def encode_texcoord(uvs: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+	if out is None:
+		out = np.empty(uvs.shape, dtype=">f4")
+	out[:, 0] = uvs[:, 0]
+	out[:, 1] = 1.0 - uvs[:, 1]
+	return out
+
+
+def triangles_to_strip(faces: np.ndarray) -> np.ndarray:
+	"""One strip for a triangle list, each triangle stitched on with degenerates.
+
+	Every triangle takes six indices (x, x, y, z, z, z) so that it starts on an
+	odd strip position, which decode.xbox.strips_to_triangles reads back in
+	Blender's winding. Exact for any triangle order but six times the indices
+	of a real strip, the baseline strips.stripify is measured against.
+	"""
+	if not len(faces):
+		return np.empty(0, dtype=">u2")
+	if faces.max() > 0xFFFF:
+		raise ValueError(f"{int(faces.max()) + 1} vertices, strip indices are 16 bit")
+	x, y, z = faces[:, 0], faces[:, 1], faces[:, 2]
+	return np.stack((x, x, y, z, z, z), 1).ravel().astype(">u2")
+
+
+def chain_starts(offsets: np.ndarray) -> np.ndarray:
+	"""Start of each vertex's weight chain in 32-bit words, plus the total at the end."""
+	counts = np.diff(offsets).astype(np.int64)
+	starts = np.zeros(len(counts) + 1, dtype=np.int64)
+	np.cumsum(4 + np.where(counts > 1, 2 * counts, 0), out=starts[1:])
+	return starts
+
+
+def encode_weights(offsets: np.ndarray, bones: np.ndarray, values: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+	"""Weight chains from CSR influences, into out (zeroed ``>u4`` words) if given.
+
+	Each vertex is a 16-byte ``>IfI`` record (bone, weight, status) for its first
+	influence. With more than one, status is 0xFF and ``>fI`` pairs (weight, bone)
+	follow, closed by a pair naming no bone. A vertex without influences is
+	bound fully to bone 0.
+	"""
+	counts = np.diff(offsets).astype(np.int64)
+	vertex_count = len(counts)
+	chained = counts > 1
+	starts = chain_starts(offsets)
+	if out is None:
+		out = np.zeros(int(starts[-1]), dtype=">u4")
+	values = np.ascontiguousarray(values, dtype=np.float32).view(np.uint32)
+
+	has = counts > 0
+	head = starts[:-1]
+	first = offsets[:-1].astype(np.int64)
+	out[head] = np.where(has, bones[np.minimum(first, len(bones) - 1)] if len(bones) else 0, 0)
+	out[head + 1] = np.where(has, values[np.minimum(first, len(values) - 1)] if len(values) else 0, 0x3F800000)
+	out[head + 2] = np.where(chained, MORE, 0)
+
+	# Influence k of vertex v (k >= 1) goes to pair k - 1 after the record
+	vertex = np.repeat(np.arange(vertex_count), counts)
+	k = np.arange(len(bones)) - first[vertex]
+	rest = k > 0
+	pair = head[vertex[rest]] + 4 + 2 * (k[rest] - 1)
+	out[pair] = values[rest]
+	out[pair + 1] = bones[rest]
+	end = head[chained] + 4 + 2 * (counts[chained] - 1)
+	out[end + 1] = NO_BONE  # weight 0.0, no bone
+	return out
+
+
+def encode_parameter(material: Material) -> bytes:
+	return PARAMETER.pack(encode_name(material.name), material.type, material.size, material.raw[:16].ljust(16, b"\x00"))
+
+
+def set_parameter(record: bytes, value) -> bytes:
+	"""A 36-byte parameter record with its data replaced by value, packed as its type reads it."""
+	mat_type = unpack_from(">H", record, 16)[0]
+	match mat_type:
+		case 13:
+			data = pack(">4f", *value)
+		case 10:
+			data = pack(">f", value)
+		case 16 | 5:
+			data = pack(">i", int(value))
+		case 15:
+			data = pack(">I", int(value))
+		case _:
+			raise ValueError(f"{decode_name(record[:16])}: cannot set a type {mat_type} parameter")
+	return record[:20] + data + record[20 + len(data) : 36]
+
+
+def palette_of(sub: SubObject) -> tuple[int, ...]:
+	"""The 1-based bone palette, taken from sub.palette or else from the bones the weights use."""
+	palette = [b for b in sub.palette if b != -1]
+	if not palette:
+		bones, first = np.unique(sub.weight_bones, return_index=True)
+		palette = (bones[np.argsort(first)] + 1).tolist()
+	if len(palette) > PALETTE_SIZE:
+		raise ValueError(f"sub-object {sub.index}: {len(palette)} bones, a palette holds {PALETTE_SIZE}")
+	return tuple(palette) + (-1,) * (PALETTE_SIZE - len(palette))
+
+
+RECORD_HEAD = Struct(">3I20i")  # vertex count, flag, bone count, palette
+RECORD_GROUP = Struct(">3I")  # weight count, object group, flag
+RECORD_SHADER = Struct(">I16s3I")  # technique, shader, two unknowns, material count
+RECORD_BOUNDS = Struct(">2If3f")  # two unknowns, radius, centre
+BATCH = Struct(">3I")  # MAGIC, index count, strip pointer
+
+
+def strip_key(sub: SubObject, strip_length: int | None = None) -> bytes:
+	"""What the strip of sub depends on, its faces, vertex count and strip length, hashed."""
+	h = hashlib.blake2b(digest_size=16)
+	h.update(len(sub.positions).to_bytes(4, "little"))
+	h.update((strip_length or 0).to_bytes(4, "little"))
+	h.update(np.ascontiguousarray(sub.faces, dtype=np.int32).tobytes())
+	return h.digest()
+
+
+def encode_subobject(
+	layout: Layout,
+	sub: SubObject,
+	records: Block,
+	index: int,
+	bone_count: int,
+	parameters: dict[bytes, Block],
+	strips: dict[bytes, np.ndarray] | None = None,
+	strip_length: int | None = None,
+) -> np.ndarray:
+	"""Declare the streams of sub and fill in record index of records, returns the strip.
+
+	strips memoises stripify by strip_key, callers exporting the same meshes
+	again keep it between calls. strip_length is stripify's max_length.
+	"""
+	name = f"subobjects[{index}]"
+	vertex_count = len(sub.positions)
+	palette = palette_of(sub)
+	centre = unfix(np.array([sub.centre], dtype=np.float32))[0]
+	record = index * SUBOBJECT_SIZE
+	tail = record + 116
+
+	# The big streams are encoded into the output buffer when it is written
+	fvf = layout.add(
+		f"{name}.vertices",
+		size=vertex_count * FVF.itemsize,
+		fill=lambda view: encode_fvf(sub.positions, sub.normals, sub.diffuse, np.frombuffer(view, FVF)),
+	)
+	packet = layout.add(f"{name}.packet", size=4, align=4)  # the record points at a pointer to the packet
+	layout.point(packet, 0, fvf)
+	weights = layout.add(
+		f"{name}.weights",
+		size=4 * int(chain_starts(sub.weight_offsets)[-1]),
+		fill=lambda view: encode_weights(sub.weight_offsets, sub.weight_bones, sub.weight_values, np.frombuffer(view, ">u4")),
+	)
+	uvs = layout.add(
+		f"{name}.uvs",
+		size=vertex_count * 8,
+		fill=lambda view: encode_texcoord(sub.uvs, np.frombuffer(view, ">f4").reshape(-1, 2)),
+	)
+
+	if strips is None:
+		strip = stripify(sub.faces, vertex_count, max_length=strip_length)
+	else:
+		key = strip_key(sub, strip_length)
+		strip = strips.get(key)
+		if strip is None:
+			strip = strips[key] = stripify(sub.faces, vertex_count, max_length=strip_length)
+	indices = layout.add(f"{name}.strip", strip, align=4)
+	batch = layout.add(f"{name}.batches", size=BATCH.size + 4, align=4)  # one record, then a word that is not MAGIC
+	layout.pack(batch, 0, BATCH, MAGIC, len(strip), 0)
+	layout.point(batch, 8, indices)
+
+	table = layout.add(f"{name}.materials", size=4 * len(sub.materials), align=4)
+	for i, material in enumerate(sub.materials):
+		raw = encode_parameter(material)
+		target = parameters.get(raw)
+		if target is None:
+			# Identical records are shared, as they are in the game's files
+			target = parameters[raw] = layout.add(f"parameters[{len(parameters)}]", raw, align=4)
+		layout.point(table, 4 * i, target)
+
+	layout.pack(records, record, RECORD_HEAD, vertex_count, 0, sub.bone_count or bone_count, *palette)
+	layout.pack(records, record + 92, RECORD_GROUP, len(sub.weight_bones), sub.collection, 0)
+	layout.point(records, record + 104, packet)
+	layout.point(records, record + 108, weights)
+	layout.point(records, record + 112, uvs)
+	layout.pack(records, tail, RECORD_SHADER, sub.technique, encode_name(sub.shader), 0, 0, len(sub.materials))
+	layout.point(records, tail + 32, table)
+	layout.point(records, tail + 36, batch)
+	layout.pack(records, tail + 40, RECORD_BOUNDS, 0, 0, sub.radius, *centre)
+	return strip
+
+
+def encode_jboy(
+	model: Model,
+	stats: list[StripStats] | None = None,
+	strips: dict[bytes, np.ndarray] | None = None,
+	strip_length: int | None = None,
+) -> Layout:
+	"""Declare a ``JBOY`` payload, Layout.chunk(b"JBOY") writes the file.
+
+	Sub-objects are written in model order, each with its collection and
+	materials as given; their index fields are ignored. The strip metrics of
+	each sub-object are appended to stats when it is given, strips and
+	strip_length are as for encode_subobject.
+	"""
+	layout = Layout(">")
+	header = layout.add("header", size=HEADER_SIZE)
+	bone_count = len(model.skeleton)
+	bones = layout.add("bones", encode_skeleton(model.skeleton))
+	textures = layout.add("textures", b"".join(encode_name(t) for t in model.textures))
+	groups = layout.add("object_groups", b"".join(encode_name(c).ljust(32, b"\x00") for c in model.collections))
+	records = layout.add("subobjects", size=SUBOBJECT_SIZE * len(model.subobjects))
+
+	layout.pack(header, 0, Struct(">I12xI"), 0, len(model.subobjects))
+	layout.pack(header, 24, Struct(">2I"), bone_count, len(model.textures))
+	layout.pack(header, 44, U32, len(model.collections))
+	layout.point(header, 20, records)
+	layout.point(header, 32, bones)
+	layout.point(header, 36, textures)
+	layout.point(header, 40, groups)
+
+	parameters: dict[bytes, Block] = {}
+	for i, sub in enumerate(model.subobjects):
+		strip = encode_subobject(layout, sub, records, i, bone_count, parameters, strips, strip_length)
+		if stats is not None:
+			stats.append(strip_stats(strip))
+	return layout
@@ -1,11 +1,77 @@
+from struct import Struct
+
+
+class PointerError(ValueError):
+	"""A pointer or record reaching outside the payload, field is where it was read from."""
+
+	def __init__(self, field: str, pointer: int, size: int, length: int):
+		self.field = field
+		self.pointer = pointer
+		self.size = size
+		self.length = length
+		super().__init__(
+			f"{field or 'pointer'}: 0x{pointer:X} (+{size} bytes) is outside the 0x{length:X}-byte payload"
+		)
+
+	def __reduce__(self):
+		# Pool workers send these back pickled
+		return PointerError, (self.field, self.pointer, self.size, self.length)
+
+
+class Resolver:
+	"""Pointer dereferencing for one payload.
+
+	Pointers are offsets from the start of the payload. The byte view is made once,
+	every target is range checked, and views of targets are memoised since the same
+	records (material tables, shared strips) are reached from many sub-objects.
+	"""
+
+	def __init__(self, view: memoryview, order: str = ">"):
+		self.bytes = view.cast("B") if view.format != "B" else view
+		self.length = len(self.bytes)
+		self.order = order
+		self.word = Struct(order + "I")
+		self.views: dict[int, memoryview] = {}
+		self.memo: dict = {}
+
+	def check(self, pointer: int, size: int, field: str):
+		if pointer < 0 or pointer + size > self.length:
+			raise PointerError(field, pointer, size, self.length)
+
+	def unpack(self, fmt: Struct, offset: int, field: str = "") -> tuple:
+		"""fmt (a Struct) at offset, range checked."""
+		self.check(offset, fmt.size, field)
+		return fmt.unpack_from(self.bytes, offset)
+
+	def pointer(self, offset: int, field: str = "") -> int:
+		"""The pointer stored at offset."""
+		self.check(offset, 4, field)
+		return self.word.unpack_from(self.bytes, offset)[0]
+
+	def view(self, pointer: int, field: str = "", size: int = 0) -> memoryview:
+		"""Everything from pointer on, at least size bytes of it must be in the payload."""
+		self.check(pointer, size, field)
+		view = self.views.get(pointer)
+		if view is None:
+			view = self.views[pointer] = self.bytes[pointer:]
+		return view
+
+	def deref(self, offset: int, field: str = "", size: int = 0) -> memoryview:
+		"""view() of the pointer stored at offset."""
+		return self.view(self.pointer(offset, field), field, size)
+
+	def cached(self, key, build):
+		"""build() once per key, for records reached from several places."""
+		try:
+			return self.memo[key]
+		except KeyError:
+			value = self.memo[key] = build()
+			return value
 
-from struct import unpack
 
 def get_view(view: memoryview, offset: int):
-	v = view.cast('B')
-	pointer = unpack('>I', view[offset:offset+4])[0]
-	return v[pointer:]
+	return Resolver(view).deref(offset)
+
 
 def resolve_view(view: memoryview, pointer: int):
-	v = view.cast('B')
-	return v[pointer:]
\ No newline at end of file
+	return Resolver(view).view(pointer)
@@ -0,0 +1,279 @@
+import bpy
+import numpy as np
+from mathutils import Matrix, Vector
+
+# Models whose sub-objects take part in the visibility pass
+_MODELS: list["SphereBVH"] = []
+_TIMER_INTERVAL = 0.25
+_cull_settings = {"mode": "BOUNDS", "distance": 0.0}
+
+
+class SphereBVH:
+	"""Bounding volume hierarchy over the per sub-object bounding spheres of one model.
+
+	Spheres are stored in the armature's space, the same space the importers place
+	the ``ySphere_NN`` empties in, and moved to world space on each query.
+	"""
+
+	LEAF_SIZE = 4
+
+	def __init__(self):
+		self.objects: list[bpy.types.Object] = []
+		self._centres: list[tuple[float, float, float]] = []
+		self._radii: list[float] = []
+		self.owner: bpy.types.Object | None = None
+
+	def add(self, obj: bpy.types.Object, centre: Vector, radius: float):
+		self.objects.append(obj)
+		self._centres.append(tuple(centre))
+		self._radii.append(float(radius))
+
+	def build(self, owner: bpy.types.Object | None = None):
+		self.owner = owner
+		self.centres = np.array(self._centres, dtype=np.float32).reshape(-1, 3)
+		self.radii = np.array(self._radii, dtype=np.float32)
+		count = len(self.radii)
+
+		# Flat node arrays, children of a node are (left, right), leaves have left == -1
+		self.order = np.arange(count, dtype=np.int32)
+		self.node_min: list[np.ndarray] = []
+		self.node_max: list[np.ndarray] = []
+		self.node_left: list[int] = []
+		self.node_right: list[int] = []
+		self.node_start: list[int] = []
+		self.node_count: list[int] = []
+		if count:
+			self._split(0, count)
+		self.node_min = np.array(self.node_min, dtype=np.float32).reshape(-1, 3)
+		self.node_max = np.array(self.node_max, dtype=np.float32).reshape(-1, 3)
+		return self
+
+	def _split(self, start: int, end: int) -> int:
+		idx = self.order[start:end]
+		lo = (self.centres[idx] - self.radii[idx, None]).min(axis=0)
+		hi = (self.centres[idx] + self.radii[idx, None]).max(axis=0)
+		node = len(self.node_left)
+		self.node_min.append(lo)
+		self.node_max.append(hi)
+		self.node_left.append(-1)
+		self.node_right.append(-1)
+		self.node_start.append(start)
+		self.node_count.append(end - start)
+		if end - start <= SphereBVH.LEAF_SIZE:
+			return node
+
+		axis = int(np.argmax(hi - lo))
+		keys = self.centres[idx, axis]
+		self.order[start:end] = idx[np.argsort(keys, kind="stable")]
+		mid = (start + end) // 2
+		self.node_left[node] = self._split(start, mid)
+		self.node_right[node] = self._split(mid, end)
+		return node
+
+	def world(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, float]:
+		"""Node boxes and spheres moved into world space."""
+		mat = self.owner.matrix_world if self.owner else Matrix.Identity(4)
+		m = np.array(mat, dtype=np.float32)
+		scale = max(mat.to_scale()) if self.owner else 1.0
+
+		def move(p):
+			return p @ m[:3, :3].T + m[:3, 3]
+
+		centres = move(self.centres)
+		radii = self.radii * scale
+		# Transform box corners conservatively: centre and half extents
+		box_c = move((self.node_min + self.node_max) * 0.5)
+		box_e = ((self.node_max - self.node_min) * 0.5) @ np.abs(m[:3, :3]).T
+		return centres, radii, box_c - box_e, box_c + box_e, scale
+
+	def visible(self, planes: np.ndarray | None = None, origin=None, distance: float = 0.0) -> np.ndarray:
+		"""Mask of sub-objects intersecting the frustum planes and/or within distance of origin."""
+		count = len(self.objects)
+		mask = np.zeros(count, dtype=bool)
+		if not count:
+			return mask
+		centres, radii, bmin, bmax, _ = self.world()
+		if origin is not None:
+			origin = np.asarray(origin, dtype=np.float32)
+
+		stack = [0]
+		while stack:
+			node = stack.pop()
+			lo, hi = bmin[node], bmax[node]
+			if planes is not None:
+				# Positive vertex of the box against each inward facing plane
+				pv = np.where(planes[:, :3] >= 0.0, hi, lo)
+				if np.any((pv * planes[:, :3]).sum(axis=1) + planes[:, 3] < 0.0):
+					continue
+			if origin is not None and distance > 0.0:
+				nearest = np.clip(origin, lo, hi)
+				if np.dot(nearest - origin, nearest - origin) > distance * distance:
+					continue
+			left = self.node_left[node]
+			if left != -1:
+				stack.append(left)
+				stack.append(self.node_right[node])
+				continue
+
+			start = self.node_start[node]
+			idx = self.order[start : start + self.node_count[node]]
+			keep = np.ones(len(idx), dtype=bool)
+			if planes is not None:
+				d = centres[idx] @ planes[:, :3].T + planes[:, 3]
+				keep &= (d >= -radii[idx, None]).all(axis=1)
+			if origin is not None and distance > 0.0:
+				delta = np.linalg.norm(centres[idx] - origin, axis=1) - radii[idx]
+				keep &= delta <= distance
+			mask[idx[keep]] = True
+		return mask
+
+	def ray_cast(self, origin, direction) -> tuple[bpy.types.Object | None, float]:
+		"""Nearest sub-object whose bounding sphere is hit by the ray."""
+		if not self.objects:
+			return None, float("inf")
+		centres, radii, bmin, bmax, _ = self.world()
+		o = np.asarray(origin, dtype=np.float32)
+		d = np.asarray(direction, dtype=np.float32)
+		d = d / max(float(np.linalg.norm(d)), 1e-12)
+		with np.errstate(divide="ignore", invalid="ignore"):
+			inv = 1.0 / d
+
+		best, best_t = None, float("inf")
+		stack = [0]
+		while stack:
+			node = stack.pop()
+			t0 = (bmin[node] - o) * inv
+			t1 = (bmax[node] - o) * inv
+			near = np.nanmax(np.minimum(t0, t1))
+			far = np.nanmin(np.maximum(t0, t1))
+			if far < max(near, 0.0) or near > best_t:
+				continue
+			left = self.node_left[node]
+			if left != -1:
+				stack.append(left)
+				stack.append(self.node_right[node])
+				continue
+
+			start = self.node_start[node]
+			for i in self.order[start : start + self.node_count[node]]:
+				oc = o - centres[i]
+				b = float(np.dot(oc, d))
+				c = float(np.dot(oc, oc)) - float(radii[i]) ** 2
+				disc = b * b - c
+				if disc < 0.0:
+					continue
+				t = -b - disc**0.5
+				if t < 0.0:
+					t = -b + disc**0.5  # origin inside the sphere
+				if 0.0 <= t < best_t:
+					best, best_t = self.objects[i], t
+		return best, best_t
+
+	def apply_visibility(self, mask: np.ndarray, mode: str = "BOUNDS"):
+		"""Hide or draw as bounds the sub-objects outside mask."""
+		for obj, keep in zip(self.objects, mask):
+			try:
+				if mode == "HIDE":
+					if obj.hide_viewport == bool(keep):
+						obj.hide_viewport = not keep
+					if obj.display_type == "BOUNDS":
+						obj.display_type = "TEXTURED"
+				else:
+					want = "TEXTURED" if keep else "BOUNDS"
+					if obj.display_type != want:
+						obj.display_type = want
+					if obj.hide_viewport:
+						obj.hide_viewport = False
+			except ReferenceError:
+				continue
+
+	def restore(self):
+		self.apply_visibility(np.ones(len(self.objects), dtype=bool))
+
+	def alive(self) -> bool:
+		try:
+			return bool(self.objects) and all(o.name for o in self.objects)
+		except ReferenceError:
+			return False
+
+
+def register_bounds(bvh: SphereBVH):
+	if bvh not in _MODELS:
+		_MODELS.append(bvh)
+
+
+def frustum_planes(perspective_matrix: Matrix) -> np.ndarray:
+	"""Six inward facing planes (a, b, c, d) from a view projection matrix."""
+	m = np.array(perspective_matrix, dtype=np.float32)
+	planes = np.array(
+		[
+			m[3] + m[0],
+			m[3] - m[0],
+			m[3] + m[1],
+			m[3] - m[1],
+			m[3] + m[2],
+			m[3] - m[2],
+		],
+		dtype=np.float32,
+	)
+	planes /= np.linalg.norm(planes[:, :3], axis=1)[:, None]
+	return planes
+
+
+def _view_region(context=None):
+	screen = (context or bpy.context).screen
+	if screen is None:
+		return None
+	for area in screen.areas:
+		if area.type == "VIEW_3D":
+			return area.spaces.active.region_3d
+	return None
+
+
+def pick(origin, direction) -> tuple[bpy.types.Object | None, float]:
+	"""Sub-object under the ray across every registered model."""
+	best, best_t = None, float("inf")
+	for bvh in _MODELS:
+		if not bvh.alive():
+			continue
+		obj, t = bvh.ray_cast(origin, direction)
+		if t < best_t:
+			best, best_t = obj, t
+	return best, best_t
+
+
+def cull(region_3d=None, mode: str = "BOUNDS", distance: float = 0.0):
+	"""Run the visibility pass for every registered model against one viewport."""
+	_MODELS[:] = [bvh for bvh in _MODELS if bvh.alive()]
+	if region_3d is None:
+		region_3d = _view_region()
+	if region_3d is None:
+		return
+	planes = frustum_planes(region_3d.perspective_matrix)
+	origin = region_3d.view_matrix.inverted().to_translation()
+	for bvh in _MODELS:
+		bvh.apply_visibility(bvh.visible(planes, origin, distance), mode)
+
+
+def _cull_timer():
+	cull(None, _cull_settings["mode"], _cull_settings["distance"])
+	return _TIMER_INTERVAL
+
+
+def install_culling(mode: str = "BOUNDS", distance: float = 0.0):
+	_cull_settings["mode"] = mode
+	_cull_settings["distance"] = distance
+	if not bpy.app.timers.is_registered(_cull_timer):
+		bpy.app.timers.register(_cull_timer, first_interval=0.0)
+
+
+def uninstall_culling():
+	if bpy.app.timers.is_registered(_cull_timer):
+		bpy.app.timers.unregister(_cull_timer)
+	for bvh in _MODELS:
+		if bvh.alive():
+			bvh.restore()
+
+
+def culling_installed() -> bool:
+	return bpy.app.timers.is_registered(_cull_timer)
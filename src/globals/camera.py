@@ -1,13 +1,19 @@
 import math
 import bpy
+import numpy as np
 from dataclasses import dataclass
 from mathutils import Matrix, Vector
+from mathutils.kdtree import KDTree
 
 
 def engine_to_blender(v: Vector) -> Vector:
     return Vector((v.x, v.z, -v.y))
 
 
+# Cameras that follow a target object on frame change
+_TRACKED: list["Camera"] = []
+
+
 class Camera:
     @dataclass(slots=True)
     class INFO:
@@ -16,6 +22,8 @@ class Camera:
         position: Vector
 
     def __init__(self, path: str):
+        self.target: bpy.types.Object | None = None
+        self.bone: str | None = None  # pose bone of target that is followed, None for its origin
         self.read(path)
 
     def read(self, path: str):
@@ -34,17 +42,113 @@ class Camera:
                 radius = float(l[3])
                 positions = Vector([float(x) for x in l[4:7]])
                 details.append(Camera.INFO(area, radius, positions))
+        self.zones = details
+        self.build_index()
         self.objs: list[bpy.types.Object] = []
         for i in range(len(details)):
             datablock = bpy.data.cameras.new(f"yCamera{i}")
             o = bpy.data.objects.new("YCAMERA", datablock)
             bpy.context.scene.collection.objects.link(o)
             self.objs.append(o)
-        for detail, obj in zip(details, self.objs):
+        for i, obj in enumerate(self.objs):
             e = bpy.data.objects.new("SPHERE", None)
             bpy.context.scene.collection.objects.link(e)
-            e.location = engine_to_blender(detail.area)
+            e.location = self.centres[i]
 
             e.empty_display_type = "SPHERE"
-            e.empty_display_size = detail.radius
-            obj.location = engine_to_blender(detail.position)
\ No newline at end of file
+            e.empty_display_size = float(self.radii[i])
+            obj.location = self.positions[i]
+
+    def build_index(self):
+        # Zones in Blender space, one row per camera.txt entry
+        count = len(self.zones)
+        self.centres = np.zeros((count, 3), dtype=np.float32)
+        self.radii = np.zeros(count, dtype=np.float32)
+        self.positions = np.zeros((count, 3), dtype=np.float32)
+        for i, detail in enumerate(self.zones):
+            self.centres[i] = engine_to_blender(detail.area)
+            self.radii[i] = detail.radius
+            self.positions[i] = engine_to_blender(detail.position)
+
+        self.max_radius = float(self.radii.max()) if count else 0.0
+        self.tree = KDTree(count)
+        for i, co in enumerate(self.centres):
+            self.tree.insert(co, i)
+        self.tree.balance()
+
+    def zones_at(self, point: Vector) -> list[int]:
+        """Indices of the zones containing point, innermost first."""
+        found = []
+        for co, i, dist in self.tree.find_range(point, self.max_radius):
+            if dist <= self.radii[i]:
+                found.append((dist / max(float(self.radii[i]), 1e-6), i))
+        found.sort()
+        return [i for _, i in found]
+
+    def zone_at(self, point: Vector) -> int | None:
+        """Zone covering point, falling back to the nearest zone centre."""
+        if not self.zones:
+            return None
+        zones = self.zones_at(point)
+        if zones:
+            return zones[0]
+        return self.tree.find(point)[1]
+
+    def camera_at(self, point: Vector) -> bpy.types.Object | None:
+        i = self.zone_at(point)
+        if i is None:
+            return None
+        return self.objs[i]
+
+    def track(self, target: bpy.types.Object, bone: str | None = None):
+        """Switch the scene camera to the zone holding target on every frame.
+
+        Animation moves an armature's bones rather than the object, so for an
+        armature the head of bone (its first root bone by default) is followed.
+        """
+        if bone is None and target.type == "ARMATURE":
+            bone = next((b.name for b in target.data.bones if b.parent is None), None)
+        self.target = target
+        self.bone = bone
+        if self not in _TRACKED:
+            _TRACKED.append(self)
+        install_camera_switcher()
+
+    def tracked_point(self) -> Vector:
+        """Where the target is this frame, in world space."""
+        if self.bone is not None:
+            return self.target.matrix_world @ self.target.pose.bones[self.bone].head
+        return self.target.matrix_world.to_translation()
+
+    def untrack(self):
+        self.target = self.bone = None
+        if self in _TRACKED:
+            _TRACKED.remove(self)
+
+
+def _camera_switch_handler(scene):
+    for cam in _TRACKED:
+        try:
+            point = cam.tracked_point()
+        except (AttributeError, KeyError, ReferenceError):
+            continue  # target or its bone was deleted
+        obj = cam.camera_at(point)
+        if obj is None:
+            continue
+        try:
+            if scene.camera != obj:
+                scene.camera = obj
+        except ReferenceError:
+            continue  # the zone's camera was deleted
+
+
+def install_camera_switcher():
+    if _camera_switch_handler in bpy.app.handlers.frame_change_post:
+        return
+    bpy.app.handlers.frame_change_post.append(_camera_switch_handler)
+
+
+def uninstall_camera_switcher():
+    if _camera_switch_handler in bpy.app.handlers.frame_change_post:
+        bpy.app.handlers.frame_change_post.remove(_camera_switch_handler)
+    _TRACKED.clear()
@@ -0,0 +1,82 @@
+import hashlib
+import os
+import bpy
+
+from ..decode.cache import DECODER_VERSION
+from ..decode.io import map_file
+
+# Bump when what the builders put in a library changes
+LIBRARY_VERSION = 1
+ROOT_PREFIX = "ymp_library_"
+
+
+def library_key(path: str, *extra) -> str:
+	"""Hash of a model file and the import settings (scale, texture files...) that shape the result."""
+	h = hashlib.blake2b(digest_size=20)
+	h.update(repr((LIBRARY_VERSION, DECODER_VERSION) + extra).encode())
+	h.update(map_file(path))
+	return h.hexdigest()
+
+
+def file_signature(paths: list[str]) -> tuple:
+	"""Name, size and mtime of side files such as texture packs, for library_key."""
+	sig = []
+	for path in sorted(paths):
+		try:
+			st = os.stat(path)
+		except OSError:
+			continue
+		sig.append((os.path.basename(path), st.st_size, st.st_mtime_ns))
+	return tuple(sig)
+
+
+def library_path(directory: str, key: str) -> str:
+	return os.path.join(directory, key + ".blend")
+
+
+def write_library(path: str, key: str, armature: bpy.types.Object | None, collections: list[bpy.types.Collection]):
+	"""Save a built model (armature, collections and everything they use) as a library .blend.
+
+	A root collection gathering them is written and then removed again, the scene is left as built.
+	"""
+	root = bpy.data.collections.new(ROOT_PREFIX + key)
+	try:
+		if armature is not None:
+			root.objects.link(armature)
+		for coll in collections:
+			root.children.link(coll)
+		# Textures come from temporary files, the library has to carry them
+		for obj in root.all_objects:
+			for slot in obj.material_slots:
+				if slot.material is None or slot.material.node_tree is None:
+					continue
+				for node in slot.material.node_tree.nodes:
+					image = getattr(node, "image", None)
+					if image is not None and image.packed_file is None and image.source == "FILE":
+						image.pack()
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+		tmp = path + ".tmp"
+		bpy.data.libraries.write(tmp, {root}, path_remap="ABSOLUTE", fake_user=True)
+		os.replace(tmp, path)
+	finally:
+		bpy.data.collections.remove(root)
+
+
+def link_library(path: str, key: str, name: str, collection: bpy.types.Collection) -> bpy.types.Object:
+	"""Instance the model stored in a library .blend, linking it first if needed."""
+	root_name = ROOT_PREFIX + key
+	root = next(
+		(c for c in bpy.data.collections if c.name == root_name and c.library and c.library.filepath == path),
+		None,
+	)
+	if root is None:
+		with bpy.data.libraries.load(path, link=True) as (data_from, data_to):
+			if root_name not in data_from.collections:
+				raise ValueError(f"{path}: no {root_name} collection")
+			data_to.collections = [root_name]
+		root = data_to.collections[0]
+	instance = bpy.data.objects.new(name, None)
+	instance.instance_type = "COLLECTION"
+	instance.instance_collection = root
+	collection.objects.link(instance)
+	return instance
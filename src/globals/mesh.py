@@ -0,0 +1,85 @@
+import hashlib
+import bpy
+import numpy as np
+
+MESH_KEY = "ymp_mesh"
+
+# mesh key -> mesh datablock name
+_MESHES: dict[str, str] = {}
+
+
+def mesh_key(sub, bone_names: list[str], *extra) -> str:
+	"""Identity of the mesh built from a decoded sub-object.
+
+	The sub-object digest plus what it resolves against in its model: the bone
+	names its weights and groups use, and extra values such as texture images.
+	"""
+	bones = sorted(set(sub.groups) | set(np.unique(sub.weight_bones).tolist()))
+	h = hashlib.sha1(sub.digest.encode())
+	h.update(repr(([bone_names[b] for b in bones], extra)).encode())
+	return h.hexdigest()
+
+
+def find_mesh(key: str) -> bpy.types.Mesh | None:
+	"""Mesh in the current file already built from identical data."""
+	name = _MESHES.get(key)
+	mesh = bpy.data.meshes.get(name) if name else None
+	if mesh is None or mesh.get(MESH_KEY) != key:
+		_MESHES.pop(key, None)
+		return None
+	return mesh
+
+
+def register_mesh(mesh: bpy.types.Mesh, key: str):
+	mesh[MESH_KEY] = key
+	_MESHES[key] = mesh.name
+
+
+def fill_mesh(mesh: bpy.types.Mesh, positions: np.ndarray, faces: np.ndarray):
+	"""Triangle mesh from arrays, what ``from_pydata`` does without the tuple round trip."""
+	mesh.vertices.add(len(positions))
+	mesh.vertices.foreach_set("co", np.ascontiguousarray(positions, dtype=np.float32).ravel())
+	mesh.loops.add(len(faces) * 3)
+	mesh.polygons.add(len(faces))
+	mesh.polygons.foreach_set("loop_start", np.arange(0, len(faces) * 3, 3, dtype=np.int32))
+	mesh.polygons.foreach_set("vertices", np.ascontiguousarray(faces, dtype=np.int32).ravel())
+	if len(faces):
+		mesh.shade_flat()
+		mesh.update(calc_edges=True)
+
+
+def set_loop_uvs(mesh: bpy.types.Mesh, name: str, uvs: np.ndarray, faces: np.ndarray):
+	"""UV layer from per-vertex UVs, loops follow the face order used by fill_mesh."""
+	uv_layer = mesh.uv_layers.new(name=name)
+	uv_layer.data.foreach_set("uv", uvs[faces.ravel()].astype(np.float32).ravel())
+	return uv_layer
+
+
+def add_weights(obj: bpy.types.Object, sub, bone_names: list[str], create: bool = False):
+	"""Write the CSR skin weights of a decoded sub-object into vertex groups."""
+	offsets = sub.weight_offsets
+	counts = np.diff(offsets)
+	vertices = np.repeat(np.arange(len(counts), dtype=np.int32), counts)
+	groups = obj.vertex_groups
+	for v_idx, bone_idx, w in zip(vertices.tolist(), sub.weight_bones.tolist(), sub.weight_values.tolist()):
+		if w <= 0.0:
+			continue
+		name = bone_names[bone_idx]
+		group = groups.get(name)
+		if group is None:
+			if not create:
+				continue
+			group = groups.new(name=name)
+		group.add([v_idx], w, "REPLACE")
+
+
+def add_groups(obj: bpy.types.Object, sub, bone_names: list[str]):
+	"""The vertex groups add_weights(create=True) makes, in the same order, without weights.
+
+	For objects reusing a mesh, whose weights already index groups in this order.
+	"""
+	positive = sub.weight_values > 0.0
+	bones, first = np.unique(sub.weight_bones[positive], return_index=True)
+	for b in bones[np.argsort(first)].tolist():
+		if bone_names[b] not in obj.vertex_groups:
+			obj.vertex_groups.new(name=bone_names[b])
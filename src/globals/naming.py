@@ -0,0 +1,79 @@
+import os
+import bpy
+
+SEP = ":"
+MAX_NAME = 255 if bpy.app.version >= (4, 3, 0) else 63  # datablock name limit in bytes, raised in Blender 4.3
+MAX_STEM = 40
+
+# Prefixes handed out this session
+_RESERVED: set[str] = set()
+
+
+def _id_collections():
+	"""The datablock types a Namespace names."""
+	return (
+		bpy.data.objects,
+		bpy.data.meshes,
+		bpy.data.materials,
+		bpy.data.armatures,
+		bpy.data.collections,
+	)
+
+
+def _taken(prefix: str) -> bool:
+	# Orphans count too, a leftover mesh would push the new one to .001
+	if prefix in _RESERVED:
+		return True
+	head = prefix + SEP
+	return any(name.startswith(head) for coll in _id_collections() for name in coll.keys())
+
+
+def _fit(name: str, suffix: str = "") -> str:
+	"""name cut to leave room for suffix within Blender's limit, then suffix."""
+	room = MAX_NAME - len(suffix.encode("utf-8"))
+	return name.encode("utf-8")[:room].decode("utf-8", errors="ignore") + suffix
+
+
+class Namespace:
+	"""Per-import name reservation.
+
+	Datablocks are named ``<stem>:<base>`` where stem comes from the source file,
+	so every name is unique up front and Blender never has to append ``.001``.
+	"""
+
+	def __init__(self, stem: str):
+		stem = os.path.splitext(os.path.basename(stem))[0] or "ymp"
+		stem = stem.encode("utf-8")[:MAX_STEM].decode("utf-8", errors="ignore")
+		prefix = stem
+		n = 1
+		while _taken(prefix):
+			n += 1
+			prefix = f"{stem}_{n}"
+		_RESERVED.add(prefix)
+		self.stem = stem
+		self.prefix = prefix
+		self.names: set[str] = set()
+
+	def __call__(self, base: str) -> str:
+		full = f"{self.prefix}{SEP}{base}"
+		name = _fit(full)
+		n = 1
+		while name in self.names:
+			n += 1
+			name = _fit(full, f"~{n}")
+		self.names.add(name)
+		return name
+
+	def datablocks(self) -> list[bpy.types.ID]:
+		"""Every datablock created under this namespace that still exists."""
+		found = []
+		for coll in _id_collections():
+			for name in self.names:
+				if (db := coll.get(name)) is not None:
+					found.append(db)
+		return found
+
+	def discard(self):
+		"""Remove everything created under this namespace, used to roll back an import."""
+		bpy.data.batch_remove(self.datablocks())
+		self.names.clear()
@@ -0,0 +1,84 @@
+import hashlib
+import bpy
+import numpy as np
+
+FINGERPRINT_KEY = "ymp_skeleton"
+BONE_NAMES_KEY = "ymp_bone_names"
+BONE_TABLE_KEY = "ymp_bone_table"
+
+# fingerprint -> armature object name
+_ARMATURES: dict[str, str] = {}
+
+
+def fingerprint(skeleton, *extra) -> str:
+	"""Hash of a decoded skeleton (names, parents, transforms), extra values (scale, format) are mixed in."""
+	h = hashlib.sha1()
+	for e in extra:
+		h.update(repr(e).encode())
+	h.update("\x00".join(skeleton.names).encode("utf-8"))
+	h.update(np.ascontiguousarray(skeleton.parents, dtype=np.int32).tobytes())
+	h.update(np.ascontiguousarray(skeleton.positions, dtype=np.float32).tobytes())
+	h.update(np.ascontiguousarray(skeleton.rotations, dtype=np.float32).tobytes())
+	return h.hexdigest()
+
+
+def find_armature(fp: str) -> bpy.types.Object | None:
+	"""Armature in the current file built from an identical bone table."""
+	name = _ARMATURES.get(fp)
+	obj = bpy.data.objects.get(name) if name else None
+	if obj is None or obj.get(FINGERPRINT_KEY) != fp:
+		obj = next(
+			(
+				o
+				for o in bpy.data.objects
+				if o.type == "ARMATURE" and o.get(FINGERPRINT_KEY) == fp
+			),
+			None,
+		)
+	if obj is None or not obj.users_scene:
+		_ARMATURES.pop(fp, None)
+		return None
+	_ARMATURES[fp] = obj.name
+	return obj
+
+
+def register_armature(
+	obj: bpy.types.Object, fp: str, bone_names: list[str], skeleton=None, matrices=None, keep_roots: bool = True
+):
+	"""Make obj findable by fp. bone_names are the names Blender gave the bones, in file order.
+
+	With skeleton and the (n, 4, 4) armature space matrices the bones were
+	built with, the bone table is kept for the exporter, see imported_bone_table.
+	keep_roots is False when the roots' rows are not in the form the exporter
+	writes (a tangent model's roots carry no axis change).
+	"""
+	obj[FINGERPRINT_KEY] = fp
+	obj[BONE_NAMES_KEY] = list(bone_names)
+	if skeleton is not None:
+		obj[BONE_TABLE_KEY] = {
+			"parents": np.asarray(skeleton.parents, dtype=np.int32).tolist(),
+			"positions": np.asarray(skeleton.positions, dtype=np.float32).ravel().tolist(),
+			"rotations": np.asarray(skeleton.rotations, dtype=np.float32).ravel().tolist(),
+			"matrices": np.asarray(matrices, dtype=np.float32).ravel().tolist(),
+			"keep_roots": keep_roots,
+		}
+	_ARMATURES[fp] = obj.name
+
+
+def armature_bone_names(obj: bpy.types.Object, skeleton) -> list[str]:
+	"""The bone names of a reused armature in file order, duplicates in the file carry Blender's ``.001``."""
+	return list(obj.get(BONE_NAMES_KEY, skeleton.names))
+
+
+def imported_bone_table(obj: bpy.types.Object) -> dict[str, np.ndarray] | None:
+	"""The bone table obj was built from, as encode.skeleton.keep_imported takes it, None if it was not imported."""
+	table = obj.get(BONE_TABLE_KEY)
+	if table is None:
+		return None
+	return {
+		"parents": np.array(table["parents"], dtype=np.int32),
+		"positions": np.array(table["positions"], dtype=np.float32).reshape(-1, 3),
+		"rotations": np.array(table["rotations"], dtype=np.float32).reshape(-1, 3),
+		"matrices": np.array(table["matrices"], dtype=np.float32).reshape(-1, 4, 4),
+		"keep_roots": bool(table.get("keep_roots", True)),
+	}
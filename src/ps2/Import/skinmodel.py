@@ -1,31 +1,12 @@
-from struct import unpack_from
-from typing import Iterable
 import warnings
 import math
 import bpy
 from mathutils import Euler, Matrix, Vector
-import bmesh
-
-
-def emit_strip_faces(strip, faces, face_uvs, face_materials, mat_id):
-    for t in range(len(strip) - 2):
-        if t & 1:
-            (a, ua), (b, ub), (c, uc) = strip[t + 1], strip[t], strip[t + 2]
-        else:
-            (a, ua), (b, ub), (c, uc) = strip[t], strip[t + 1], strip[t + 2]
-
-        if a == b or b == c or a == c:
-            continue
-
-        faces.append((a, b, c))
-        face_uvs.append((ua, ub, uc))
-        face_materials.append(mat_id)
-
-
-def get_view(src: memoryview, offset: int):
-	b = src.cast("B")
-	i = b.cast("I")
-	return b[i[offset // 4] :]
+from ...decode import Model, decode_yobj
+from ...globals.bounds import SphereBVH, register_bounds
+from ...globals.skeleton import armature_bone_names, find_armature, fingerprint, register_armature
+from ...globals.naming import Namespace
+from ...globals.mesh import add_groups, add_weights, fill_mesh, find_mesh, mesh_key, register_mesh, set_loop_uvs
 
 
 def link(obj: bpy.types.Object, mode="EDIT"):
@@ -41,39 +22,57 @@ def link(obj: bpy.types.Object, mode="EDIT"):
 class SkinModel:
 	AXIS_FIX = Matrix.Rotation(math.radians(-90.0), 4, "X")
 
-	def __init__(self, file: memoryview, scale: float):
+	def __init__(
+		self,
+		file: memoryview | Model,
+		scale: float,
+		share_armature: bool = True,
+		names: Namespace | None = None,
+		share_meshes: bool = True,
+	):
+		self.names = names or Namespace("ymp")
+		self.share_armature = share_armature
+		self.share_meshes = share_meshes
+		self.shared = False
 		if file:
-			self.file = file.cast("I")
+			self.model = file if isinstance(file, Model) else decode_yobj(file)
 			self.scale = scale
 			self.create()
 
 	def create(self):
 		AXIS_FIX = Matrix.Rotation(math.radians(-90.0), 4, "X")
+		self.tex_array: list[bpy.types.Image] = []
+		self.bone_names: list[str] = []
 
-		s = bpy.data.armatures.new("0")
-		self.armature = bpy.data.objects.new("ympBone", s)
 		NULL = -1
-		if (bone_count := self.file[5]) <= 0:
+		skeleton = self.model.skeleton
+		bone_count = len(skeleton)
+		if bone_count > 0:
+			self.skeleton = fingerprint(skeleton, "YOBJ", self.scale)
+			if self.share_armature and (arm := find_armature(self.skeleton)):
+				print("SkinModel: Reusing armature %s" % arm.name)
+				self.armature = arm
+				self.shared = True
+				self.bone_names = armature_bone_names(arm, skeleton)
+				self.bones = [arm.data.bones.get(name) for name in self.bone_names]
+				return
+
+		s = bpy.data.armatures.new(self.names("Skeleton"))
+		self.armature = bpy.data.objects.new(self.names("ympBone"), s)
+		if bone_count <= 0:
 			warnings.warn("No bones. skipping", BytesWarning)
 		else:
-			assert (bone := get_view(self.file, 32)) != NULL
 			link(self.armature)
 			self.bones: list[bpy.types.EditBone] = [None] * bone_count
 			self.world = [Matrix.Identity(4) for i in range(bone_count)]
 			self.local = [Matrix.Identity(4) for i in range(bone_count)]
 			for i in range(bone_count):
-				b = bone[i * 80 : (i * 80) + 80]
-				name = (
-					b.cast("c")[:16].tobytes().split(b"\x00", 1)[0].decode("shift_jis")
-				)
-				bpy_bone = self.armature.data.edit_bones.new(name)
+				bpy_bone = self.armature.data.edit_bones.new(skeleton.names[i])
 				self.bones[i] = bpy_bone
 
-				px, py, pz = b[16:28].cast("f")
-				rx, ry, rz = b[32:44].cast("f")
-				positions = Vector((px, py, pz))
-				rotations = Euler((rx, ry, rz), "ZYX")
-				parent = b[48:].cast("i")[0]
+				positions = Vector(skeleton.positions[i])
+				rotations = Euler(skeleton.rotations[i], "ZYX")
+				parent = int(skeleton.parents[i])
 				local = Matrix.LocRotScale(positions, rotations, None)
 
 				if parent == NULL:
@@ -85,10 +84,7 @@ class SkinModel:
 
 			DEFAULT_LEN = 0.05 * self.scale
 
-			parents = [
-				bone[i * 80 : (i * 80) + 80][48:].cast("i")[0]
-				for i in range(bone_count)
-			]
+			parents = skeleton.parents.tolist()
 
 			for i, bpy_bone in enumerate(self.bones):
 				mat = self.world[i]
@@ -112,53 +108,15 @@ class SkinModel:
 				bpy_bone.tail = head + direction * max(length, 1e-5)
 				bpy_bone.align_roll(mat.to_3x3() @ Vector((0, 0, 1)))
 
-		self.tex_array: list[bpy.types.Image] = []
-
-	def parse_weights(self, weight: memoryview):
-		view = weight.cast("B")
-		offset = 0
-		all_weights = []
-
-		while offset + 16 <= len(view):
-
-			# Read potential VIF header
-			pad = view[offset:offset+12]
-			opcode = int.from_bytes(view[offset+12:offset+14], "little")
-			elements = view[offset+15]
-
-			# Check for valid UNPACK 0x280 packet
-			if pad == b"\x00" * 12 and opcode == 0x280:
-
-				if elements == 0:
-					elements = 256
-
-				offset += 16  # Skip VIF header
-
-				for _ in range(elements):
-					if offset + 16 > len(view):
-						break
-
-					w0, w1, w2, w3 = view[offset:offset+16].cast("f")
-					all_weights.append((w0, w1, w2, w3))
-					offset += 16
-
-			else:
-				# Desync recovery: crawl forward like a wounded soldier
-				offset += 1
-
-		return all_weights
-
+			# Edit bones die with edit mode, keep the names they ended up with
+			self.bone_names = [b.name for b in self.bones]
+			register_armature(self.armature, self.skeleton, self.bone_names)
 
 	def set_texture(self, path: str):
-		if (tex_count := self.file[6]) <= 0:
+		if not self.model.textures:
 			warnings.warn("No textures in file. Skipping.", BytesWarning)
 			return
 
-		texture_ptr = get_view(self.file, 36)
-		if texture_ptr == -1:
-			warnings.warn("Texture pointer invalid.", BytesWarning)
-			return
-
 		# Pre-scan folder for TGAs
 		import os
 		tga_files = {
@@ -167,10 +125,7 @@ class SkinModel:
 			if f.lower().endswith(".tga")
 		}
 
-		for i in range(tex_count):
-			t = texture_ptr[i * 16 : (i * 16) + 16].cast("c")
-			name = t[:16].tobytes().split(b"\x00", 1)[0].decode("shift_jis")
-
+		for name in self.model.textures:
 			if not name:
 				continue
 
@@ -187,143 +142,90 @@ class SkinModel:
 
 
 	def start(self):
-		object_groups = get_view(self.file, 40)
-		assert object_groups != -1
-		obj_g_count = self.file[11]
+		for _ in self.build():
+			pass
 
+	def build(self):
+		"""Build the sub-objects one at a time, yielding (built, total) after each."""
 		self.cols: list[bpy.types.Collection] = []
-		for i in range(obj_g_count):
-			o = object_groups[i * 32 : (i * 32) + 32].cast("c")
-			name = o[:16].tobytes().split(b"\x00", 1)[0].decode("shift_jis")
-			collect = bpy.data.collections.new(name)
+		for name in self.model.collections:
+			collect = bpy.data.collections.new(self.names(name))
+			collect["ymp_name"] = name
 			bpy.context.scene.collection.children.link(collect)
 			self.cols.append(collect)
 
-		subobject_count = self.file[4]
-		subobject_ptr = get_view(self.file, 28)
-		for i in range(subobject_count):
-			_ = bpy.data.meshes.new("ympSubObject")
-
-			bpy_obj = bpy.data.objects.new(f"Object{i:02d}", _)
-			subobj = subobject_ptr[i * 64 : (i * 64) + 64]
-			skin_tbl_count, uv_count, a, b, og_index, c, d, e = subobj[:32].cast("I")
-			self.cols[og_index].objects.link(bpy_obj)
-			f = self.file.cast("B")
-			sub = subobj.cast("I")
-			skin_stream = f[sub[2] :]
-			primitive_stream = f[sub[3] :]
-			vertex_colour = f[sub[7] :]
-			colour_count = sub[9]
-			bounding_sphere = subobj[48:64].cast("f")
-			centre = SkinModel.AXIS_FIX @ Vector(
-				(bounding_sphere[0], bounding_sphere[1], bounding_sphere[2])
-			)
-
-			radius = bounding_sphere[3]
-			sphere = bpy.data.objects.new(f"ySphere_{i:02d}", None)
+		subobject_count = len(self.model.subobjects)
+		self.bounds = SphereBVH()
+		new_objects = []
+		for built, sub in enumerate(self.model.subobjects, 1):
+			i = sub.index  # file index, stable when only some sub-objects were decoded
+			key = mesh_key(sub, self.bone_names, "YOBJ")
+			_ = find_mesh(key) if self.share_meshes else None
+			reused = _ is not None
+			if not reused:
+				_ = bpy.data.meshes.new(self.names(f"ympSubObject{i:02d}"))
+
+			bpy_obj = bpy.data.objects.new(self.names(f"Object{i:02d}"), _)
+			self.cols[sub.collection].objects.link(bpy_obj)
+			centre = Vector(sub.centre)
+
+			radius = sub.radius
+			sphere = bpy.data.objects.new(self.names(f"ySphere_{i:02d}"), None)
 			sphere.empty_display_type = "SPHERE"
 			sphere.empty_display_size = radius
 			sphere.location = centre
-			self.cols[og_index].objects.link(sphere)
+			self.cols[sub.collection].objects.link(sphere)
 
 			sphere.parent = bpy_obj
 			sphere.hide_select = True
 			sphere.hide_render = True
 			sphere.hide_viewport = True
+			self.bounds.add(bpy_obj, centre, radius)
 
 			bpy_obj.display_type = "TEXTURED"
-			used = [False] * len(self.bones)
-			tables = []
-			table_offsets = []
-			base_verts = []
 
 			bpy_obj.parent = self.armature
 			mod = bpy_obj.modifiers.new(name="Armature", type="ARMATURE")
 			mod.object = self.armature
 
-			global_verts, global_norms = self.parse_vertex_buffer(subobj)
-
-			tables = []
-			for t in range(skin_tbl_count):
-				table = self.send_table(skin_stream[t * 32 : (t * 32) + 32])
-				tables.append(table)
-
-			used_bones = set()
-			for table in tables:
-				for b in table["palette"]:
-					if b >= 0:
-						used_bones.add(b)
-
-			for b in used_bones:
-				name = self.bones[b].name
+			for b in sub.groups:
+				name = self.bone_names[b]
 				if name not in bpy_obj.vertex_groups:
 					bpy_obj.vertex_groups.new(name=name)
-			'''May actually be vertex weights. Research into this
-			'''
-			parsed_weights = self.parse_weights(vertex_colour) # yes i know. I cant be arsed
-			verts, faces, uvs, vtx_weights, out_norms, face_uvs, face_materials = self.send_primitive_table(
-				primitive_stream,
-				uv_count,
-				tables,
-				global_verts,
-				global_norms,
-				parsed_weights,
-			)
-
 
+			if reused:
+				# The mesh and its weights exist, only the groups they index are needed
+				add_groups(bpy_obj, sub, self.bone_names)
+				yield built, subobject_count
+				continue
+			new_objects.append(bpy_obj)
 			mesh = bpy_obj.data
 
 			mesh.clear_geometry()
-			mesh.from_pydata(verts, [], faces)
+			fill_mesh(mesh, sub.positions, sub.faces)
 			mesh.update()
 			# if hasattr(self, "materials") and self.materials:
 			# 	mesh.materials.clear()
 			# 	for mat in self.materials:
 			# 		mesh.materials.append(mat)
-			loop_normals = [None] * len(mesh.loops)
-
-			for poly in mesh.polygons:
-				for li, vi in zip(poly.loop_indices, poly.vertices):
-					loop_normals[li] = out_norms[vi]
-			assert all(loop_normals)
-			mesh.normals_split_custom_set(loop_normals)
+			mesh.normals_split_custom_set(sub.normals[sub.faces.ravel()])
 
-			uv_layer = mesh.uv_layers.new(name="UVMap")
+			uv_layer = set_loop_uvs(mesh, "UVMap", sub.uvs, sub.faces)
+			print("polys", len(mesh.polygons), "loops", len(mesh.loops), "uv_data", len(uv_layer.data))
 
-			loop_i = 0
-			print("polys", len(mesh.polygons), "face_uvs", len(face_uvs), "loops", len(mesh.loops), "uv_data", len(uv_layer.data))
-			us = [u for u, v in uvs]
-			vs = [v for u, v in uvs]
-			print(min(us), max(us), min(vs), max(vs))
-
-			assert len(mesh.polygons) == len(face_uvs)
-			assert len(mesh.loops) == len(uv_layer.data)
-
-			for poly, tri_uvs in zip(mesh.polygons, face_uvs):
-				for corner in range(3):
-					uv_layer.data[poly.loop_indices[corner]].uv = tri_uvs[corner]
-
-			# for poly, mat_id in zip(mesh.polygons, face_materials):
+			# for poly, mat_id in zip(mesh.polygons, sub.face_materials):
 			# 	if mat_id < len(mesh.materials):
 			# 		poly.material_index = mat_id
 
-
-			for v_idx, ws in vtx_weights.items():
-				for bone_idx, w in ws:
-					if w <= 0.0:
-						continue
-
-					name = self.bones[bone_idx].name
-
-					if name not in bpy_obj.vertex_groups:
-						bpy_obj.vertex_groups.new(name=name)
-
-					bpy_obj.vertex_groups[name].add([v_idx], w, "REPLACE")
+			add_weights(bpy_obj, sub, self.bone_names, create=True)
 
 			mesh.update()
 			mesh.calc_loop_triangles()
+			register_mesh(mesh, key)
+			yield built, subobject_count
+		register_bounds(self.bounds.build(self.armature))
 		bpy.ops.object.mode_set(mode="OBJECT")
-		for area in bpy.context.screen.areas:
+		for area in bpy.context.screen.areas if bpy.context.screen else ():
 			if area.type == "VIEW_3D":
 				space = area.spaces.active
 				space.overlay.show_bones = False
@@ -331,7 +233,8 @@ class SkinModel:
 				space.shading.show_backface_culling = False
 		original_active = bpy.context.view_layer.objects.active
 
-		for obj in bpy.context.scene.objects:
+		# Once per new mesh, reused ones were flipped when they were built
+		for obj in new_objects:
 			if obj.type == "MESH":
 				bpy.context.view_layer.objects.active = obj
 				obj.select_set(True)
@@ -343,38 +246,11 @@ class SkinModel:
 
 		bpy.context.view_layer.objects.active = original_active
 
-	def parse_vertex_buffer(self, subobj: memoryview):
-		f = self.file.cast("B")
-
-		vtx_indirect_ptr = subobj.cast("I")[0x18 // 4]
-		vtx_indirect = f[vtx_indirect_ptr:]
-		f = self.file.cast("B")
-		vtx_indirec = vtx_indirect.cast("I")
-		vtx_indirect = f[vtx_indirec[0] :]
-
-		vtx_count = vtx_indirect[0x0E]
-
-		vtx_data = vtx_indirect[0x10:]
-
-		verts: list[Vector] = []
-
-		for i in range(vtx_count):
-			x, y, z, _ = vtx_data[i * 16 : (i * 16) + 16].cast("f")
-			verts.append(SkinModel.AXIS_FIX @ Vector((x, y, z)))
-		size = vtx_count * 16
-		packet = vtx_data[size:]
-		vtx_data = packet[0x10:]
-		norms: list[Vector] = []
-
-		for i in range(vtx_count):
-			x, y, z, _ = vtx_data[i * 16 : (i * 16) + 16].cast("f")
-			norms.append(SkinModel.AXIS_FIX @ Vector((x, y, z)))
-		return verts, norms
 	def build_materials(self):
 		self.materials = []
 
 		for tex in self.tex_array:
-			mat = bpy.data.materials.new(name=tex.name)
+			mat = bpy.data.materials.new(name=self.names(tex.name))
 			mat.use_nodes = True
 
 			nodes = mat.node_tree.nodes
@@ -394,87 +270,3 @@ class SkinModel:
 			links.new(out.inputs["Surface"], emit.outputs["Emission"])
 
 			self.materials.append(mat)
-
-
-	def send_primitive_table(self, stream, count, tables, global_verts, global_norms, parsed_weights):
-		verts = []
-		faces = []
-		face_uvs = []
-		uvs = []
-		weights = {}
-		out_norms = []
-		face_materials = []
-		f = self.file.cast("B")
-		out_vi = 0
-
-		for i in range(count):
-			strea = stream[i * 208 : (i * 208) + 208]
-			UVS = strea.cast("f") # actually overlay colours. Game-specific, we wont import this
-			t = strea.cast("I")
-			X0, Y0, Z0, W0 = UVS[0:4]
-			X1, Y1, Z1, W1 = UVS[4:8]
-
-			info = strea[192:208]
-			INFO2 = info.cast("I")
-			loop_count = INFO2[1]
-			loop_table = INFO2[2]
-			LOOPS = f[loop_table:]
-			texture_id = t[10]
-
-			for j in range(loop_count):
-				strip = []
-
-				entry = LOOPS[j * 16 : (j * 16) + 16].cast("I")
-				block_count = entry[2]
-				block_start = f[entry[3] :]
-
-				for k in range(block_count):
-					BLOCK = block_start[k * 32 : (k * 32) + 32]
-					BI = BLOCK.cast("I")
-					BF = BLOCK.cast("f")
-					global_vi = BI[3]
-
-					if global_vi < 0 or global_vi >= len(global_verts):
-						emit_strip_faces(strip, faces, face_uvs, face_materials, texture_id)
-
-						strip.clear()
-						continue
-
-					u = BF[0]
-					v = 1.0 - BF[1]
-
-					pos = global_verts[global_vi]
-					verts.append(pos.copy())
-					out_norms.append(global_norms[global_vi].normalized())
-
-					uvs.append((u, v))
-
-					weights[out_vi] = []
-
-					if 0 <= global_vi < len(parsed_weights):
-						real_weights = parsed_weights[global_vi]
-						palette = tables[min(k, len(tables) - 1)]["palette"]
-
-						for bone, w in zip(palette, real_weights):
-							if bone >= 0 and w > 0.0:
-								weights[out_vi].append((bone, w))
-
-
-					strip.append((out_vi, (u, v)))
-					out_vi += 1
-
-				emit_strip_faces(strip, faces, face_uvs, face_materials, texture_id)
-
-		return verts, faces, uvs, weights, out_norms, face_uvs, face_materials
-
-	def send_table(self, stream: memoryview):
-		table = stream.cast("I")
-		indices = stream[16:32].cast("i")
-
-		bone_count = table[1]
-
-		palette: list[int] = []
-		for i in range(bone_count):
-			palette.append(indices[i] - 1 if indices[i] > 0 else -1)
-
-		return {"palette": palette}
\ No newline at end of file
@@ -0,0 +1,60 @@
+"""Entry point of the addon's process pools.
+
+A pool task has to name a function the worker can import. The addon's own
+modules sit in a package whose ``__init__`` needs ``bpy``, and putting the
+addon folder on ``sys.path`` in Blender to import them as ``src`` would leave
+a generic top-level ``src`` in Blender's ``sys.modules``, where another
+addon's could clash with it. This file imports nothing of the addon, so it
+is loaded by path under NAME in both processes: in the main one by entry(),
+in every worker by the pool's initializer. The task's own module is then
+imported as ``src`` in the worker only.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing import get_context
+import importlib
+import importlib.util
+import os
+import runpy
+import sys
+
+NAME = "_io_mesh_ymp_worker"
+ADDON_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load():
+	"""This file as module NAME, loaded once per process."""
+	module = sys.modules.get(NAME)
+	if module is None:
+		spec = importlib.util.spec_from_file_location(NAME, os.path.abspath(__file__))
+		module = importlib.util.module_from_spec(spec)
+		sys.modules[NAME] = module
+		spec.loader.exec_module(module)
+	return module
+
+
+def call(function: str, *args):
+	"""Run ``src.<function>`` ("decode.parallel.decode_to_shared") in this worker."""
+	if ADDON_ROOT not in sys.path:
+		sys.path.insert(0, ADDON_ROOT)
+	module, _, name = function.rpartition(".")
+	return getattr(importlib.import_module(f"src.{module}"), name)(*args)
+
+
+def entry(function: str) -> partial:
+	"""A picklable callable running function in a pool worker, for submit and map."""
+	return partial(load().call, function)
+
+
+def pool(max_workers: int) -> ProcessPoolExecutor:
+	"""A spawn pool whose workers can run what entry() names."""
+	return ProcessPoolExecutor(
+		max_workers=max_workers,
+		mp_context=get_context("spawn"),
+		initializer=runpy.run_path,
+		initargs=(os.path.abspath(__file__),),
+	)
+
+
+if __name__ == "<run_path>":
+	load()  # the pool initializer, register under NAME so tasks unpickle
@@ -0,0 +1,186 @@
+"""Encode a synthetic model, decode it again and compare. Runs without Blender."""
+import os
+import sys
+from struct import pack
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.decode.io import check_file, decode_file  # noqa: E402
+from src.decode.model import Material, Model, Skeleton, SubObject, csr  # noqa: E402
+from src.encode.skeleton import bone_table, keep_imported  # noqa: E402
+from src.encode.xbox import encode_jboy  # noqa: E402
+
+BONES = 8
+
+
+def grid(size: int) -> tuple[np.ndarray, np.ndarray]:
+	"""Vertices and triangles of a size by size quad grid."""
+	x, y = np.meshgrid(np.arange(size, dtype=np.float32), np.arange(size, dtype=np.float32))
+	positions = np.stack((x.ravel(), y.ravel(), np.sin(x + y).ravel()), 1).astype(np.float32)
+	g = np.arange(size * size).reshape(size, size)
+	a, b, c, d = g[:-1, :-1].ravel(), g[1:, :-1].ravel(), g[1:, 1:].ravel(), g[:-1, 1:].ravel()
+	return positions, np.concatenate((np.stack((a, b, c), 1), np.stack((a, c, d), 1))).astype(np.int32)
+
+
+def canonical(faces: np.ndarray) -> np.ndarray:
+	"""Triangles rotated to start at their lowest index (winding kept), then sorted."""
+	faces = np.asarray(faces).reshape(-1, 3)
+	first = faces.argmin(1)[:, None]
+	rotated = np.take_along_axis(faces, (first + np.arange(3)) % 3, 1)
+	return rotated[np.lexsort(rotated.T[::-1])]
+
+
+def subobject(rng, index: int, size: int, materials: list[Material]) -> SubObject:
+	positions, faces = grid(size)
+	count = len(positions)
+	normals = rng.normal(size=(count, 3)).astype(np.float32)
+	normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+	influences = []
+	for n in rng.integers(1, 5, count):
+		# Bone 0 is never in a vertex group, see decode.xbox.decode_subobject
+		bones = rng.choice(np.arange(1, BONES), n, replace=False)
+		weights = rng.random(n) + 0.1
+		influences.append([(int(b), float(w)) for b, w in zip(bones, weights / weights.sum())])
+	offsets, bones, values = csr(influences)
+	centre = (positions.min(0) + positions.max(0)) / 2
+	return SubObject(
+		index=index,
+		collection=index % 2,
+		positions=positions,
+		normals=normals,
+		uvs=rng.random((count, 2), dtype=np.float32),
+		faces=faces,
+		weight_offsets=offsets,
+		weight_bones=bones,
+		weight_values=values,
+		groups=[],
+		centre=tuple(centre.tolist()),
+		radius=float(np.linalg.norm(positions - centre, axis=1).max()),
+		shader="skin_shader",
+		technique=index,
+		diffuse=rng.integers(0, 2**32, count, dtype=np.uint32),
+		materials=materials,
+	)
+
+
+def synthetic_model() -> Model:
+	rng = np.random.default_rng(41)
+	skeleton = Skeleton(
+		[f"bone{i}" for i in range(BONES)],
+		np.array([-1, 0, 1, 2, 1, 4, 0, 6], dtype=np.int32),
+		rng.normal(size=(BONES, 3)).astype(np.float32),
+		rng.uniform(-1.0, 1.0, (BONES, 3)).astype(np.float32),
+	)
+	shared = Material("g_fSpecPow", 10, 4, (8.0,), pack(">f", 8.0).ljust(16, b"\x00"))
+	colour = Material("g_vDiffuse", 13, 16, (0.25, 0.5, 0.75, 1.0), pack(">4f", 0.25, 0.5, 0.75, 1.0))
+	return Model(
+		format="JBOY",
+		skeleton=skeleton,
+		collections=["body", "head"],
+		textures=["body_d", "head_d"],
+		subobjects=[subobject(rng, 0, 12, [shared, colour]), subobject(rng, 1, 7, [shared])],
+	)
+
+
+def test_jboy_roundtrip(tmp_path):
+	model = synthetic_model()
+	layout = encode_jboy(model)
+	path = tmp_path / "synthetic.ymxen"
+	path.write_bytes(layout.chunk(b"JBOY"))
+	decoded = decode_file(str(path), b"JBOY")
+
+	assert decoded.collections == model.collections
+	assert decoded.textures == model.textures
+	assert decoded.skeleton.names == model.skeleton.names
+	np.testing.assert_array_equal(decoded.skeleton.parents, model.skeleton.parents)
+	np.testing.assert_array_equal(decoded.skeleton.positions, model.skeleton.positions)
+	np.testing.assert_array_equal(decoded.skeleton.rotations, model.skeleton.rotations)
+
+	assert len(decoded.subobjects) == len(model.subobjects)
+	for sub, out in zip(model.subobjects, decoded.subobjects):
+		np.testing.assert_allclose(out.positions, sub.positions, atol=1e-6)
+		np.testing.assert_allclose(out.normals, sub.normals, atol=1e-6)
+		np.testing.assert_allclose(out.uvs, sub.uvs, atol=1e-6)
+		np.testing.assert_array_equal(out.diffuse, sub.diffuse)
+		np.testing.assert_array_equal(canonical(out.faces), canonical(sub.faces))
+		np.testing.assert_array_equal(out.weight_offsets, sub.weight_offsets)
+		np.testing.assert_array_equal(out.weight_bones, sub.weight_bones)
+		np.testing.assert_allclose(out.weight_values, sub.weight_values, rtol=1e-6)
+		assert sorted(out.groups) == sorted(set(sub.weight_bones.tolist()))
+		assert [(m.name, m.type, m.size, m.data, m.raw) for m in out.materials] == [
+			(m.name, m.type, m.size, m.data, m.raw) for m in sub.materials
+		]
+		assert (out.shader, out.technique, out.collection) == (sub.shader, sub.technique, sub.collection)
+		np.testing.assert_allclose(out.centre, sub.centre, atol=1e-6)
+		assert np.isclose(out.radius, sub.radius)
+
+	# The POF0 footer lists exactly the pointers the layout wrote, all inside the payload
+	relocations = check_file(str(path))
+	np.testing.assert_array_equal(relocations.fields, layout.pointers())
+
+
+def rotation_zyx(angles: np.ndarray) -> np.ndarray:
+	"""(n, 3, 3) Rx @ Ry @ Rz, what Euler(angles, 'ZYX').to_matrix() gives."""
+	c, s = np.cos(angles), np.sin(angles)
+	one, zero = np.ones(len(angles)), np.zeros(len(angles))
+	rx = np.stack((one, zero, zero, zero, c[:, 0], -s[:, 0], zero, s[:, 0], c[:, 0]), 1).reshape(-1, 3, 3)
+	ry = np.stack((c[:, 1], zero, s[:, 1], zero, one, zero, -s[:, 1], zero, c[:, 1]), 1).reshape(-1, 3, 3)
+	rz = np.stack((c[:, 2], -s[:, 2], zero, s[:, 2], c[:, 2], zero, zero, zero, one), 1).reshape(-1, 3, 3)
+	return rx @ ry @ rz
+
+
+def test_bone_table_keeps_imported_rows():
+	skeleton = synthetic_model().skeleton
+	local = np.tile(np.identity(4), (BONES, 1, 1))
+	local[:, :3, :3] = rotation_zyx(skeleton.rotations.astype(np.float64))
+	local[:, :3, 3] = skeleton.positions
+	world = local.copy()
+	for i, parent in enumerate(skeleton.parents):
+		if parent >= 0:
+			world[i] = world[parent] @ local[i]
+	# Bones point along their own axis with a roll, as the importer builds them, not as the file has them
+	roll = np.identity(4)
+	roll[:3, :3] = rotation_zyx(np.array([[0.0, 0.3, 1.2]]))[0]
+	matrices = world @ roll
+	imported = {
+		"parents": skeleton.parents.copy(),
+		"positions": skeleton.positions.copy(),
+		"rotations": skeleton.rotations.copy(),
+		"matrices": matrices.astype(np.float32),
+	}
+
+	positions, rotations = bone_table(matrices, skeleton.parents)
+	assert not np.allclose(rotations, skeleton.rotations, atol=1e-4)
+	assert keep_imported(positions, rotations, matrices, skeleton.parents, imported) == BONES
+	np.testing.assert_array_equal(positions, skeleton.positions)
+	np.testing.assert_array_equal(rotations, skeleton.rotations)
+
+	# Moving bone 4 changes it and its child 5, the rest are written as imported
+	moved = matrices.copy()
+	moved[4, :3, 3] += 0.5
+	positions, rotations = bone_table(moved, skeleton.parents)
+	expected_positions, expected_rotations = positions.copy(), rotations.copy()
+	assert keep_imported(positions, rotations, moved, skeleton.parents, imported) == BONES - 2
+	for i in range(BONES):
+		if i in (4, 5):
+			np.testing.assert_array_equal(positions[i], expected_positions[i])
+			np.testing.assert_array_equal(rotations[i], expected_rotations[i])
+		else:
+			np.testing.assert_array_equal(positions[i], skeleton.positions[i])
+			np.testing.assert_array_equal(rotations[i], skeleton.rotations[i])
+
+	# A tangent model's roots were imported without the axis change, they are computed with it
+	root = np.array([[1.0, 0, 0, 0], [0, 0, -1, 0], [0, 1, 0, 0], [0, 0, 0, 1]])  # YMXEN.AXIS_FIX
+	positions, rotations = bone_table(matrices, skeleton.parents, root)
+	expected_positions, expected_rotations = positions.copy(), rotations.copy()
+	tangents = dict(imported, keep_roots=False)
+	assert keep_imported(positions, rotations, matrices, skeleton.parents, tangents) == BONES - 1
+	np.testing.assert_array_equal(positions[0], expected_positions[0])
+	np.testing.assert_array_equal(rotations[0], expected_rotations[0])
+	assert not np.allclose(rotations[0], skeleton.rotations[0], atol=1e-4)
+	np.testing.assert_array_equal(positions[1:], skeleton.positions[1:])
+	np.testing.assert_array_equal(rotations[1:], skeleton.rotations[1:])
+
+	# A different bone count (bones added or deleted) keeps nothing
+	assert keep_imported(positions, rotations, matrices[:-1], skeleton.parents[:-1], imported) == 0